@@ -16,6 +16,12 @@ let audioChunks = [];
 let processingAudio = false;
 let processingInterval = null;
 let lastSessionId = null;
+let streamingSessionId = null;
+// 'streaming' or 'batch' once recognition is set up; null while a session is being (re)opened
+let recognitionMode = null;
+// Consecutive streaming session failures, and the pending reconnect attempt
+let streamingRetries = 0;
+let reconnectTimer = null;
 
 // Queue system for TTS playback
 let ttsQueue = [];
@@ -23,6 +29,10 @@ let isPlayingTTS = false;
 
 // Server URL and API
 const SERVER_URL = 'http://127.0.0.1:5015';
+// Streaming session reconnects back off exponentially; after the last one batch recognition takes over
+const STREAM_RETRY_LIMIT = 5;
+const STREAM_RETRY_BASE_MS = 500;
+const STREAM_RETRY_MAX_MS = 8000;
 const TTS_ENDPOINT = 'https://eastus2.tts.speech.microsoft.com/cognitiveservices/v1';
 const SUBSCRIPTION_KEY = 'Fj1KPt7grC6bAkNja7daZUstpP8wZTXsV6Zjr2FOxkO7wsBQ5SzQJQQJ99BCACHYHv6XJ3w3AAAAACOGL3Xg';
 
@@ -499,16 +509,13 @@ function setupAudioProcessing(stream, fromLang, toLang) {
         audioChunks = [];
         processingAudio = false;
         
-        // Start processing interval (process every 2 seconds)
-        processingInterval = setInterval(() => {
-            if (audioChunks.length > 0 && !processingAudio) {
-                processAudioBatch(fromLang, toLang);
-            }
-        }, 2000);
+        streamingRetries = 0;
+        startRecognition(fromLang, toLang);
         
         // Process audio data
         audioProcessor.onaudioprocess = function(e) {
-            if (!isCapturing) return;
+            // Nothing is buffered while no session or batch loop can take the audio
+            if (!isCapturing || !recognitionMode) return;
             
             // Check if there's actual audio playing (avoid sending silence)
             audioAnalyser.getByteFrequencyData(dataArray);
@@ -518,8 +525,9 @@ function setupAudioProcessing(stream, fromLang, toLang) {
             }
             const average = sum / bufferLength;
             
-            // Only collect if there's actual audio (not just silence)
-            if (average > 10) {
+            // Only collect if there's actual audio (not just silence); a streaming
+            // session needs the pauses too, so the recognizer can end utterances
+            if (recognitionMode === 'streaming' || average > 10) {
                 // Get audio data
                 const inputData = e.inputBuffer.getChannelData(0);
                 
@@ -537,6 +545,194 @@ function setupAudioProcessing(stream, fromLang, toLang) {
     }
 }
 
+// Stop sending and buffering audio until recognition is set up again
+function pauseRecognition() {
+    if (processingInterval) {
+        clearInterval(processingInterval);
+        processingInterval = null;
+    }
+    if (reconnectTimer) {
+        clearTimeout(reconnectTimer);
+        reconnectTimer = null;
+    }
+    recognitionMode = null;
+    audioChunks = [];
+}
+
+// Prefer one continuous server-side recognizer; fall back to 2-second batches
+async function startRecognition(fromLang, toLang) {
+    pauseRecognition();
+    stopStreamingSession();
+    
+    const status = await startStreamingSession(fromLang, toLang);
+    // Capture may have stopped while the session was opening
+    if (!isCapturing) {
+        stopStreamingSession();
+        return;
+    }
+    
+    if (status === 'started') {
+        // The event stream may already have failed and scheduled a reconnect
+        if (!streamingSessionId) return;
+        recognitionMode = 'streaming';
+        processingInterval = setInterval(() => {
+            if (audioChunks.length > 0 && !processingAudio) {
+                sendStreamingAudio();
+            }
+        }, 250);
+    } else if (status === 'failed') {
+        retryStreaming(fromLang, toLang);
+    } else {
+        startBatchRecognition(fromLang, toLang);
+    }
+}
+
+function startBatchRecognition(fromLang, toLang) {
+    recognitionMode = 'batch';
+    processingInterval = setInterval(() => {
+        if (audioChunks.length > 0 && !processingAudio) {
+            processAudioBatch(fromLang, toLang);
+        }
+    }, 2000);
+}
+
+// Open a new streaming session after a growing delay, so a backend that is down
+// or at its session cap is not hammered; give up on streaming after the last try
+function retryStreaming(fromLang, toLang) {
+    pauseRecognition();
+    if (streamingRetries >= STREAM_RETRY_LIMIT) {
+        console.warn('Streaming session keeps failing, using batch recognition');
+        startBatchRecognition(fromLang, toLang);
+        return;
+    }
+    
+    const delay = Math.min(STREAM_RETRY_BASE_MS * 2 ** streamingRetries, STREAM_RETRY_MAX_MS);
+    streamingRetries++;
+    console.warn(`Reopening streaming session in ${delay} ms (attempt ${streamingRetries} of ${STREAM_RETRY_LIMIT})`);
+    reconnectTimer = setTimeout(() => {
+        reconnectTimer = null;
+        if (isCapturing) {
+            startRecognition(fromLang, toLang);
+        }
+    }, delay);
+}
+
+// Open a streaming recognition session and start reading its events; resolves to
+// 'started', 'unsupported' (the backend has no sessions) or 'failed' (worth retrying)
+async function startStreamingSession(fromLang, toLang) {
+    try {
+        const response = await fetch(`${SERVER_URL}/sessions`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                from_lang: fromLang,
+                to_lang: toLang
+            })
+        });
+        if (response.status === 404 || response.status === 405) {
+            console.warn('Streaming sessions not supported, using batch recognition:', response.status);
+            return 'unsupported';
+        }
+        if (!response.ok) {
+            console.warn('Streaming session unavailable:', response.status);
+            return 'failed';
+        }
+        
+        const data = await response.json();
+        streamingSessionId = data.session_id;
+        console.log('Streaming session started:', streamingSessionId);
+        
+        readStreamingEvents(streamingSessionId, fromLang, toLang);
+        return 'started';
+    } catch (error) {
+        console.error('Error starting streaming session:', error);
+        return 'failed';
+    }
+}
+
+// Read newline-delimited JSON events from a streaming session
+async function readStreamingEvents(sessionId, fromLang, toLang) {
+    try {
+        const response = await fetch(`${SERVER_URL}/sessions/${sessionId}/events`);
+        if (!response.ok) {
+            throw new Error(`Event stream unavailable: ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            // The session is working (keep-alives count), so later failures start a fresh backoff
+            streamingRetries = 0;
+            
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const message = JSON.parse(line);
+                
+                if (message.event === 'transcription_update') {
+                    showTranslatedText(message.data.transcription, message.data.translation, toLang);
+                } else if (message.event === 'error') {
+                    console.error('Streaming session error:', message.data.message);
+                }
+            }
+        }
+    } catch (error) {
+        console.error('Error reading streaming events:', error);
+    }
+    
+    // The stream also ends when the backend restarts or reaps the session; unless
+    // capture was stopped, open a new session (or fall back to batches)
+    if (streamingSessionId === sessionId) {
+        streamingSessionId = null;
+        if (isCapturing) {
+            console.warn('Streaming session ended unexpectedly');
+            retryStreaming(fromLang, toLang);
+        }
+    }
+}
+
+// Send buffered audio to the streaming session as raw PCM
+async function sendStreamingAudio() {
+    if (!audioChunks.length || processingAudio || !streamingSessionId) return;
+    
+    processingAudio = true;
+    
+    try {
+        const combinedChunks = combineAudioChunks(audioChunks.splice(0, audioChunks.length));
+        
+        await fetch(`${SERVER_URL}/sessions/${streamingSessionId}/audio`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/octet-stream'
+            },
+            body: combinedChunks.buffer
+        });
+    } catch (error) {
+        console.error('Error sending streaming audio:', error);
+    } finally {
+        processingAudio = false;
+    }
+}
+
+// Stop the streaming session, if any
+function stopStreamingSession() {
+    if (!streamingSessionId) return;
+    
+    const sessionId = streamingSessionId;
+    streamingSessionId = null;
+    fetch(`${SERVER_URL}/sessions/${sessionId}`, { method: 'DELETE' }).catch(error => {
+        console.error('Error stopping streaming session:', error);
+    });
+}
+
 // Process a batch of audio data in the background
 async function processAudioBatch(fromLang, toLang) {
     if (!audioChunks.length || processingAudio) return;
@@ -547,26 +743,25 @@ async function processAudioBatch(fromLang, toLang) {
         // Combine audio chunks
         const combinedChunks = combineAudioChunks(audioChunks.splice(0, audioChunks.length));
         
-        // Convert to base64
-        const base64Audio = arrayBufferToBase64(combinedChunks.buffer);
-        
-        // Send to server for recognition
-        const response = await fetch(`${SERVER_URL}/recognize`, {
+        // Recognize and translate the raw PCM in a single request
+        const query = `from_lang=${encodeURIComponent(fromLang)}&to_lang=${encodeURIComponent(toLang)}`;
+        const response = await fetch(`${SERVER_URL}/recognize_translate?${query}`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/octet-stream',
+                'X-Sample-Rate': String(audioContext ? audioContext.sampleRate : 16000),
+                'X-Channels': '1'
             },
-            body: JSON.stringify({
-                audio_data: base64Audio,
-                from_lang: fromLang
-            })
+            body: combinedChunks.buffer
         });
         
         const data = await response.json();
         
-        if (data.text && data.text.trim()) {
-            // Handle recognized text in background
-            handleRecognizedText(data.text, fromLang, toLang);
+        if (data.translated_text) {
+            if (data.timings) {
+                console.log('Caption timings (ms):', data.timings);
+            }
+            showTranslatedText(data.text, data.translated_text, toLang);
         }
     } catch (error) {
         console.error('Error processing audio batch in background:', error);
@@ -596,83 +791,49 @@ function combineAudioChunks(chunks) {
     return result;
 }
 
-// Convert ArrayBuffer to base64
-function arrayBufferToBase64(buffer) {
-    const bytes = new Uint8Array(buffer);
-    let binary = '';
-    for (let i = 0; i < bytes.byteLength; i++) {
-        binary += String.fromCharCode(bytes[i]);
-    }
-    return btoa(binary);
-}
-
-// Handle recognized text in background
-async function handleRecognizedText(text, fromLang, toLang) {
-    console.log("Background processing recognized text:", text);
+// Deliver a translated utterance to the popup, the caption overlay and TTS
+function showTranslatedText(text, translatedText, toLang) {
+    console.log("Background translation:", translatedText);
     
-    try {
-        // Translate the text
-        const response = await fetch(`${SERVER_URL}/translate`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                text: text,
-                from_lang: fromLang,
-                to_lang: toLang
-            })
-        });
-        
-        const data = await response.json();
-        
-        if (data.translated_text) {
-            const translatedText = data.translated_text;
-            console.log("Background translation:", translatedText);
-            
-            // Generate a unique session ID
-            const sessionId = 'bg_session_' + Date.now();
-            
-            // Send notification to any connected ports
-            Object.values(ports).forEach(port => {
-                try {
-                    port.postMessage({
-                        type: "transcription",
-                        originalText: text,
-                        translatedText: translatedText,
-                        sessionId: sessionId
-                    });
-                } catch (e) {
-                    console.error("Error sending to port:", e);
-                }
+    // Generate a unique session ID
+    const sessionId = 'bg_session_' + Date.now();
+    
+    // Send notification to any connected ports
+    Object.values(ports).forEach(port => {
+        try {
+            port.postMessage({
+                type: "transcription",
+                originalText: text,
+                translatedText: translatedText,
+                sessionId: sessionId
             });
-            
-            // If caption mode is active, display captions
-            if (captionMode && activeTabId) {
-                // Hide previous caption if applicable
-                if (lastSessionId) {
-                    chrome.tabs.sendMessage(activeTabId, {
-                        type: 'HIDE_CAPTION',
-                        sessionId: lastSessionId
-                    }).catch(error => {
-                        console.error("Error hiding previous caption:", error);
-                    });
-                }
-                
-                // Store current session ID
-                lastSessionId = sessionId;
-                
-                // Show new caption
-                showCaption(translatedText, toLang, sessionId);
-            }
-            
-            // If TTS is enabled, play the translation
-            if (isTtsEnabled) {
-                playTTSDirect(translatedText, toLang, sessionId);
-            }
+        } catch (e) {
+            console.error("Error sending to port:", e);
         }
-    } catch (error) {
-        console.error('Background translation error:', error);
+    });
+    
+    // If caption mode is active, display captions
+    if (captionMode && activeTabId) {
+        // Hide previous caption if applicable
+        if (lastSessionId) {
+            chrome.tabs.sendMessage(activeTabId, {
+                type: 'HIDE_CAPTION',
+                sessionId: lastSessionId
+            }).catch(error => {
+                console.error("Error hiding previous caption:", error);
+            });
+        }
+        
+        // Store current session ID
+        lastSessionId = sessionId;
+        
+        // Show new caption
+        showCaption(translatedText, toLang, sessionId);
+    }
+    
+    // If TTS is enabled, play the translation
+    if (isTtsEnabled) {
+        playTTSDirect(translatedText, toLang, sessionId);
     }
 }
 
@@ -1088,15 +1249,13 @@ function stopCapture() {
     console.log('Stopping all capture');
     isCapturing = false;
     
-    // Stop processing interval
-    if (processingInterval) {
-        clearInterval(processingInterval);
-        processingInterval = null;
-    }
-    
-    // Clear audio chunks
-    audioChunks = [];
+    // Stop processing interval, any pending reconnect, and clear audio chunks
+    pauseRecognition();
     processingAudio = false;
+    streamingRetries = 0;
+    
+    // Release the server-side recognizer
+    stopStreamingSession();
     
     // Stop all tracks in the media stream
     if (mediaStream) {
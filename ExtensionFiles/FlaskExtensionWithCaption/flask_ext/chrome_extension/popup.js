@@ -468,26 +468,52 @@ async function processAudioBatch(fromLang, toLang) {
     // Combine audio chunks
     const combinedChunks = combineAudioChunks(audioChunks.splice(0, audioChunks.length));
     
-    // Convert to base64
-    const base64Audio = arrayBufferToBase64(combinedChunks.buffer);
-    
-    // Send to server for recognition
-    const response = await fetch(`${SERVER_URL}/recognize`, {
+    // Recognize and translate the raw PCM in a single request; the streamed
+    // response carries the recognized text before its translation
+    const query = `from_lang=${encodeURIComponent(fromLang)}&to_lang=${encodeURIComponent(toLang)}&stream=1`;
+    const response = await fetch(`${SERVER_URL}/recognize_translate?${query}`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/octet-stream',
+        'X-Sample-Rate': String(audioContext ? audioContext.sampleRate : 16000),
+        'X-Channels': '1'
       },
-      body: JSON.stringify({
-        audio_data: base64Audio,
-        from_lang: fromLang
-      })
+      body: combinedChunks.buffer
     });
+    if (!response.ok) {
+      throw new Error(`Server returned ${response.status}`);
+    }
     
-    const data = await response.json();
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
     
-    if (data.text && data.text.trim()) {
-      // Handle recognized text
-      handleRecognizedText(data.text, fromLang, toLang);
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const message = JSON.parse(line);
+        
+        if (message.event === 'recognized') {
+          if (message.text && message.text.trim()) {
+            addTranscription(message.text);
+          }
+        } else if (message.event === 'translated') {
+          if (message.translated_text) {
+            console.log('Caption timings (ms):', message.timings);
+            handleTranslatedText(message.translated_text, toLang);
+          }
+        } else if (message.event === 'error') {
+          console.error('Translation error:', message.error);
+          showError(`Translation error: ${message.error || "Unknown error"}`);
+        }
+      }
     }
   } catch (error) {
     console.error('Error processing audio batch:', error);
@@ -518,68 +544,27 @@ function combineAudioChunks(chunks) {
   return result;
 }
 
-// Convert ArrayBuffer to base64
-function arrayBufferToBase64(buffer) {
-  const bytes = new Uint8Array(buffer);
-  let binary = '';
-  for (let i = 0; i < bytes.byteLength; i++) {
-    binary += String.fromCharCode(bytes[i]);
-  }
-  return btoa(binary);
-}
-
-// Handle recognized text
-function handleRecognizedText(text, fromLang, toLang) {
-  // Add to transcription panel
-  addTranscription(text);
+// Handle translated text
+function handleTranslatedText(translatedText, toLang) {
+  // Add to translation panel
+  addTranslation(translatedText);
   
-  try {
-    // Translate the text
-    fetch(`${SERVER_URL}/translate`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify({
-        text: text,
-        from_lang: fromLang,
-        to_lang: toLang
-      })
-    })
-    .then(response => response.json())
-    .then(data => {
-      if (data.translated_text) {
-        const translatedText = data.translated_text;
-        
-        // Add to translation panel
-        addTranslation(translatedText);
-        
-        // Create a unique session ID for this translation/caption/audio
-        const sessionId = 'session_' + Date.now();
-        
-        // Always show caption since caption mode is always enabled
-        updateCaptionDisplay(translatedText, toLang, sessionId);
-        
-        // If we're currently playing TTS, hide the previous caption
-        if (currentTtsSessionId) {
-          hidePreviousCaption(currentTtsSessionId);
-        }
-        
-        // Store the session ID
-        currentTtsSessionId = sessionId;
-        
-        // Always play TTS since it's always enabled
-        playTTSDirect(translatedText, toLang, sessionId);
-      }
-    })
-    .catch(error => {
-      console.error('Translation error:', error);
-      showError(`Translation error: ${error.message || "Unknown error"}`);
-    });
-  } catch (error) {
-    console.error('Translation error:', error);
-    showError(`Translation error: ${error.message || "Unknown error"}`);
+  // Create a unique session ID for this translation/caption/audio
+  const sessionId = 'session_' + Date.now();
+  
+  // Always show caption since caption mode is always enabled
+  updateCaptionDisplay(translatedText, toLang, sessionId);
+  
+  // If we're currently playing TTS, hide the previous caption
+  if (currentTtsSessionId) {
+    hidePreviousCaption(currentTtsSessionId);
   }
+  
+  // Store the session ID
+  currentTtsSessionId = sessionId;
+  
+  // Always play TTS since it's always enabled
+  playTTSDirect(translatedText, toLang, sessionId);
 }
 
 // Hide the previous caption
@@ -1,63 +1,257 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import azure.cognitiveservices.speech as speechsdk
-import requests
-import uuid
 import json
 import os
 import io
+import sys
 import base64
 import time
+from pathlib import Path
+
+# Shared modules live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+from translator_client import get_translator
+from fake_speech import load_speech_sdk
+from streaming_sessions import StreamingSessionManager, STREAM_KEEPALIVE_SECONDS
+from metrics import REGISTRY, CONTENT_TYPE, counter, gauge
+
+# Azure Speech SDK, or the scripted stand-in when SPEECH_BACKEND=fake
+speechsdk = load_speech_sdk()
 
 # Azure subscription key
 SUBSCRIPTION_KEY = os.getenv('AZURE_API_KEY') 
 REGION = "eastus2"
-TRANSLATOR_ENDPOINT = "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate"
+# Set TRANSLATOR_ENDPOINT to point at another resource or at fake_translator_server.py
+TRANSLATOR_ENDPOINT = os.getenv("TRANSLATOR_ENDPOINT", "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate")
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS to allow the extension to communicate
 
-@app.route('/recognize', methods=['POST'])
-def recognize_speech():
-    """Receive audio, perform speech recognition"""
-    if not request.json or 'audio_data' not in request.json:
+def translate_final(text, from_lang, to_lang):
+    """Translate a streamed final result through the shared pooled client"""
+    translator = get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT)
+    return translator.translate(text, from_lang, to_lang)
+
+def submit_final(text, from_lang, to_lang):
+    """Start translating a streamed final result on the httpx transport; returns a Future"""
+    translator = get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT)
+    return translator.submit_translate(text, from_lang, to_lang)
+
+# One continuous recognizer per extension session; idle sessions are reaped. On the httpx
+# transport finals are translated without holding a worker thread per request.
+streaming_sessions = StreamingSessionManager(
+    SUBSCRIPTION_KEY, REGION, translate_final,
+    translate_async=submit_final
+    if get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT).async_transport else None
+)
+
+# Prometheus metrics served on /metrics; utterance latency is recorded by each session's timeline
+gauge("babelingo_active_sessions", "Streaming sessions with a running recognizer",
+      collect=lambda: len(streaming_sessions.sessions))
+gauge("babelingo_translation_backlog", "Utterances waiting for translation or in-order delivery, all sessions",
+      collect=lambda: sum(s.translation_queue.pending() for _, s in streaming_sessions.sessions.items()))
+gauge("babelingo_event_queue_depth", "Events waiting for clients to read their event streams",
+      collect=lambda: sum(s.events.qsize() for _, s in streaming_sessions.sessions.items()))
+counter("babelingo_sessions_reaped_total", "Streaming sessions stopped for idling or cancellation",
+        collect=lambda: streaming_sessions.reaped)
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """Start a streaming recognition session"""
+    params = request.get_json(silent=True) or {}
+    from_lang = params.get('from_lang', 'en-US')
+    to_lang = params.get('to_lang', 'es')
+    
+    try:
+        session = streaming_sessions.create(from_lang, to_lang)
+    except Exception as e:
+        print(f"Error creating streaming session: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    if session is None:
+        return jsonify({'error': 'Server is at capacity, please try again later'}), 503
+    
+    print(f"Streaming session {session.session_id} started ({from_lang} -> {to_lang})")
+    return jsonify({
+        'session_id': session.session_id,
+        'idle_timeout_s': streaming_sessions.idle_timeout
+    }), 201
+
+@app.route('/sessions/<session_id>/audio', methods=['POST'])
+def push_session_audio(session_id):
+    """Append 16 kHz 16-bit mono PCM to a session (raw body or base64 JSON)"""
+    session = streaming_sessions.get(session_id)
+    if session is None or not session.is_running:
+        return jsonify({'error': 'Unknown or stopped session'}), 404
+    
+    if request.mimetype == 'application/json':
+        params = request.get_json(silent=True) or {}
+        audio_data = base64.b64decode(params.get('audio_data', ''))
+    else:
+        audio_data = request.get_data()
+    if not audio_data:
         return jsonify({'error': 'No audio data provided'}), 400
     
+    session.push_audio(audio_data)
+    return jsonify({'received_bytes': len(audio_data)})
+
+@app.route('/sessions/<session_id>/events', methods=['GET'])
+def session_events(session_id):
+    """Stream a session's interim and final results as newline-delimited JSON"""
+    session = streaming_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown session'}), 404
+    
+    def generate():
+        while True:
+            event = session.next_event(STREAM_KEEPALIVE_SECONDS)
+            if event is None:
+                if session.closed:
+                    return
+                # Keeps intermediaries from closing a quiet stream
+                yield json.dumps({'event': 'keepalive'}) + '\n'
+                continue
+            yield json.dumps(event) + '\n'
+            if event['event'] == 'transcription_status' and event['data']['status'] != 'started':
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """Stop a streaming session"""
+    if not streaming_sessions.close(session_id):
+        return jsonify({'error': 'Unknown session'}), 404
+    print(f"Streaming session {session_id} stopped")
+    return jsonify({'status': 'stopped'})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Streaming session and translator statistics"""
+    translator = get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT)
+    return jsonify({
+        'streaming_sessions': streaming_sessions.stats(),
+        'translator': translator.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage utterance latency, queue depths, Translator errors"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+# Bytes read from a binary upload per push stream write
+RECOGNIZE_READ_CHUNK = 32 * 1024
+
+# Raw PCM formats a recognizer push stream takes: 16-bit mono at the common capture rates
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 22050, 24000, 32000, 44100, 48000)
+SUPPORTED_CHANNELS = (1,)
+
+def audio_format_param(name, default, supported):
+    """Read an integer audio format parameter from the X-<Name> header or the query string
+
+    Returns (value, error); error is a message when the value is malformed or
+    not one the push stream can take.
+    """
+    value = request.headers.get(f"X-{name.replace('_', '-').title()}") or request.args.get(name)
+    if not value:
+        return default, None
     try:
-        # Get parameters
-        from_lang = request.json.get('from_lang', 'en-US')
-        
+        number = int(value)
+    except ValueError:
+        return None, f"{name} must be an integer, got {value!r}"
+    if number not in supported:
+        return None, f"Unsupported {name} {number}; supported: {', '.join(str(n) for n in supported)}"
+    return number, None
+
+def audio_format_error():
+    """Error message for a raw PCM upload with a bad sample rate or channel count, else None"""
+    if request.mimetype != 'application/octet-stream':
+        return None
+    for name, default, supported in (('sample_rate', 16000, SUPPORTED_SAMPLE_RATES),
+                                     ('channels', 1, SUPPORTED_CHANNELS)):
+        _, error = audio_format_param(name, default, supported)
+        if error:
+            return error
+    return None
+
+def create_recognizer(from_lang, sample_rate=16000, channels=1):
+    """Build a one-shot recognizer fed by a push stream of 16-bit PCM"""
+    push_stream = speechsdk.audio.PushAudioInputStream(
+        speechsdk.audio.AudioStreamFormat(samples_per_second=sample_rate, bits_per_sample=16, channels=channels)
+    )
+    
+    # Configure speech recognition
+    speech_config = speechsdk.SpeechConfig(subscription=SUBSCRIPTION_KEY, region=REGION)
+    speech_config.speech_recognition_language = from_lang
+    
+    # Enhanced recognition settings
+    speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
+    speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000") 
+    speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs, "500")
+    
+    # Enable more detailed recognition
+    speech_config.enable_audio_logging()
+    speech_config.enable_dictation()
+    
+    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+    speech_recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+    return speech_recognizer, push_stream
+
+def recognize_request_audio():
+    """Recognize the audio in the current request
+
+    Accepts either raw PCM (application/octet-stream, format in X-Sample-Rate /
+    X-Channels headers or sample_rate / channels query parameters) or the legacy
+    JSON body with base64 audio_data. Returns (from_lang, result).
+    """
+    if request.mimetype == 'application/octet-stream':
+        from_lang = request.headers.get('X-From-Lang') or request.args.get('from_lang', 'en-US')
+        speech_recognizer, push_stream = create_recognizer(
+            from_lang,
+            sample_rate=audio_format_param('sample_rate', 16000, SUPPORTED_SAMPLE_RATES)[0],
+            channels=audio_format_param('channels', 1, SUPPORTED_CHANNELS)[0]
+        )
         print(f"Starting speech recognition for language: {from_lang}")
         
-        # Get and decode the audio data
-        audio_data = base64.b64decode(request.json['audio_data'])
-        
-        # Create a push stream
-        push_stream = speechsdk.audio.PushAudioInputStream()
-        push_stream.write(audio_data)
+        # Recognition runs while the body is still arriving; chunks go straight to the SDK
+        result_future = speech_recognizer.recognize_once_async()
+        while True:
+            chunk = request.stream.read(RECOGNIZE_READ_CHUNK)
+            if not chunk:
+                break
+            push_stream.write(chunk)
         push_stream.close()
-        
-        # Configure speech recognition
-        speech_config = speechsdk.SpeechConfig(subscription=SUBSCRIPTION_KEY, region=REGION)
-        speech_config.speech_recognition_language = from_lang
-        
-        # Enhanced recognition settings
-        speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
-        speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000") 
-        speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs, "500")
-        
-        # Enable more detailed recognition
-        speech_config.enable_audio_logging()
-        speech_config.enable_dictation()
-        
-        audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
-        
-        # Create speech recognizer
-        speech_recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
-        
-        # Start recognition
-        result = speech_recognizer.recognize_once()
+        return from_lang, result_future.get()
+    
+    from_lang = request.json.get('from_lang', 'en-US')
+    print(f"Starting speech recognition for language: {from_lang}")
+    
+    # Get and decode the audio data
+    audio_data = base64.b64decode(request.json['audio_data'])
+    
+    speech_recognizer, push_stream = create_recognizer(from_lang)
+    push_stream.write(audio_data)
+    push_stream.close()
+    return from_lang, speech_recognizer.recognize_once()
+
+def has_request_audio():
+    """Whether the request carries audio in either supported encoding"""
+    if request.mimetype == 'application/octet-stream':
+        return bool(request.content_length) or request.headers.get('Transfer-Encoding') == 'chunked'
+    return bool(request.is_json and request.json and 'audio_data' in request.json)
+
+@app.route('/recognize', methods=['POST'])
+def recognize_speech():
+    """Receive audio, perform speech recognition"""
+    if not has_request_audio():
+        return jsonify({'error': 'No audio data provided'}), 400
+    format_error = audio_format_error()
+    if format_error:
+        return jsonify({'error': format_error}), 400
+    
+    try:
+        from_lang, result = recognize_request_audio()
         
         # Process result
         if result.reason == speechsdk.ResultReason.RecognizedSpeech:
@@ -75,6 +269,84 @@ def recognize_speech():
         print(f"Recognition exception: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/recognize_translate', methods=['POST'])
+def recognize_and_translate():
+    """Recognize audio and translate the text in one request
+
+    Takes the same audio encodings as /recognize plus to_lang (X-To-Lang header,
+    query string or JSON field). With ?stream=1 the response is two NDJSON
+    events, 'recognized' then 'translated', so the source text can be shown
+    before the translation arrives.
+    """
+    if not has_request_audio():
+        return jsonify({'error': 'No audio data provided'}), 400
+    format_error = audio_format_error()
+    if format_error:
+        return jsonify({'error': format_error}), 400
+    
+    try:
+        if request.mimetype == 'application/octet-stream':
+            to_lang = request.headers.get('X-To-Lang') or request.args.get('to_lang', 'es')
+        else:
+            to_lang = request.json.get('to_lang', 'es')
+        stream = request.args.get('stream') == '1'
+        
+        start = time.perf_counter()
+        from_lang, result = recognize_request_audio()
+        recognize_ms = (time.perf_counter() - start) * 1000
+        
+        if result.reason == speechsdk.ResultReason.NoMatch:
+            result_text = ''
+        elif result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            result_text = result.text
+        else:
+            print(f"Recognition failed: {result.reason}")
+            return jsonify({'error': f'Recognition failed: {result.reason}'}), 500
+        print(f"Recognition result: '{result_text}' ({recognize_ms:.0f} ms)")
+    except Exception as e:
+        print(f"Recognition exception: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    def translate_result():
+        """Translate the recognized text; returns (translation, timings)"""
+        translate_start = time.perf_counter()
+        if result_text.strip():
+            translator = get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT)
+            translated_text, translator_ms = translator.translate_timed(result_text, from_lang.split('-')[0], to_lang)
+        else:
+            translated_text, translator_ms = '', 0.0
+        translate_ms = (time.perf_counter() - translate_start) * 1000
+        return translated_text, {
+            'recognize_ms': recognize_ms,
+            'translate_ms': translate_ms,
+            'translator_ms': translator_ms,
+            'total_ms': (time.perf_counter() - start) * 1000
+        }
+    
+    if stream:
+        def generate():
+            yield json.dumps({'event': 'recognized', 'text': result_text,
+                              'timings': {'recognize_ms': recognize_ms}}) + '\n'
+            try:
+                translated_text, timings = translate_result()
+                yield json.dumps({'event': 'translated', 'text': result_text,
+                                  'translated_text': translated_text, 'timings': timings}) + '\n'
+            except Exception as e:
+                print(f"Translation exception: {str(e)}")
+                yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    try:
+        translated_text, timings = translate_result()
+    except Exception as e:
+        print(f"Translation exception: {str(e)}")
+        return jsonify({'text': result_text, 'error': str(e)}), 500
+    
+    print(f"Translation result: '{translated_text[:50]}...' ({timings['total_ms']:.0f} ms total)")
+    return jsonify({'text': result_text, 'translated_text': translated_text, 'timings': timings})
+
 @app.route('/translate', methods=['POST'])
 def translate_text():
     """Translate text using Azure Translator"""
@@ -92,40 +364,12 @@ def translate_text():
         # Extract base language code (e.g., 'en-US' -> 'en')
         from_lang_base = from_lang.split('-')[0]
         
-        # Make translation request
-        headers = {
-            'Ocp-Apim-Subscription-Key': SUBSCRIPTION_KEY,
-            'Content-type': 'application/json',
-            'Ocp-Apim-Subscription-Region': REGION
-        }
-        
-        params = {
-            'api-version': '3.0',
-            'from': from_lang_base,
-            'to': to_lang
-        }
-        
-        body = [{
-            'text': text
-        }]
-        
-        response = requests.post(
-            TRANSLATOR_ENDPOINT,
-            headers=headers,
-            params=params,
-            json=body
-        )
+        # Translate through the shared pooled client
+        translator = get_translator(SUBSCRIPTION_KEY, region=REGION, endpoint=TRANSLATOR_ENDPOINT)
+        translated_text, latency_ms = translator.translate_timed(text, from_lang_base, to_lang)
         
-        response.raise_for_status()
-        result = response.json()
-        
-        if len(result) > 0 and 'translations' in result[0]:
-            translated_text = result[0]['translations'][0]['text']
-            print(f"Translation result: '{translated_text[:50]}...'")
-            return jsonify({'translated_text': translated_text})
-        else:
-            print("Translation failed: No translations in response")
-            return jsonify({'error': 'Translation failed'}), 500
+        print(f"Translation result: '{translated_text[:50]}...' ({latency_ms:.0f} ms)")
+        return jsonify({'translated_text': translated_text, 'latency_ms': latency_ms})
     
     except Exception as e:
         print(f"Translation exception: {str(e)}")
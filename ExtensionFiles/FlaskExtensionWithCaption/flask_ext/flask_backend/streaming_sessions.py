@@ -0,0 +1,222 @@
+import os
+import queue
+import threading
+import time
+import uuid
+
+from session_registry import SessionRegistry, SessionUsage
+from translation_pool import OrderedTranslationQueue
+from interim_throttle import InterimThrottle
+from audio_ingest import AudioIngestBuffer
+from fake_speech import load_speech_sdk
+from speech_engines import TWO_HOP
+from metrics import UtteranceTimeline, counter
+
+speechsdk = load_speech_sdk()
+
+# Sessions that receive no audio for this long are stopped and removed
+STREAM_SESSION_IDLE_TIMEOUT = float(os.getenv("STREAM_SESSION_IDLE_TIMEOUT", "60"))
+# How often the reaper looks for idle sessions
+STREAM_SESSION_REAP_INTERVAL = 5
+# Events held for a client that is not reading its event stream
+STREAM_EVENT_QUEUE_DEPTH = 256
+# An event stream with nothing to send writes a keepalive line this often
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Counted when the drop happens, so the total survives the sessions it came from
+EVENTS_DROPPED_TOTAL = counter("babelingo_events_dropped_total", "Events dropped for clients that stopped reading")
+
+
+class StreamingSession:
+    def __init__(self, session_id, subscription_key, region, from_lang, to_lang, translate, translate_async=None):
+        """One continuous recognizer fed incrementally by an extension client
+
+        translate(text, from_lang, to_lang) translates a final result; if given,
+        translate_async takes the same arguments and returns a Future instead of
+        blocking a translation worker. Results are
+        queued as events ({'event': name, 'data': {...}}) using the same event
+        names as the Socket.IO web app, and read back with next_event().
+        """
+        self.session_id = session_id
+        self.from_lang = from_lang
+        self.to_lang = to_lang
+        self.is_running = True
+        self.closed = False
+        self.usage = SessionUsage()
+        self.events = queue.Queue(maxsize=STREAM_EVENT_QUEUE_DEPTH)
+        self.events_dropped = 0
+        self.timeline = UtteranceTimeline(TWO_HOP)
+
+        # Finals are translated on the worker pool and delivered in utterance order
+        self.translation_queue = OrderedTranslationQueue(
+            translate=lambda text: translate(text, from_lang.split('-')[0], to_lang),
+            translate_async=(lambda text: translate_async(text, from_lang.split('-')[0], to_lang))
+            if translate_async else None,
+            deliver=self.emit_translation,
+            announce=self.emit_transcription,
+            stamp=self.timeline.stamp
+        )
+        self.interim_throttle = InterimThrottle(send=lambda payload: self.emit('interim_update', payload))
+
+        speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
+        speech_config.speech_recognition_language = from_lang
+        speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
+        speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000")
+        speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs, "500")
+        speech_config.enable_dictation()
+
+        self.push_stream = speechsdk.audio.PushAudioInputStream(
+            speechsdk.audio.AudioStreamFormat(samples_per_second=16000, bits_per_sample=16, channels=1)
+        )
+        self.ingest = AudioIngestBuffer(self.push_stream.write)
+        self.speech_recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=self.push_stream)
+        )
+        self.speech_recognizer.recognizing.connect(self.recognizing_callback)
+        self.speech_recognizer.recognized.connect(self.recognized_callback)
+        self.speech_recognizer.canceled.connect(self.canceled_callback)
+
+    def start(self):
+        """Start continuous recognition"""
+        self.speech_recognizer.start_continuous_recognition()
+        self.emit('transcription_status', {'status': 'started'})
+
+    def stop(self, reason='stopped'):
+        """Stop recognition and end the event stream"""
+        if self.closed:
+            return
+        self.closed = True
+        self.ingest.flush()
+        self.speech_recognizer.stop_continuous_recognition()
+        self.push_stream.close()
+        if self.is_running:
+            self.is_running = False
+            self.emit('transcription_status', {'status': reason})
+
+    def push_audio(self, audio_data):
+        """Append 16 kHz 16-bit mono PCM to the recognizer's stream"""
+        self.usage.record_audio(len(audio_data))
+        self.timeline.audio_received()
+        self.ingest.push(audio_data)
+
+    def recognizing_callback(self, evt):
+        """Interim hypothesis"""
+        if evt.result.reason == speechsdk.ResultReason.RecognizingSpeech and evt.result.text.strip():
+            self.usage.add('interim_results')
+            self.timeline.recognizing()
+            self.interim_throttle.update(evt.result.text)
+
+    def recognized_callback(self, evt):
+        """Final result; translated off the SDK thread"""
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            self.interim_throttle.reset()
+            if not evt.result.text.strip():
+                return
+            self.usage.add('final_results')
+            self.translation_queue.submit(evt.result.text)
+
+    def canceled_callback(self, evt):
+        """Recognition canceled by the service"""
+        if evt.reason == speechsdk.CancellationReason.Error:
+            self.emit('error', {'message': f"Error: {evt.reason} ({evt.error_details})"})
+        # Never stop the recognizer from its own callback; the reaper removes the session
+        self.is_running = False
+        self.emit('transcription_status', {'status': 'canceled'})
+
+    def emit_transcription(self, utterance_id, text):
+        self.timeline.recognized(utterance_id)
+        self.emit('transcription_pending', {'id': utterance_id, 'transcription': text})
+
+    def emit_translation(self, utterance_id, text, translation):
+        self.usage.add('translations')
+        self.timeline.emitted(utterance_id)
+        self.emit('transcription_update', {'id': utterance_id, 'transcription': text, 'translation': translation})
+
+    def emit(self, event, data):
+        """Queue an event for the client; dropped if the client stopped reading"""
+        try:
+            self.events.put_nowait({'event': event, 'data': data})
+        except queue.Full:
+            self.events_dropped += 1
+            EVENTS_DROPPED_TOTAL.inc()
+
+    def next_event(self, timeout):
+        """Return the next queued event, or None if none arrived within timeout"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def idle_seconds(self):
+        return time.time() - self.usage.last_activity
+
+    def stats(self):
+        stats = self.usage.snapshot()
+        stats['translation_backlog'] = self.translation_queue.pending()
+        stats['events_queued'] = self.events.qsize()
+        stats['events_dropped'] = self.events_dropped
+        stats['ingest'] = self.ingest.stats()
+        stats['timeline'] = self.timeline.stats()
+        return stats
+
+
+class StreamingSessionManager:
+    def __init__(self, subscription_key, region, translate, translate_async=None,
+                 idle_timeout=STREAM_SESSION_IDLE_TIMEOUT):
+        """Creates streaming sessions and reaps the ones that go idle"""
+        self.subscription_key = subscription_key
+        self.region = region
+        self.translate = translate
+        self.translate_async = translate_async
+        self.idle_timeout = idle_timeout
+        self.sessions = SessionRegistry()
+        self.reaped = 0
+
+        self.reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self.reaper.start()
+
+    def create(self, from_lang, to_lang):
+        """Start a new session; returns None when the server is at capacity"""
+        if len(self.sessions) >= self.sessions.max_sessions:
+            return None
+        session_id = uuid.uuid4().hex
+        session = StreamingSession(session_id, self.subscription_key, self.region,
+                                   from_lang, to_lang, self.translate, self.translate_async)
+        if not self.sessions.add(session_id, session):
+            return None
+        session.start()
+        return session
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def close(self, session_id, reason='stopped'):
+        """Stop and remove a session; returns False if it did not exist"""
+        session = self.sessions.pop(session_id)
+        if session is None:
+            return False
+        session.stop(reason)
+        return True
+
+    def _reap_loop(self):
+        """Remove sessions that went idle or were canceled by the service"""
+        while True:
+            time.sleep(STREAM_SESSION_REAP_INTERVAL)
+            for session_id, session in self.sessions.items():
+                if session.idle_seconds() > self.idle_timeout or not session.is_running:
+                    print(f"Reaping streaming session {session_id}")
+                    self.reaped += 1
+                    try:
+                        self.close(session_id, reason='idle')
+                    except Exception as e:
+                        print(f"Error reaping session {session_id}: {e}")
+
+    def stats(self):
+        return {
+            'active_sessions': len(self.sessions),
+            'max_sessions': self.sessions.max_sessions,
+            'idle_timeout_s': self.idle_timeout,
+            'reaped': self.reaped,
+            'sessions': {session_id: session.stats() for session_id, session in self.sessions.items()}
+        }
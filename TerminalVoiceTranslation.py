@@ -1,89 +1,103 @@
-import azure.cognitiveservices.speech as speechsdk
-import requests
-import uuid
 import json
 import os
 import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from rich.console import Console
 from rich.columns import Columns
 from rich.panel import Panel
 from rich import box
 from dotenv import load_dotenv
+from translator_client import get_translator
+from translation_pool import OrderedTranslationQueue, get_worker_pool
+from fake_speech import load_speech_sdk
+from speech_engines import CaptionLatency, create_translation_recognizer, engine_or_default, RECOGNITION_ENGINE, SPEECH_TRANSLATION
+from metrics import CAPTION_LATENCY_SECONDS, METRICS_PORT, UtteranceTimeline, gauge, serve_metrics
 
 load_dotenv()
 
+# Azure Speech SDK, or the scripted stand-in when SPEECH_BACKEND=fake
+speechsdk = load_speech_sdk()
+
 subscription_key = os.getenv("AZURE_API_KEY")
 region = os.getenv("AZURE_REGION")  
 
 # Rich console for better terminal display
 console = Console()
 
+# Recent utterances kept on screen, so a translation that arrives after the next
+# final result is still shown next to its own transcription
+CAPTION_HISTORY = int(os.getenv("CAPTION_HISTORY", "3"))
+
 def translate_text_async(text, from_lang='en', to_lang='es'):
-    """Asynchronously translate text using Azure Translator service"""
-    endpoint = "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate"
-    
-    headers = {
-        'Ocp-Apim-Subscription-Key': subscription_key,
-        'Content-type': 'application/json',
-        'X-ClientTraceId': str(uuid.uuid4())
-    }
-    
-    params = {
-        'api-version': '3.0',
-        'from': from_lang,
-        'to': to_lang
-    }
-    
-    body = [{
-        'text': text
-    }]
-    
+    """Translate text using the shared pooled Azure Translator client"""
     try:
-        response = requests.post(endpoint, headers=headers, params=params, json=body)
-        response.raise_for_status()
-        
-        result = response.json()
-        translations = result[0]['translations']
-        translated_text = translations[0]['text']
-        
-        return translated_text
+        return get_translator(subscription_key).translate(text, from_lang, to_lang)
     
     except Exception as err:
         print(f"Translation error: {err}")
         return f"[Translation error: {str(err)}]"
 
 class RealTimeTranscriptionTranslation:
-    def __init__(self, from_lang="en-US", to_lang="es"):
+    def __init__(self, from_lang="en-US", to_lang="es", engine=RECOGNITION_ENGINE):
         """Initialize the real-time transcription and translation system"""
         self.from_lang = from_lang
         self.to_lang_code = to_lang
+        self.engine = engine_or_default(engine)
+        self.caption_latency = CaptionLatency()
+        self.timeline = UtteranceTimeline(self.engine)
+        self.next_utterance_id = 0
         self.is_running = True
-        self.current_transcription = ""
-        self.current_translation = ""
+        # utterance id -> [transcription, translation], oldest first
+        self.captions = OrderedDict()
         self.lock = threading.Lock()
+        
+        # Finals are translated on the worker pool, or without a thread per request on the
+        # httpx transport, and shown in utterance order
+        self.translation_queue = OrderedTranslationQueue(
+            translate=self.translate,
+            translate_async=self.submit_translation if get_translator(subscription_key).async_transport else None,
+            deliver=self.show_translation,
+            announce=self.show_transcription,
+            stamp=self.timeline.stamp
+        )
+        gauge("babelingo_translation_backlog", "Utterances waiting for translation or in-order delivery",
+              collect=self.translation_queue.pending)
         self.setup_speech_config()
         
     def setup_speech_config(self):
         """Set up the speech configuration"""
-        self.speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
-        self.speech_config.speech_recognition_language = self.from_lang
-        
         # Use default microphone as audio input
         self.audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
         
-        # Create speech recognizer with continuous recognition
-        self.speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=self.speech_config, 
-            audio_config=self.audio_config
-        )
+        if self.engine == SPEECH_TRANSLATION:
+            # Recognition and translation in one streaming session
+            self.speech_config, self.speech_recognizer = create_translation_recognizer(
+                subscription_key, region, self.from_lang, [self.to_lang_code], self.audio_config
+            )
+            self.speech_recognizer.recognized.connect(self.translated_callback)
+        else:
+            self.speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
+            self.speech_config.speech_recognition_language = self.from_lang
+            
+            # Create speech recognizer with continuous recognition
+            self.speech_recognizer = speechsdk.SpeechRecognizer(
+                speech_config=self.speech_config, 
+                audio_config=self.audio_config
+            )
+            self.speech_recognizer.recognized.connect(self.recognized_callback)
         
         # Set up event handlers for recognition
-        self.speech_recognizer.recognized.connect(self.recognized_callback)
+        self.speech_recognizer.recognizing.connect(self.recognizing_callback)
         self.speech_recognizer.session_stopped.connect(self.session_stopped_callback)
         self.speech_recognizer.canceled.connect(self.canceled_callback)
         
+    def recognizing_callback(self, evt):
+        """Interim result: only used for latency bookkeeping"""
+        self.caption_latency.speech_heard()
+        self.timeline.recognizing()
+    
     def recognized_callback(self, evt):
         """Callback for when speech is recognized"""
         if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
@@ -93,17 +107,53 @@ class RealTimeTranscriptionTranslation:
             if not text.strip():
                 return
                 
-            # Translate the recognized text
-            translation = translate_text_async(text, 
-                                             from_lang=self.from_lang.split('-')[0], 
-                                             to_lang=self.to_lang_code)
+            # Hand off to the worker pool so the SDK thread is never blocked
+            self.translation_queue.submit(text)
+    
+    def translated_callback(self, evt):
+        """Speech translation final result, already translated"""
+        if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
+            text = evt.result.text
+            if not text.strip():
+                return
             
-            # Update the current transcription and translation
-            with self.lock:
-                self.current_transcription = text
-                self.current_translation = translation
-                
-            # Display the results
+            utterance_id = self.next_utterance_id
+            self.next_utterance_id += 1
+            self.show_transcription(utterance_id, text)
+            self.show_translation(utterance_id, text, evt.result.translations.get(self.to_lang_code, ""))
+    
+    def translate(self, text):
+        """Translate one final result (runs on a translation worker)"""
+        return translate_text_async(text, 
+                                    from_lang=self.from_lang.split('-')[0], 
+                                    to_lang=self.to_lang_code)
+    
+    def submit_translation(self, text):
+        """Start translating one final result on the httpx transport; returns a Future"""
+        return get_translator(subscription_key).submit_translate(text, 
+                                                                 from_lang=self.from_lang.split('-')[0], 
+                                                                 to_lang=self.to_lang_code)
+    
+    def show_transcription(self, utterance_id, text):
+        """Show the recognized text immediately, before its translation arrives"""
+        self.caption_latency.utterance_final(utterance_id)
+        self.timeline.recognized(utterance_id)
+        with self.lock:
+            self.captions[utterance_id] = [text, "..."]
+            while len(self.captions) > CAPTION_HISTORY:
+                self.captions.popitem(last=False)
+            self.display_results()
+    
+    def show_translation(self, utterance_id, text, translation):
+        """Show a translation next to its transcription while that is still on screen"""
+        self.timeline.emitted(utterance_id)
+        latency_ms = self.caption_latency.caption_shown(utterance_id)
+        if latency_ms is not None:
+            CAPTION_LATENCY_SECONDS.observe(latency_ms / 1000, engine=self.engine)
+        with self.lock:
+            if utterance_id not in self.captions:
+                return
+            self.captions[utterance_id][1] = translation
             self.display_results()
     
     def session_stopped_callback(self, evt):
@@ -124,7 +174,7 @@ class RealTimeTranscriptionTranslation:
         
         # Create panels for original and translated text
         original_panel = Panel(
-            self.current_transcription, 
+            "\n\n".join(transcription for transcription, _ in self.captions.values()), 
             title="Original", 
             title_align="left",
             box=box.ROUNDED,
@@ -132,7 +182,7 @@ class RealTimeTranscriptionTranslation:
         )
         
         translated_panel = Panel(
-            self.current_translation, 
+            "\n\n".join(translation for _, translation in self.captions.values()), 
             title=f"Translated ({self.to_lang_code})", 
             title_align="left",
             box=box.ROUNDED,
@@ -142,6 +192,17 @@ class RealTimeTranscriptionTranslation:
         # Display panels side by side
         columns = Columns([original_panel, translated_panel], equal=True, expand=True)
         console.print(columns)
+        
+        # Translation backlog
+        pool_stats = get_worker_pool().stats()
+        console.print(f"[dim]Translation queue: {self.translation_queue.pending()} pending, "
+                      f"{pool_stats['running']}/{pool_stats['workers']} workers busy[/dim]")
+        
+        # End-of-speech to caption latency of the selected engine
+        latency = self.caption_latency.stats()
+        if latency['captions']:
+            console.print(f"[dim]Caption latency ({self.engine}): avg {latency['avg_ms']:.0f} ms, "
+                          f"p95 {latency['p95_ms']:.0f} ms over {latency['captions']} captions[/dim]")
     
     def start(self):
         """Start the continuous recognition"""
@@ -172,6 +233,11 @@ def main():
     
     console.print(f"\n[bold]Source language:[/bold] {from_lang}")
     console.print(f"[bold]Target language:[/bold] {to_lang}")
+    console.print(f"[bold]Engine:[/bold] {engine_or_default(RECOGNITION_ENGINE)}")
+    
+    # Prometheus metrics on http://localhost:METRICS_PORT/metrics (METRICS_PORT=0 disables)
+    if serve_metrics(METRICS_PORT):
+        console.print(f"[bold]Metrics:[/bold] http://localhost:{METRICS_PORT}/metrics")
     console.print("\n[dim]Starting in 3 seconds...[/dim]")
     time.sleep(3)
     
@@ -1,17 +1,30 @@
-from flask import Flask, render_template, request, jsonify
-import azure.cognitiveservices.speech as speechsdk
-import requests
-import uuid
+from flask import Flask, render_template, request, jsonify, Response
 import json
 import os
 import threading
 import time
 from datetime import datetime
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room, close_room
 from dotenv import load_dotenv
+from translator_client import get_translator
+from translation_pool import OrderedTranslationQueue, get_worker_pool
+from session_registry import SessionRegistry, SessionUsage
+from broadcast_rooms import BroadcastRegistry, language_room, valid_room_name, LANGUAGE_ROOM_SEPARATOR
+from interim_translation import SpeculativeTranslator, SPECULATIVE_INTERIM
+from interim_throttle import InterimThrottle
+from audio_ingest import AudioIngestBuffer
+from voice_activity import VoiceActivityGate, VAD_ENABLED
+from fake_speech import load_speech_sdk, SPEECH_BACKEND
+from recognizer_pool import RecognizerPool, WarmRecognizer, RECOGNIZER_POOL_SIZE
+from speech_engines import (CaptionLatency, SpeechServiceLatency, create_translation_recognizer, engine_or_default,
+                            ENGINES, RECOGNITION_ENGINE, SPEECH_TRANSLATION, TWO_HOP)
+from metrics import REGISTRY, CONTENT_TYPE, CAPTION_LATENCY_SECONDS, UtteranceTimeline, counter, gauge
 
 load_dotenv()
 
+# Azure Speech SDK, or the scripted stand-in when SPEECH_BACKEND=fake
+speechsdk = load_speech_sdk()
+
 
 subscription_key = os.getenv("AZURE_API_KEY")
 region = os.getenv("AZURE_REGION") 
@@ -20,91 +33,187 @@ region = os.getenv("AZURE_REGION")
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'translation-app-secret'
 socketio = SocketIO(app, cors_allowed_origins="*")
+# Let the Werkzeug development server run without a tty (load tests, CI); it refuses otherwise
+ALLOW_UNSAFE_WERKZEUG = os.getenv("ALLOW_UNSAFE_WERKZEUG", "0") == "1"
+
+# Active transcribers keyed by Socket.IO session id
+sessions = SessionRegistry()
+
+# One-speaker, many-listener broadcast rooms
+broadcasts = BroadcastRegistry()
 
-# Global variables to store transcriber instance and status
-transcriber = None
-is_transcribing = False
+# Prometheus metrics served on /metrics; latency histograms are recorded by each session's timeline
+AUDIO_BYTES_TOTAL = counter("babelingo_audio_bytes_total", "Audio bytes received from clients")
+gauge("babelingo_active_sessions", "Sessions with a running recognizer", collect=lambda: len(sessions))
+gauge("babelingo_translation_backlog", "Utterances waiting for translation or in-order delivery, all sessions",
+      collect=lambda: sum(t.translation_queue.pending() for _, t in sessions.items()))
 
 def translate_text_async(text, from_lang='en', to_lang='es'):
-    """Asynchronously translate text using Azure Translator service"""
-    endpoint = "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate"
-    
-    headers = {
-        'Ocp-Apim-Subscription-Key': subscription_key,
-        'Content-type': 'application/json',
-        'X-ClientTraceId': str(uuid.uuid4())
-    }
-    
-    params = {
-        'api-version': '3.0',
-        'from': from_lang,
-        'to': to_lang
-    }
-    
-    body = [{
-        'text': text
-    }]
-    
+    """Translate text using the shared pooled Azure Translator client"""
     try:
-        response = requests.post(endpoint, headers=headers, params=params, json=body)
-        response.raise_for_status()
-        
-        result = response.json()
-        translations = result[0]['translations']
-        translated_text = translations[0]['text']
-        
-        return translated_text
+        return get_translator(subscription_key).translate(text, from_lang, to_lang)
     
     except Exception as err:
         print(f"Translation error: {err}")
         return f"[Translation error: {str(err)}]"
 
+def translate_text_multi(text, from_lang, to_langs):
+    """Translate text into every language in to_langs with a single Translator request"""
+    if not to_langs:
+        return {}
+    try:
+        return get_translator(subscription_key).translate_multi(text, from_lang, to_langs)
+    
+    except Exception as err:
+        print(f"Translation error: {err}")
+        return {to_lang: f"[Translation error: {str(err)}]" for to_lang in to_langs}
+
+def configure_recognition(speech_config):
+    """Apply the recognition settings shared by both engines"""
+    # Enhanced recognition settings
+    speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
+    speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000") 
+    speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs, "500")
+    
+    # Enable more detailed recognition
+    speech_config.enable_audio_logging()
+    speech_config.enable_dictation()
+
+def recognizer_key(engine, from_lang, to_lang):
+    """Warm pool key: the source language, plus the target language for speech translation"""
+    return f"{from_lang}>{to_lang}" if engine == SPEECH_TRANSLATION else from_lang
+
+def build_recognizer(key):
+    """Create a continuous recognizer for a pool key, fed by a 16 kHz mono push stream"""
+    from_lang, _, to_lang = key.partition('>')
+    
+    # Set up the audio format for the push stream - CRITICAL for accuracy
+    push_stream = speechsdk.audio.PushAudioInputStream(
+        speechsdk.audio.AudioStreamFormat(
+            samples_per_second=16000,     # 16 kHz sample rate
+            bits_per_sample=16,           # 16-bit audio
+            channels=1                    # Mono audio
+        )
+    )
+    
+    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+    
+    if to_lang:
+        # Speech translation: recognition and translation in one streaming session
+        speech_config, speech_recognizer = create_translation_recognizer(
+            subscription_key, region, from_lang, [to_lang], audio_config, configure=configure_recognition
+        )
+    else:
+        speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
+        speech_config.speech_recognition_language = from_lang
+        configure_recognition(speech_config)
+        
+        # Create speech recognizer with continuous recognition and improved settings
+        speech_recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config, 
+            audio_config=audio_config
+        )
+    return WarmRecognizer(speech_config, push_stream, audio_config, speech_recognizer)
+
+# Recognizers with their service connection already open, so Start does not wait on it
+recognizer_pool = RecognizerPool(build_recognizer,
+                                 size=RECOGNIZER_POOL_SIZE if subscription_key or SPEECH_BACKEND == "fake" else 0)
+
+# End-of-speech to caption latency across all sessions, per engine
+caption_latency = {engine: CaptionLatency() for engine in ENGINES}
+
 class RealTimeTranscriptionTranslation:
-    def __init__(self, from_lang="en-US", to_lang="es"):
-        """Initialize the real-time transcription and translation system"""
+    def __init__(self, sid, from_lang="en-US", to_lang="es", speculative=SPECULATIVE_INTERIM, delta_interim=False,
+                 engine=RECOGNITION_ENGINE):
+        """Initialize the real-time transcription and translation system for one client
+
+        engine picks the two-hop path (recognizer + Translator request per final)
+        or speech translation; both emit the same events.
+        """
+        self.sid = sid
         self.from_lang = from_lang
         self.to_lang_code = to_lang
+        self.engine = engine_or_default(engine)
         self.is_running = True
         self.lock = threading.Lock()
+        self.usage = SessionUsage()
+        self.caption_latency = CaptionLatency()
+        self.timeline = UtteranceTimeline(self.engine)
+        
+        # Speech translation numbers its own utterances and tracks the interim translation
+        self.next_utterance_id = 0
+        self.interim_source = ""
+        self.interim_translation = ""
+        
+        # Finals are translated on the worker pool, or without a thread per request on the
+        # httpx transport, and emitted in utterance order
+        self.translation_queue = OrderedTranslationQueue(
+            translate=self.translate,
+            translate_async=self.submit_translation if get_translator(subscription_key).async_transport else None,
+            deliver=self.emit_translation,
+            announce=self.emit_transcription,
+            stamp=self.timeline.stamp
+        )
+        
+        # Interim results are rate-limited and, for clients that support it, delta-encoded
+        self.interim_throttle = InterimThrottle(
+            send=self.send_interim,
+            delta=delta_interim
+        )
+        
+        # Optional translation of the stable prefix of interim results; speech
+        # translation already translates every interim result
+        self.speculative = None
+        if speculative and self.engine != SPEECH_TRANSLATION:
+            self.speculative = SpeculativeTranslator(
+                translate=self.translate_interim,
+                emit=self.emit_interim_translation
+            )
         self.setup_speech_config()
         
     def setup_speech_config(self):
-        """Set up the speech configuration with improved settings"""
-        self.speech_config = speechsdk.SpeechConfig(subscription=subscription_key, region=region)
-        self.speech_config.speech_recognition_language = self.from_lang
-        
-        # Enhanced recognition settings
-        self.speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs, "5000")
-        self.speech_config.set_property(speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs, "1000") 
-        self.speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs, "500")
-        
-        # Enable more detailed recognition
-        self.speech_config.enable_audio_logging()
-        self.speech_config.enable_dictation()
-        
-        # Set up the audio format for the push stream - CRITICAL for accuracy
-        self.push_stream = speechsdk.audio.PushAudioInputStream(
-            speechsdk.audio.AudioStreamFormat(
-                samples_per_second=16000,     # 16 kHz sample rate
-                bits_per_sample=16,           # 16-bit audio
-                channels=1                    # Mono audio
-            )
-        )
+        """Take a recognizer (pre-connected when the pool has one) and wire up this session"""
+        self.warm_recognizer = recognizer_pool.acquire(recognizer_key(self.engine, self.from_lang, self.to_lang_code))
+        self.speech_config = self.warm_recognizer.speech_config
+        self.push_stream = self.warm_recognizer.push_stream
+        self.audio_config = self.warm_recognizer.audio_config
+        self.speech_recognizer = self.warm_recognizer.recognizer
+        self.started_at = None
+        self.first_interim_ms = None
+        self.stopping = False
         
-        self.audio_config = speechsdk.audio.AudioConfig(stream=self.push_stream)
+        # Service lag from result offsets, and connection drops, of this recognizer
+        self.service_latency = SpeechServiceLatency(self.engine, connected=self.warm_recognizer.warm)
+        self.connection = self.warm_recognizer.connection or speechsdk.Connection.from_recognizer(self.speech_recognizer)
+        self.connection.connected.connect(self.service_latency.connection_connected)
+        self.connection.disconnected.connect(self.disconnected_callback)
         
-        # Create speech recognizer with continuous recognition and improved settings
-        self.speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=self.speech_config, 
-            audio_config=self.audio_config
-        )
+        # Long silences are trimmed before they reach the recognizer
+        self.vad = VoiceActivityGate(self.write_stream) if VAD_ENABLED else None
+        
+        # Small browser frames are coalesced into fewer, larger push stream writes
+        self.ingest = AudioIngestBuffer(self.vad.process if self.vad else self.write_stream)
         
         # Set up better event handlers for recognition
-        self.speech_recognizer.recognized.connect(self.recognized_callback)
-        self.speech_recognizer.recognizing.connect(self.recognizing_callback)  # Add interim results
+        if self.engine == SPEECH_TRANSLATION:
+            self.speech_recognizer.recognized.connect(self.translated_callback)
+            self.speech_recognizer.recognizing.connect(self.translating_callback)
+        else:
+            self.speech_recognizer.recognized.connect(self.recognized_callback)
+            self.speech_recognizer.recognizing.connect(self.recognizing_callback)  # Add interim results
         self.speech_recognizer.session_stopped.connect(self.session_stopped_callback)
         self.speech_recognizer.canceled.connect(self.canceled_callback)
     
+    def write_stream(self, audio_data):
+        """Write audio to the recognizer, counting the stream time result offsets refer to"""
+        self.service_latency.audio_written(len(audio_data))
+        self.push_stream.write(audio_data)
+    
+    def disconnected_callback(self, evt):
+        """Service connection lost; the close caused by stop() is not counted"""
+        if not self.stopping:
+            self.service_latency.connection_disconnected(evt)
+    
     def recognizing_callback(self, evt):
         """Callback for interim results (while still speaking)"""
         if evt.result.reason == speechsdk.ResultReason.RecognizingSpeech:
@@ -114,114 +223,445 @@ class RealTimeTranscriptionTranslation:
             if not text.strip():
                 return
             
+            self.usage.add('interim_results')
+            
+            self.record_interim()
+            
             # Send interim results to client (without translation for speed)
-            socketio.emit('interim_update', {
-                'transcription': text
-            })
+            self.interim_throttle.update(text)
+            
+            # Speculatively translate the part of the hypothesis that has settled
+            if self.speculative:
+                self.speculative.update(text)
+    
+    def record_interim(self):
+        """Latency bookkeeping shared by both engines' interim callbacks"""
+        self.caption_latency.speech_heard()
+        self.timeline.recognizing()
+        
+        # Time to first interim shows what a pre-connected recognizer saves
+        if self.first_interim_ms is None and self.started_at is not None:
+            self.first_interim_ms = (time.monotonic() - self.started_at) * 1000
+            recognizer_pool.record_first_interim(self.warm_recognizer.warm, self.first_interim_ms)
+    
+    def translating_callback(self, evt):
+        """Speech translation interim result: hypothesis plus its translation"""
+        if evt.result.reason == speechsdk.ResultReason.TranslatingSpeech:
+            text = evt.result.text
+            if not text.strip():
+                return
+            
+            self.usage.add('interim_results')
+            self.record_interim()
+            
+            # The throttle decides when to send; the translation goes with the hypothesis
+            self.interim_source = text
+            self.interim_translation = evt.result.translations.get(self.to_lang_code, "")
+            self.interim_throttle.update(text)
+    
+    def translated_callback(self, evt):
+        """Speech translation final result: emitted directly, no Translator request"""
+        if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
+            text = evt.result.text
+            self.service_latency.recognized(evt.result)
+            self.interim_throttle.reset()
+            self.interim_source = ""
+            self.interim_translation = ""
+            
+            if not text.strip():
+                return
+            
+            self.usage.add('final_results')
+            self.usage.add('translations')
+            
+            # SDK callbacks are serialized, so ids are emitted in utterance order
+            utterance_id = self.next_utterance_id
+            self.next_utterance_id += 1
+            self.emit_transcription(utterance_id, text)
+            self.emit_translation(utterance_id, text, evt.result.translations.get(self.to_lang_code, ""))
+    
+    def send_interim(self, payload):
+        """Send one throttled interim update, with its translation under speech translation"""
+        self.emit('interim_update', payload)
+        if self.interim_translation:
+            self.emit_interim_translation(self.interim_source, self.interim_translation)
+    
+    def record_caption(self, utterance_id):
+        """Record end-of-speech to caption latency for an utterance just delivered"""
+        self.timeline.emitted(utterance_id)
+        latency_ms = self.caption_latency.caption_shown(utterance_id)
+        if latency_ms is not None:
+            caption_latency[self.engine].record(latency_ms)
+            CAPTION_LATENCY_SECONDS.observe(latency_ms / 1000, engine=self.engine)
     
     def recognized_callback(self, evt):
         """Callback for final recognition results"""
         if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
             text = evt.result.text
+            self.service_latency.recognized(evt.result)
+            
+            # The final result supersedes any unsent interim and speculative translation
+            self.interim_throttle.reset()
+            if self.speculative:
+                self.speculative.reset()
             
             # Skip empty results
             if not text.strip():
                 return
             
-            # Translate the recognized text
-            translation = translate_text_async(text, 
-                                             from_lang=self.from_lang.split('-')[0], 
-                                             to_lang=self.to_lang_code)
+            self.usage.add('final_results')
             
-            # Send the results to the client
-            socketio.emit('transcription_update', {
-                'transcription': text,
-                'translation': translation
-            })
+            # Hand off to the worker pool so the SDK thread is never blocked
+            self.translation_queue.submit(text)
+    
+    def emit(self, event, data):
+        """Emit an event to this client's room only"""
+        socketio.emit(event, data, to=self.sid)
+    
+    def translate(self, text):
+        """Translate one final result (runs on a translation worker)"""
+        self.usage.add('translations')
+        return translate_text_async(text, 
+                                    from_lang=self.from_lang.split('-')[0], 
+                                    to_lang=self.to_lang_code)
+    
+    def submit_translation(self, text):
+        """Start translating one final result on the httpx transport; returns a Future"""
+        self.usage.add('translations')
+        return get_translator(subscription_key).submit_translate(text, 
+                                                                 from_lang=self.from_lang.split('-')[0], 
+                                                                 to_lang=self.to_lang_code)
+    
+    def translate_interim(self, text):
+        """Translate a stable interim prefix (runs on a translation worker)"""
+        # Prefixes are short-lived; keep them out of the cache, the store and final batches
+        return get_translator(subscription_key).translate(text, 
+                                                          from_lang=self.from_lang.split('-')[0], 
+                                                          to_lang=self.to_lang_code,
+                                                          bypass_cache=True)
+    
+    def emit_interim_translation(self, source_text, translation):
+        """Send a speculative translation of the current utterance"""
+        self.emit('interim_translation', {
+            'source': source_text,
+            'translation': translation
+        })
+    
+    def emit_transcription(self, utterance_id, text):
+        """Send the recognized text immediately, before its translation arrives"""
+        self.caption_latency.utterance_final(utterance_id)
+        self.timeline.recognized(utterance_id)
+        self.emit('transcription_pending', {
+            'id': utterance_id,
+            'transcription': text
+        })
+    
+    def emit_translation(self, utterance_id, text, translation):
+        """Send the translated result to the client (called in utterance order)"""
+        self.record_caption(utterance_id)
+        self.emit('transcription_update', {
+            'id': utterance_id,
+            'transcription': text,
+            'translation': translation
+        })
     
     def session_stopped_callback(self, evt):
         """Callback for when session is stopped"""
         self.is_running = False
-        socketio.emit('transcription_status', {'status': 'stopped'})
+        self.emit('transcription_status', {'status': 'stopped'})
     
     def canceled_callback(self, evt):
         """Callback for when recognition is canceled"""
         if evt.reason == speechsdk.CancellationReason.Error:
-            socketio.emit('error', {'message': f"Error: {evt.reason} ({evt.error_details})"})
+            self.emit('error', {'message': f"Error: {evt.reason} ({evt.error_details})"})
         self.is_running = False
-        socketio.emit('transcription_status', {'status': 'stopped'})
+        self.emit('transcription_status', {'status': 'stopped'})
+    
+    def stats(self):
+        """Resource usage and queue state of this session"""
+        stats = self.usage.snapshot()
+        stats['translation_backlog'] = self.translation_queue.pending()
+        stats['engine'] = self.engine
+        stats['caption_latency'] = self.caption_latency.stats()
+        stats['timeline'] = self.timeline.stats()
+        stats['speech_service'] = self.service_latency.stats()
+        stats['warm_start'] = self.warm_recognizer.warm
+        stats['time_to_first_interim_ms'] = self.first_interim_ms
+        stats['interim'] = self.interim_throttle.stats()
+        stats['ingest'] = self.ingest.stats()
+        if self.vad:
+            stats['vad'] = self.vad.stats()
+        if self.speculative:
+            stats['speculative'] = self.speculative.stats()
+        return stats
     
     def start(self):
         """Start the continuous recognition"""
+        self.started_at = time.monotonic()
         self.speech_recognizer.start_continuous_recognition()
-        socketio.emit('transcription_status', {'status': 'started'})
+        self.emit('transcription_status', {'status': 'started'})
         
     def stop(self):
-        """Stop the continuous recognition"""
-        self.speech_recognizer.stop_continuous_recognition()
+        """Stop recognition and release the push stream and service connection
+
+        Safe to call more than once, on a session the service already canceled
+        and on one that was never started.
+        """
+        if self.stopping:
+            return
+        self.stopping = True
+        was_running = self.is_running and self.started_at is not None
+        try:
+            self.ingest.flush()
+            if self.vad:
+                self.vad.flush()
+            self.speech_recognizer.stop_continuous_recognition()
+        finally:
+            self.push_stream.close()
+            self.connection.close()
         self.is_running = False
-        socketio.emit('transcription_status', {'status': 'stopped'})
+        if was_running:
+            self.emit('transcription_status', {'status': 'stopped'})
 
     def process_audio(self, audio_data):
         """Process audio data received from the client with debugging"""
         try:
-            # Write the audio data to the push stream
-            self.push_stream.write(audio_data)
+            # Buffer the audio; the ingest layer writes it to the push stream
+            self.usage.record_audio(len(audio_data))
+            AUDIO_BYTES_TOTAL.inc(len(audio_data))
+            self.timeline.audio_received()
+            self.ingest.push(audio_data)
         except Exception as e:
             print(f"Error processing audio data: {e}")
-            socketio.emit('error', {'message': f"Error processing audio: {str(e)}"})
+            self.emit('error', {'message': f"Error processing audio: {str(e)}"})
+
+class BroadcastTranscription(RealTimeTranscriptionTranslation):
+    # Source-language captions go to the whole room; status and errors only to the speaker
+    ROOM_EVENTS = ('interim_update', 'transcription_pending')
+    
+    def __init__(self, sid, room, from_lang="en-US", speculative=SPECULATIVE_INTERIM):
+        """One recognizer whose results fan out to every listener of a broadcast room
+
+        Interim updates are sent as full text because listeners join mid-utterance
+        and would have no base to apply a delta to. Broadcasts always use the
+        two-hop engine because listeners add target languages while it runs.
+        """
+        self.room = room
+        super().__init__(sid, from_lang=from_lang, to_lang=None, speculative=speculative, delta_interim=False,
+                         engine=TWO_HOP)
+    
+    def emit(self, event, data):
+        """Emit captions to the broadcast room and everything else to the speaker"""
+        socketio.emit(event, data, to=self.room.name if event in self.ROOM_EVENTS else self.sid)
+    
+    def translate(self, text):
+        """Translate once per distinct subscribed language, in one request"""
+        to_langs = self.room.languages()
+        if to_langs:
+            self.usage.add('translations')
+        return translate_text_multi(text, self.from_lang.split('-')[0], to_langs)
+    
+    def submit_translation(self, text):
+        """Start translating into every subscribed language; returns a Future"""
+        to_langs = self.room.languages()
+        if to_langs:
+            self.usage.add('translations')
+        return get_translator(subscription_key).submit_translate_multi(text, self.from_lang.split('-')[0], to_langs)
+    
+    def translate_interim(self, text):
+        """Translate a stable interim prefix into every subscribed language"""
+        return get_translator(subscription_key).translate_multi(text, self.from_lang.split('-')[0],
+                                                                self.room.languages(), bypass_cache=True)
+    
+    def emit_interim_translation(self, source_text, translations):
+        """Send each speculative translation to its language sub-room"""
+        for to_lang, translation in translations.items():
+            socketio.emit('interim_translation', {
+                'source': source_text,
+                'translation': translation
+            }, to=language_room(self.room.name, to_lang))
+    
+    def emit_translation(self, utterance_id, text, translations):
+        """Send each translation to its language sub-room"""
+        self.record_caption(utterance_id)
+        for to_lang, translation in translations.items():
+            socketio.emit('transcription_update', {
+                'id': utterance_id,
+                'transcription': text,
+                'translation': translation
+            }, to=language_room(self.room.name, to_lang))
 
 @app.route('/')
 def index():
     """Render the main page"""
     return render_template('index.html')
 
+@app.route('/stats')
+def stats():
+    """Report session, translation worker pool and Translator client statistics"""
+    return jsonify({
+        'active_sessions': len(sessions),
+        'max_sessions': sessions.max_sessions,
+        'sessions': {sid: t.stats() for sid, t in sessions.items()},
+        'broadcasts': broadcasts.stats(),
+        'translation_pool': get_worker_pool().stats(),
+        'recognizer_pool': recognizer_pool.stats(),
+        'caption_latency': {engine: latency.stats() for engine, latency in caption_latency.items()},
+        'translator': get_translator(subscription_key).stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: per-stage utterance latency, queue depths, Translator errors"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     print("Client connected")
 
+def stop_session(sid):
+    """Stop and forget the transcriber belonging to a client, if any"""
+    transcriber = sessions.pop(sid)
+    if transcriber:
+        # Also releases sessions the service canceled, which are no longer running
+        transcriber.stop()
+    
+    # A speaker stopping ends their broadcast for every listener
+    room = broadcasts.room_for_speaker(sid)
+    if room:
+        broadcasts.close(room.name)
+        socketio.emit('broadcast_ended', {'room': room.name}, to=room.name)
+        close_room(room.name)
+        for to_lang in room.languages():
+            close_room(language_room(room.name, to_lang))
+    return transcriber
+
+def leave_broadcasts(sid):
+    """Remove a listener from every broadcast room it joined"""
+    for room in broadcasts.rooms_for_listener(sid):
+        to_lang = room.remove_listener(sid)
+        leave_room(room.name, sid=sid)
+        leave_room(language_room(room.name, to_lang), sid=sid)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print("Client disconnected")
-    global transcriber, is_transcribing
-    if transcriber and is_transcribing:
-        transcriber.stop()
-        is_transcribing = False
+    stop_session(request.sid)
+    leave_broadcasts(request.sid)
 
 @socketio.on('start_transcription')
 def handle_start_transcription(data):
-    """Start transcription and translation"""
-    global transcriber, is_transcribing
-    
+    """Start transcription and translation for the calling client"""
     # Get language preferences from the request
     from_lang = data.get('from_lang', 'en-US')
     to_lang = data.get('to_lang', 'es')
+    speculative = data.get('speculative', SPECULATIVE_INTERIM)
+    # Older clients only understand full-text interim updates
+    delta_interim = data.get('delta_interim', False)
+    engine = data.get('engine', RECOGNITION_ENGINE)
+    
+    # A client restarting replaces only its own recognizer
+    stop_session(request.sid)
     
-    # Create a new transcriber instance
-    transcriber = RealTimeTranscriptionTranslation(from_lang=from_lang, to_lang=to_lang)
+    # Checked before a recognizer is taken from the pool; add() below still enforces the limit
+    if len(sessions) >= sessions.max_sessions:
+        emit('error', {'message': "Server is at capacity, please try again later"})
+        emit('transcription_status', {'status': 'stopped'})
+        return
+    
+    # Create a new transcriber instance for this client
+    transcriber = RealTimeTranscriptionTranslation(request.sid, from_lang=from_lang, to_lang=to_lang,
+                                                   speculative=speculative, delta_interim=delta_interim,
+                                                   engine=engine)
+    if not sessions.add(request.sid, transcriber):
+        transcriber.stop()
+        emit('error', {'message': "Server is at capacity, please try again later"})
+        emit('transcription_status', {'status': 'stopped'})
+        return
     transcriber.start()
-    is_transcribing = True
     
     emit('transcription_status', {'status': 'started'})
 
 @socketio.on('stop_transcription')
 def handle_stop_transcription():
-    """Stop transcription and translation"""
-    global transcriber, is_transcribing
-    if transcriber and is_transcribing:
+    """Stop transcription and translation for the calling client"""
+    if stop_session(request.sid):
+        emit('transcription_status', {'status': 'stopped'})
+
+@socketio.on('start_broadcast')
+def handle_start_broadcast(data):
+    """Start a broadcast: one recognizer for the caller, translations for every listener"""
+    room_name = data.get('room', '').strip()
+    from_lang = data.get('from_lang', 'en-US')
+    to_lang = data.get('to_lang', 'es')
+    speculative = data.get('speculative', SPECULATIVE_INTERIM)
+    if not room_name:
+        emit('error', {'message': "A room name is required to broadcast"})
+        return
+    if not valid_room_name(room_name):
+        emit('error', {'message': f"Room names cannot contain '{LANGUAGE_ROOM_SEPARATOR}'"})
+        return
+    
+    stop_session(request.sid)
+    if len(sessions) >= sessions.max_sessions:
+        emit('error', {'message': "Server is at capacity, please try again later"})
+        emit('transcription_status', {'status': 'stopped'})
+        return
+    room = broadcasts.open(room_name, request.sid, from_lang)
+    if room is None:
+        emit('error', {'message': f"Room '{room_name}' already has a speaker"})
+        emit('transcription_status', {'status': 'stopped'})
+        return
+    
+    # The speaker also reads the broadcast in their own target language
+    room.add_listener(request.sid, to_lang)
+    join_room(room_name)
+    join_room(language_room(room_name, to_lang))
+    
+    transcriber = BroadcastTranscription(request.sid, room, from_lang=from_lang, speculative=speculative)
+    if not sessions.add(request.sid, transcriber):
         transcriber.stop()
-        is_transcribing = False
+        broadcasts.close(room_name)
+        emit('error', {'message': "Server is at capacity, please try again later"})
         emit('transcription_status', {'status': 'stopped'})
+        return
+    transcriber.start()
+    
+    emit('transcription_status', {'status': 'started', 'room': room_name})
+
+@socketio.on('join_broadcast')
+def handle_join_broadcast(data):
+    """Listen to a broadcast room in the caller's chosen language"""
+    room_name = data.get('room', '').strip()
+    to_lang = data.get('to_lang', 'es')
+    room = broadcasts.get(room_name)
+    if room is None:
+        emit('error', {'message': f"No broadcast named '{room_name}'"})
+        return
+    
+    previous = room.add_listener(request.sid, to_lang)
+    if previous and previous != to_lang:
+        leave_room(language_room(room_name, previous))
+    join_room(room_name)
+    join_room(language_room(room_name, to_lang))
+    
+    emit('transcription_status', {'status': 'listening', 'room': room_name})
+
+@socketio.on('leave_broadcast')
+def handle_leave_broadcast():
+    """Stop listening to every broadcast the caller joined"""
+    leave_broadcasts(request.sid)
+    emit('transcription_status', {'status': 'stopped'})
 
 @socketio.on('audio_data')
 def handle_audio_data(data):
     """Handle audio data from the client"""
-    global transcriber, is_transcribing
-    if transcriber and is_transcribing:
-        # Convert base64 audio data to bytes and process it
-        audio_bytes = data['audio_data']
+    transcriber = sessions.get(request.sid)
+    if transcriber and transcriber.is_running:
+        # Frames arrive as raw binary, or wrapped in a dict by older clients
+        audio_bytes = data['audio_data'] if isinstance(data, dict) else data
         transcriber.process_audio(audio_bytes)
 
 if __name__ == '__main__':
@@ -298,7 +738,7 @@ h1 {
     align-items: center;
 }
 
-select, button {
+select, button, input[type="text"] {
     padding: 12px 24px;
     border-radius: 999px;
     font-size: 15px;
@@ -315,6 +755,14 @@ select {
     color: var(--text-primary);
 }
 
+input[type="text"] {
+    background: var(--surface-color);
+    border: 2px solid var(--border-color);
+    font-family: 'Space Grotesk';
+    color: var(--text-primary);
+    width: 120px;
+}
+
 button {
     background: linear-gradient(145deg, var(--primary-color), #635343);
     color: white;
@@ -416,6 +864,10 @@ button:disabled {
     font-size: 1.05rem;
 }
 
+.pending {
+    opacity: 0.6;
+}
+
 .error-message {
     color: #B44D4D;
     background-color: #FBEBE9;
@@ -519,8 +971,13 @@ button:disabled {
                         <option value="zh">Chinese (Simplified)</option>
                     </select>
                 </div>
+                <div>
+                    <label for="room-name">Room:</label>
+                    <input type="text" id="room-name" placeholder="optional">
+                </div>
             </div>
             <div>
+                <button id="join-btn">Join as Listener</button>
                 <button id="start-btn">Start Transcription</button>
                 <button id="stop-btn" disabled>Stop Transcription</button>
             </div>
@@ -565,6 +1022,17 @@ button:disabled {
                     <option value="48000">48 kHz (highest quality)</option>
                 </select>
             </div>
+            <div>
+                <label for="speculative-interim">Translate while speaking:</label>
+                <input type="checkbox" id="speculative-interim">
+            </div>
+            <div>
+                <label for="engine">Engine:</label>
+                <select id="engine">
+                    <option value="two_hop" selected>Speech recognition + Translator</option>
+                    <option value="speech_translation">Speech translation</option>
+                </select>
+            </div>
             <button id="toggle-advanced">Hide Advanced Settings</button>
         </div>
 
@@ -580,6 +1048,8 @@ button:disabled {
         const stopBtn = document.getElementById('stop-btn');
         const fromLangSelect = document.getElementById('from-lang');
         const toLangSelect = document.getElementById('to-lang');
+        const roomInput = document.getElementById('room-name');
+        const joinBtn = document.getElementById('join-btn');
         const transcriptionDiv = document.getElementById('transcription');
         const translationDiv = document.getElementById('translation');
         const statusDiv = document.getElementById('status');
@@ -589,6 +1059,8 @@ button:disabled {
         const settingsPanel = document.getElementById('settings-panel');
         const bufferSizeSelect = document.getElementById('buffer-size');
         const sampleRateSelect = document.getElementById('sample-rate');
+        const speculativeCheckbox = document.getElementById('speculative-interim');
+        const engineSelect = document.getElementById('engine');
         
         // Audio context and variables
         let audioContext;
@@ -599,6 +1071,7 @@ button:disabled {
         let analyser = null;
         let bufferSize = 2048;
         let sampleRate = 16000;
+        let isListening = false;
         
         // Socket.IO event handlers
         socket.on('connect', () => {
@@ -611,45 +1084,94 @@ button:disabled {
         });
         
         // Handle interim results (while speaking)
+        let interimText = '';
         socket.on('interim_update', (data) => {
-            // Update only the transcription panel with interim results
-            // Only update if we're not showing a final result
-            if (!transcriptionDiv.lastChild || !transcriptionDiv.lastChild.classList.contains('final')) {
-                // If there's an existing interim element, update it
-                if (transcriptionDiv.lastChild && transcriptionDiv.lastChild.classList.contains('interim')) {
-                    transcriptionDiv.lastChild.textContent = data.transcription;
-                } else {
-                    // Create a new interim element
-                    const interimElem = document.createElement('p');
-                    interimElem.classList.add('interim');
-                    interimElem.textContent = data.transcription;
-                    transcriptionDiv.appendChild(interimElem);
-                    transcriptionDiv.scrollTop = transcriptionDiv.scrollHeight;
-                }
+            // Delta updates carry the length of the unchanged prefix plus the new suffix
+            if (data.transcription !== undefined) {
+                interimText = data.transcription;
+            } else {
+                interimText = interimText.slice(0, data.prefix_len) + data.suffix;
+            }
+            
+            // If there's an existing interim element, update it
+            if (transcriptionDiv.lastChild && transcriptionDiv.lastChild.classList.contains('interim')) {
+                transcriptionDiv.lastChild.textContent = interimText;
+            } else {
+                // Create a new interim element
+                const interimElem = document.createElement('p');
+                interimElem.classList.add('interim');
+                interimElem.textContent = interimText;
+                transcriptionDiv.appendChild(interimElem);
+                transcriptionDiv.scrollTop = transcriptionDiv.scrollHeight;
             }
         });
         
-        // Update the transcription_update handler for final results
-        socket.on('transcription_update', (data) => {
-            // Remove any interim results
-            if (transcriptionDiv.lastChild && transcriptionDiv.lastChild.classList.contains('interim')) {
-                transcriptionDiv.removeChild(transcriptionDiv.lastChild);
+        // Remove the interim elements once a final result arrives
+        function clearInterim() {
+            interimText = '';
+            [transcriptionDiv, translationDiv].forEach(div => {
+                if (div.lastChild && div.lastChild.classList.contains('interim')) {
+                    div.removeChild(div.lastChild);
+                }
+            });
+        }
+        
+        // Translation of the current utterance while it is still being spoken
+        socket.on('interim_translation', (data) => {
+            if (translationDiv.lastChild && translationDiv.lastChild.classList.contains('interim')) {
+                translationDiv.lastChild.textContent = data.translation;
+            } else {
+                const interimElem = document.createElement('p');
+                interimElem.classList.add('interim');
+                interimElem.textContent = data.translation;
+                translationDiv.appendChild(interimElem);
+                translationDiv.scrollTop = translationDiv.scrollHeight;
             }
-            
-            // Add final results with distinct styling
+        });
+        
+        // Append a final transcription/translation pair
+        function addFinalResult(id, transcription, translation, pending) {
             const transcriptionElem = document.createElement('p');
             transcriptionElem.classList.add('final');
-            transcriptionElem.textContent = data.transcription;
+            transcriptionElem.textContent = transcription;
             transcriptionDiv.appendChild(transcriptionElem);
             
             const translationElem = document.createElement('p');
             translationElem.classList.add('final');
-            translationElem.textContent = data.translation;
+            if (pending) {
+                translationElem.classList.add('pending');
+            }
+            if (id !== undefined) {
+                translationElem.dataset.id = id;
+            }
+            translationElem.textContent = translation;
             translationDiv.appendChild(translationElem);
             
             // Scroll to bottom
             transcriptionDiv.scrollTop = transcriptionDiv.scrollHeight;
             translationDiv.scrollTop = translationDiv.scrollHeight;
+        }
+        
+        // Final transcription is sent as soon as it is recognized
+        socket.on('transcription_pending', (data) => {
+            clearInterim();
+            addFinalResult(data.id, data.transcription, '…', true);
+        });
+        
+        // Translation for a final result (arrives in utterance order)
+        socket.on('transcription_update', (data) => {
+            // Fill in the placeholder left by transcription_pending if there is one;
+            // the interim text on screen may already belong to the next utterance
+            const pendingElem = data.id !== undefined
+                ? translationDiv.querySelector(`[data-id="${data.id}"]`)
+                : null;
+            if (pendingElem) {
+                pendingElem.textContent = data.translation;
+                pendingElem.classList.remove('pending');
+            } else {
+                clearInterim();
+                addFinalResult(data.id, data.transcription, data.translation, false);
+            }
         });
         
         socket.on('transcription_status', (data) => {
@@ -657,16 +1179,47 @@ button:disabled {
                 statusDiv.innerHTML = 'Recording... <span class="recording">●</span>';
                 statusDiv.classList.add('recording');
                 startBtn.disabled = true;
+                joinBtn.disabled = true;
+                stopBtn.disabled = false;
+            } else if (data.status === 'listening') {
+                isListening = true;
+                statusDiv.textContent = `Listening to room ${data.room}`;
+                startBtn.disabled = true;
+                joinBtn.disabled = true;
                 stopBtn.disabled = false;
             } else if (data.status === 'stopped') {
+                isListening = false;
                 statusDiv.innerHTML = 'Ready to start';
                 statusDiv.classList.remove('recording');
                 startBtn.disabled = false;
+                joinBtn.disabled = false;
                 stopBtn.disabled = true;
                 stopRecording();
             }
         });
         
+        // The speaker of a room we were listening to has stopped
+        socket.on('broadcast_ended', (data) => {
+            if (!isListening) return;
+            isListening = false;
+            statusDiv.textContent = `Broadcast in room ${data.room} has ended`;
+            startBtn.disabled = false;
+            joinBtn.disabled = false;
+            stopBtn.disabled = true;
+        });
+        
+        // Join a broadcast room as a listener in the selected target language
+        joinBtn.addEventListener('click', () => {
+            const room = roomInput.value.trim();
+            if (!room) {
+                roomInput.focus();
+                return;
+            }
+            transcriptionDiv.innerHTML = '';
+            translationDiv.innerHTML = '';
+            socket.emit('join_broadcast', { room: room, to_lang: toLangSelect.value });
+        });
+        
         socket.on('error', (data) => {
             console.error(data.message);
             const errorDiv = document.createElement('div');
@@ -780,15 +1333,21 @@ button:disabled {
                     // Convert to 16-bit PCM with proper scaling
                     const pcmData = convertFloat32ToInt16(inputData);
                     
-                    // Send to server
-                    socket.emit('audio_data', { audio_data: pcmData });
+                    // Send to server as a bare binary frame
+                    socket.emit('audio_data', pcmData);
                 };
                 
                 // Start recording
                 isRecording = true;
                 
-                // Start transcription on the server
-                socket.emit('start_transcription', { from_lang: fromLang, to_lang: toLang });
+                // Start transcription on the server, as a broadcast if a room was given
+                const room = roomInput.value.trim();
+                const speculative = speculativeCheckbox.checked;
+                if (room) {
+                    socket.emit('start_broadcast', { room: room, from_lang: fromLang, to_lang: toLang, speculative: speculative });
+                } else {
+                    socket.emit('start_transcription', { from_lang: fromLang, to_lang: toLang, speculative: speculative, delta_interim: true, engine: engineSelect.value });
+                }
                 
             } catch (error) {
                 console.error('Error starting recording:', error);
@@ -801,6 +1360,10 @@ button:disabled {
         
         // Stop recording and transcription
         stopBtn.addEventListener('click', () => {
+            if (isListening) {
+                socket.emit('leave_broadcast');
+                return;
+            }
             socket.emit('stop_transcription');
             stopRecording();
         });
@@ -862,4 +1425,5 @@ button:disabled {
         ''')
     
     # Run the app
-    socketio.run(app, debug=True, host='0.0.0.0', port=5007, ssl_context=None)
\ No newline at end of file
+    socketio.run(app, debug=True, host='0.0.0.0', port=5007, ssl_context=None,
+                 allow_unsafe_werkzeug=ALLOW_UNSAFE_WERKZEUG)
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import uuid
+import httpx
+
+# HTTP/2 needs the optional h2 package; without it httpx falls back to HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Upper bound on requests in flight at once across every caller of one client
+MAX_IN_FLIGHT = int(os.getenv("TRANSLATOR_MAX_IN_FLIGHT", "256"))
+
+
+class AsyncTranslatorTransport:
+    def __init__(self, endpoint, headers, max_connections, connect_timeout, read_timeout,
+                 max_in_flight=MAX_IN_FLIGHT, http2=True):
+        """Translator requests on an httpx.AsyncClient running in its own event-loop thread
+
+        Over HTTP/2 every request to the endpoint is multiplexed onto a few
+        connections. Coroutines can await post() directly; threads use submit(),
+        which returns a concurrent.futures.Future that cancels the request when
+        cancelled, or the blocking post_sync().
+        """
+        self.endpoint = endpoint
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            print("h2 is not installed; Translator requests will use HTTP/1.1")
+        self.timeout = connect_timeout + read_timeout
+        self.max_in_flight = max_in_flight
+
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.cancelled = 0
+        self.http_versions = {}
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="translator-event-loop", daemon=True)
+        self.thread.start()
+
+        # The client and semaphore must be created on the loop that uses them
+        self.client, self.semaphore = asyncio.run_coroutine_threadsafe(
+            self._create(headers, max_connections, connect_timeout, read_timeout), self.loop
+        ).result()
+
+    async def _create(self, headers, max_connections, connect_timeout, read_timeout):
+        client = httpx.AsyncClient(
+            http2=self.http2,
+            headers=headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        return client, asyncio.Semaphore(self.max_in_flight)
+
+    async def post(self, params, body):
+        """Send one Translator request and return the decoded JSON response"""
+        with self.stats_lock:
+            self.waiting += 1
+        acquired = False
+        try:
+            async with self.semaphore:
+                acquired = True
+                with self.stats_lock:
+                    self.waiting -= 1
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    response = await self.client.post(
+                        self.endpoint,
+                        params=params,
+                        json=body,
+                        headers={'X-ClientTraceId': str(uuid.uuid4())}
+                    )
+                    response.raise_for_status()
+                    with self.stats_lock:
+                        self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+                    return response.json()
+                finally:
+                    with self.stats_lock:
+                        self.in_flight -= 1
+        except asyncio.CancelledError:
+            with self.stats_lock:
+                self.cancelled += 1
+            raise
+        finally:
+            # Cancelled or failed while still queued on the semaphore
+            if not acquired:
+                with self.stats_lock:
+                    self.waiting -= 1
+
+    def submit(self, params, body, timeout=None):
+        """Schedule a request from any thread; returns a concurrent.futures.Future
+
+        With a timeout the request, including its wait for an in-flight slot, is
+        cancelled and the future fails with TimeoutError once it overruns.
+        """
+        request = self.post(params, body)
+        if timeout is not None:
+            request = asyncio.wait_for(request, timeout)
+        return asyncio.run_coroutine_threadsafe(request, self.loop)
+
+    def post_sync(self, params, body):
+        """Blocking facade for threads; the request is cancelled if it overruns the timeout"""
+        future = self.submit(params, body)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                'transport': 'httpx',
+                'http2': self.http2,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'waiting': self.waiting,
+                'cancelled': self.cancelled,
+                'responses_by_http_version': dict(self.http_versions)
+            }
+
+    def close(self):
+        """Close the connections and stop the event loop"""
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1)
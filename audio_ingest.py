@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+# PCM format pushed to the Speech SDK (16 kHz, 16-bit, mono)
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+# Size of each push_stream.write and the most audio held per session
+INGEST_WRITE_MS = int(os.getenv("AUDIO_INGEST_WRITE_MS", "100"))
+INGEST_MAX_BUFFER_MS = int(os.getenv("AUDIO_INGEST_MAX_BUFFER_MS", "2000"))
+
+
+def ms_to_bytes(ms):
+    """Length in bytes of ms milliseconds of 16-bit PCM, rounded to whole samples"""
+    return int(BYTES_PER_SECOND * ms / 1000) // 2 * 2
+
+
+class AudioIngestBuffer:
+    def __init__(self, write, write_bytes=None, max_buffer_bytes=None):
+        """Coalesce incoming audio frames of any size into right-sized writes
+
+        Frames are kept as received and joined once per write, so every byte is
+        copied at most once; a frame that is already large enough is passed
+        through untouched. Memory is bounded by max_buffer_bytes: if writes
+        cannot keep up, the oldest frames are dropped and counted.
+        """
+        self.write = write
+        self.write_bytes = write_bytes or ms_to_bytes(INGEST_WRITE_MS)
+        self.max_buffer_bytes = max_buffer_bytes or ms_to_bytes(INGEST_MAX_BUFFER_MS)
+
+        self.lock = threading.Lock()
+        self.frames = []
+        self.buffered = 0
+
+        self.started_at = time.monotonic()
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.write_time_total = 0.0
+        self.write_time_max = 0.0
+
+    def push(self, frame):
+        """Accept one frame (bytes, bytearray or memoryview)"""
+        if not frame:
+            return
+        with self.lock:
+            self.frames_in += 1
+            self.bytes_in += len(frame)
+            self.frames.append(frame)
+            self.buffered += len(frame)
+
+            # Keep per-session memory bounded if the writer falls behind
+            while self.buffered > self.max_buffer_bytes and len(self.frames) > 1:
+                dropped = self.frames.pop(0)
+                self.buffered -= len(dropped)
+                self.bytes_dropped += len(dropped)
+
+            if self.buffered >= self.write_bytes:
+                self._write_locked()
+
+    def flush(self):
+        """Write whatever is buffered, regardless of size"""
+        with self.lock:
+            if self.buffered:
+                self._write_locked()
+
+    def _write_locked(self):
+        """Write all buffered frames as one chunk"""
+        if len(self.frames) == 1:
+            chunk = self.frames[0]
+        else:
+            chunk = b"".join(self.frames)
+        start = time.perf_counter()
+        self.write(bytes(chunk) if isinstance(chunk, memoryview) else chunk)
+        elapsed = time.perf_counter() - start
+
+        self.frames = []
+        self.buffered = 0
+        self.writes += 1
+        self.bytes_written += len(chunk)
+        self.write_time_total += elapsed
+        self.write_time_max = max(self.write_time_max, elapsed)
+
+    def stats(self):
+        """Ingest rates, write sizes and write latency"""
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-6)
+            return {
+                'frames_per_sec': self.frames_in / elapsed,
+                'bytes_per_sec': self.bytes_in / elapsed,
+                'frames_in': self.frames_in,
+                'bytes_in': self.bytes_in,
+                'writes': self.writes,
+                'avg_write_bytes': self.bytes_written / self.writes if self.writes else None,
+                'bytes_buffered': self.buffered,
+                'bytes_dropped': self.bytes_dropped,
+                'avg_write_latency_ms': self.write_time_total / self.writes * 1000 if self.writes else None,
+                'max_write_latency_ms': self.write_time_max * 1000
+            }
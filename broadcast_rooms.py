@@ -0,0 +1,102 @@
+import threading
+
+
+# Joins a broadcast room name and a target language; room names may not contain it,
+# so room "a:es" can never be mistaken for room "a" in Spanish
+LANGUAGE_ROOM_SEPARATOR = ":"
+
+
+def valid_room_name(name):
+    return bool(name) and LANGUAGE_ROOM_SEPARATOR not in name
+
+
+def language_room(room, to_lang):
+    """Socket.IO room that receives translations of a broadcast into one language"""
+    return f"{room}{LANGUAGE_ROOM_SEPARATOR}{to_lang}"
+
+
+class BroadcastRoom:
+    def __init__(self, name, speaker_sid, from_lang):
+        """One speaker streaming to any number of listeners"""
+        self.name = name
+        self.speaker_sid = speaker_sid
+        self.from_lang = from_lang
+        self.lock = threading.Lock()
+        self.listeners = {}  # sid -> target language
+
+    def add_listener(self, sid, to_lang):
+        """Subscribe a client to a target language; returns its previous language, if any"""
+        with self.lock:
+            previous = self.listeners.get(sid)
+            self.listeners[sid] = to_lang
+            return previous
+
+    def remove_listener(self, sid):
+        """Unsubscribe a client; returns the language it was listening to, or None"""
+        with self.lock:
+            return self.listeners.pop(sid, None)
+
+    def has_listener(self, sid):
+        with self.lock:
+            return sid in self.listeners
+
+    def languages(self):
+        """Distinct target languages with at least one listener"""
+        with self.lock:
+            return sorted(set(self.listeners.values()))
+
+    def listener_count(self):
+        with self.lock:
+            return len(self.listeners)
+
+
+class BroadcastRegistry:
+    def __init__(self):
+        """Thread-safe map of room name -> BroadcastRoom"""
+        self.lock = threading.Lock()
+        self.rooms = {}
+
+    def open(self, name, speaker_sid, from_lang):
+        """Create a room; returns None if another speaker already owns the name"""
+        with self.lock:
+            existing = self.rooms.get(name)
+            if existing and existing.speaker_sid != speaker_sid:
+                return None
+            room = BroadcastRoom(name, speaker_sid, from_lang)
+            self.rooms[name] = room
+            return room
+
+    def close(self, name):
+        """Remove and return a room, or None"""
+        with self.lock:
+            return self.rooms.pop(name, None)
+
+    def get(self, name):
+        with self.lock:
+            return self.rooms.get(name)
+
+    def rooms_for_listener(self, sid):
+        """Rooms a client is currently listening to"""
+        with self.lock:
+            rooms = list(self.rooms.values())
+        return [room for room in rooms if room.has_listener(sid)]
+
+    def room_for_speaker(self, sid):
+        """Room owned by a speaker, or None"""
+        with self.lock:
+            for room in self.rooms.values():
+                if room.speaker_sid == sid:
+                    return room
+        return None
+
+    def stats(self):
+        """Listener counts and languages per room"""
+        with self.lock:
+            rooms = list(self.rooms.values())
+        return {
+            room.name: {
+                'listeners': room.listener_count(),
+                'languages': room.languages()
+            }
+            for room in rooms
+        }
@@ -0,0 +1,441 @@
+import enum
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "azure" uses the real Speech SDK; "fake" swaps in the scripted stand-in below
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "azure")
+# Optional text file with one utterance per line; the script repeats when it runs out
+FAKE_SPEECH_SCRIPT = os.getenv("FAKE_SPEECH_SCRIPT")
+# Speaking rate and the silence between utterances, both in audio time
+FAKE_SPEECH_WORDS_PER_SECOND = float(os.getenv("FAKE_SPEECH_WORDS_PER_SECOND", "2.5"))
+FAKE_SPEECH_PAUSE_MS = float(os.getenv("FAKE_SPEECH_PAUSE_MS", "700"))
+# Silence after an utterance before its final result, like Speech_SegmentationSilenceTimeoutMs
+FAKE_SPEECH_ENDPOINT_MS = float(os.getenv("FAKE_SPEECH_ENDPOINT_MS", "500"))
+# Drop the service connection every N seconds of audio (0 never) and take this long to reconnect
+FAKE_SPEECH_RECONNECT_EVERY_S = float(os.getenv("FAKE_SPEECH_RECONNECT_EVERY_S", "0"))
+FAKE_SPEECH_RECONNECT_MS = float(os.getenv("FAKE_SPEECH_RECONNECT_MS", "300"))
+
+DEFAULT_SCRIPT = [
+    "hello everyone and welcome to the live translation demo",
+    "today we are going to look at how captions are produced in real time",
+    "every sentence is recognized translated and shown on screen",
+    "thank you for listening and please ask questions at the end",
+]
+
+# Interval of the clock that drives a recognizer reading from the microphone
+MICROPHONE_TICK_SECONDS = 0.1
+
+
+def load_speech_sdk():
+    """Return the module to use as speechsdk: the Azure Speech SDK, or this fake"""
+    if SPEECH_BACKEND == "fake":
+        return sys.modules[__name__]
+    import azure.cognitiveservices.speech as speechsdk
+    return speechsdk
+
+
+def load_script():
+    """Utterances the fake recognizer will 'hear', in order"""
+    if FAKE_SPEECH_SCRIPT:
+        with open(FAKE_SPEECH_SCRIPT, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        if lines:
+            return lines
+    return DEFAULT_SCRIPT
+
+
+class ResultReason(enum.Enum):
+    NoMatch = 0
+    Canceled = 1
+    RecognizingSpeech = 2
+    RecognizedSpeech = 3
+    TranslatingSpeech = 6
+    TranslatedSpeech = 7
+
+
+class CancellationReason(enum.Enum):
+    Error = 1
+    EndOfStream = 2
+
+
+class _PropertyIds:
+    """Any PropertyId.<name> is accepted and stored by name"""
+    def __getattr__(self, name):
+        return name
+
+
+PropertyId = _PropertyIds()
+
+
+class EventSignal:
+    def __init__(self):
+        """Minimal stand-in for the SDK's EventSignal"""
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+    def disconnect_all(self):
+        self.callbacks = []
+
+    def signal(self, evt):
+        for callback in list(self.callbacks):
+            try:
+                callback(evt)
+            except Exception as e:
+                print(f"Error in fake speech callback: {e}")
+
+
+class SpeechRecognitionResult:
+    def __init__(self, reason, text="", offset=0, duration=0, translations=None):
+        self.reason = reason
+        self.text = text
+        # Offsets and durations are in 100 ns ticks, as in the SDK
+        self.offset = offset
+        self.duration = duration
+        self.translations = translations or {}
+        self.properties = {}
+
+
+def with_json(result):
+    """Attach the service's JSON response, as the SDK exposes it in result.properties"""
+    result.properties[PropertyId.SpeechServiceResponse_JsonResult] = json.dumps({
+        'RecognitionStatus': "Success",
+        'Offset': result.offset,
+        'Duration': result.duration,
+        'DisplayText': result.text
+    })
+    return result
+
+
+class RecognitionEventArgs:
+    def __init__(self, result=None, reason=None, error_details=""):
+        self.result = result
+        self.reason = reason
+        self.error_details = error_details
+
+
+class SpeechConfig:
+    def __init__(self, subscription=None, region=None, endpoint=None):
+        self.subscription = subscription
+        self.region = region
+        self.speech_recognition_language = "en-US"
+        self.properties = {}
+
+    def set_property(self, property_id, value):
+        self.properties[property_id] = value
+
+    def enable_audio_logging(self):
+        pass
+
+    def enable_dictation(self):
+        pass
+
+
+class SpeechTranslationConfig(SpeechConfig):
+    def __init__(self, subscription=None, region=None, endpoint=None):
+        super().__init__(subscription=subscription, region=region, endpoint=endpoint)
+        self.target_languages = []
+
+    def add_target_language(self, language):
+        self.target_languages.append(language)
+
+
+class AudioStreamFormat:
+    def __init__(self, samples_per_second=16000, bits_per_sample=16, channels=1):
+        self.bytes_per_second = samples_per_second * bits_per_sample // 8 * channels
+
+
+class PushAudioInputStream:
+    def __init__(self, stream_format=None):
+        """Counts the audio written so the recognizer can time its script against it"""
+        self.bytes_per_second = (stream_format or AudioStreamFormat()).bytes_per_second
+        self.condition = threading.Condition()
+        self.bytes_written = 0
+        self.closed = False
+
+    def write(self, audio_buffer):
+        with self.condition:
+            self.bytes_written += len(audio_buffer)
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def audio_seconds(self):
+        return self.bytes_written / self.bytes_per_second
+
+
+class AudioConfig:
+    def __init__(self, use_default_microphone=False, filename=None, stream=None, device_name=None):
+        # With no stream the fake "microphone" produces audio in real time
+        self.stream = stream
+
+
+audio = SimpleNamespace(
+    AudioStreamFormat=AudioStreamFormat,
+    PushAudioInputStream=PushAudioInputStream,
+    AudioConfig=AudioConfig
+)
+
+
+class ScriptTimeline:
+    def __init__(self, script, words_per_second=FAKE_SPEECH_WORDS_PER_SECOND, pause_ms=FAKE_SPEECH_PAUSE_MS,
+                 endpoint_ms=FAKE_SPEECH_ENDPOINT_MS):
+        """Maps audio time onto the scripted utterances: words at a fixed rate, then a pause"""
+        self.utterances = [line.split() for line in script]
+        self.word_seconds = 1 / words_per_second
+        self.pause_seconds = pause_ms / 1000
+        self.endpoint_seconds = min(endpoint_ms, pause_ms) / 1000
+        self.index = 0
+        self.start = 0.0
+
+    def current(self):
+        return self.utterances[self.index % len(self.utterances)]
+
+    def spoken_seconds(self):
+        return len(self.current()) * self.word_seconds
+
+    def words_heard(self, audio_seconds):
+        """Words of the current utterance spoken by audio_seconds"""
+        elapsed = audio_seconds - self.start
+        return max(0, min(len(self.current()), int(elapsed / self.word_seconds)))
+
+    def ended(self, audio_seconds):
+        """Whether enough silence after the current utterance has been heard to finalize it"""
+        return audio_seconds - self.start >= self.spoken_seconds() + self.endpoint_seconds
+
+    def advance(self):
+        self.start += self.spoken_seconds() + self.pause_seconds
+        self.index += 1
+
+
+class SpeechRecognizer:
+    def __init__(self, speech_config=None, audio_config=None, language=None):
+        """Scripted recognizer with the SDK's event surface
+
+        Interim results grow word by word as audio arrives (or as wall-clock time
+        passes when reading from the 'microphone'); a final result follows each
+        utterance once its trailing pause has been heard.
+        """
+        self.speech_config = speech_config or SpeechConfig()
+        self.stream = audio_config.stream if audio_config else None
+        self.timeline = ScriptTimeline(load_script())
+
+        self.recognizing = EventSignal()
+        self.recognized = EventSignal()
+        self.canceled = EventSignal()
+        self.session_started = EventSignal()
+        self.session_stopped = EventSignal()
+        self.speech_start_detected = EventSignal()
+        self.speech_end_detected = EventSignal()
+
+        self.running = False
+        self.thread = None
+        self.started_at = None
+        self.words_sent = 0
+        self.connection = None
+        self.next_drop_at = FAKE_SPEECH_RECONNECT_EVERY_S
+
+    def audio_seconds(self):
+        if self.stream is not None:
+            return self.stream.audio_seconds()
+        return time.monotonic() - self.started_at
+
+    def start_continuous_recognition(self):
+        Connection.from_recognizer(self).open(True)
+        self.running = True
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def start_continuous_recognition_async(self):
+        self.start_continuous_recognition()
+        return _Done(None)
+
+    def stop_continuous_recognition(self):
+        self.running = False
+        if self.stream is not None:
+            with self.stream.condition:
+                self.stream.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        if self.connection is not None:
+            self.connection.close()
+        self.session_stopped.signal(RecognitionEventArgs())
+
+    def stop_continuous_recognition_async(self):
+        self.stop_continuous_recognition()
+        return _Done(None)
+
+    def _wait_for_audio(self):
+        """Block until more audio arrives (or one clock tick passes); False at end of stream"""
+        if self.stream is None:
+            time.sleep(MICROPHONE_TICK_SECONDS)
+            return True
+        with self.stream.condition:
+            seen = self.stream.bytes_written
+            while self.running and not self.stream.closed and self.stream.bytes_written == seen:
+                self.stream.condition.wait(MICROPHONE_TICK_SECONDS)
+            return not self.stream.closed
+
+    def _run(self):
+        self.session_started.signal(RecognitionEventArgs())
+        while self.running:
+            more = self._wait_for_audio()
+            self._simulate_reconnect()
+            self._advance(self.audio_seconds())
+            if not more:
+                self._finish_utterance()
+                self.canceled.signal(RecognitionEventArgs(reason=CancellationReason.EndOfStream))
+                break
+
+    def _advance(self, audio_seconds):
+        """Emit the interim and final results that audio_seconds of audio has produced"""
+        while self.running:
+            heard = self.timeline.words_heard(audio_seconds)
+            if heard > self.words_sent:
+                self.words_sent = heard
+                self._emit_interim(" ".join(self.timeline.current()[:heard]))
+            if not self.timeline.ended(audio_seconds):
+                return
+            self._finish_utterance()
+
+    def _simulate_reconnect(self):
+        """Drop and re-open the connection on the FAKE_SPEECH_RECONNECT_EVERY_S schedule"""
+        if not FAKE_SPEECH_RECONNECT_EVERY_S or self.audio_seconds() < self.next_drop_at:
+            return
+        self.next_drop_at += FAKE_SPEECH_RECONNECT_EVERY_S
+        self.connection.close()
+        time.sleep(FAKE_SPEECH_RECONNECT_MS / 1000)
+        self.connection.open(True)
+
+    def _finish_utterance(self):
+        if self.words_sent:
+            self._emit_final(" ".join(self.timeline.current()[:self.words_sent]))
+        self.words_sent = 0
+        self.timeline.advance()
+
+    def _ticks(self):
+        return int(self.timeline.start * 10_000_000), int(self.timeline.spoken_seconds() * 10_000_000)
+
+    def _emit_interim(self, text):
+        offset, _ = self._ticks()
+        duration = int(self.words_sent * self.timeline.word_seconds * 10_000_000)
+        self.recognizing.signal(RecognitionEventArgs(
+            SpeechRecognitionResult(ResultReason.RecognizingSpeech, text, offset, duration)))
+
+    def _emit_final(self, text):
+        offset, duration = self._ticks()
+        self.recognized.signal(RecognitionEventArgs(
+            with_json(SpeechRecognitionResult(ResultReason.RecognizedSpeech, text, offset, duration))))
+
+    def recognize_once(self):
+        """Recognize everything spoken in the stream once it is closed"""
+        words = []
+        if self.stream is not None:
+            with self.stream.condition:
+                while not self.stream.closed:
+                    self.stream.condition.wait()
+            audio_seconds = self.stream.audio_seconds()
+            while True:
+                words += self.timeline.current()[:self.timeline.words_heard(audio_seconds)]
+                if not self.timeline.ended(audio_seconds):
+                    break
+                self.timeline.advance()
+        if not words:
+            return SpeechRecognitionResult(ResultReason.NoMatch)
+        return self._final_result(" ".join(words))
+
+    def _final_result(self, text):
+        return SpeechRecognitionResult(ResultReason.RecognizedSpeech, text)
+
+    def recognize_once_async(self):
+        return _Pending(self.recognize_once)
+
+
+class TranslationRecognizer(SpeechRecognizer):
+    def __init__(self, translation_config=None, audio_config=None):
+        """Scripted speech translation: results carry a fake translation per target"""
+        super().__init__(speech_config=translation_config, audio_config=audio_config)
+        self.target_languages = list(getattr(translation_config, 'target_languages', []))
+
+    def _translations(self, text):
+        return {to_lang: f"[{to_lang}] {text}" for to_lang in self.target_languages}
+
+    def _emit_interim(self, text):
+        offset, _ = self._ticks()
+        self.recognizing.signal(RecognitionEventArgs(
+            SpeechRecognitionResult(ResultReason.TranslatingSpeech, text, offset, 0, self._translations(text))))
+
+    def _emit_final(self, text):
+        offset, duration = self._ticks()
+        self.recognized.signal(RecognitionEventArgs(with_json(
+            SpeechRecognitionResult(ResultReason.TranslatedSpeech, text, offset, duration, self._translations(text)))))
+
+    def _final_result(self, text):
+        return SpeechRecognitionResult(ResultReason.TranslatedSpeech, text, translations=self._translations(text))
+
+
+translation = SimpleNamespace(
+    SpeechTranslationConfig=SpeechTranslationConfig,
+    TranslationRecognizer=TranslationRecognizer
+)
+
+
+class Connection:
+    def __init__(self, recognizer):
+        """Pre-connecting a fake recognizer is instant"""
+        self.recognizer = recognizer
+        self.connected = EventSignal()
+        self.disconnected = EventSignal()
+        self.is_open = False
+
+    @classmethod
+    def from_recognizer(cls, recognizer):
+        """One connection per recognizer, so every subscriber sees its events"""
+        if recognizer.connection is None:
+            recognizer.connection = cls(recognizer)
+        return recognizer.connection
+
+    def open(self, for_continuous_recognition):
+        if not self.is_open:
+            self.is_open = True
+            self.connected.signal(RecognitionEventArgs())
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.disconnected.signal(RecognitionEventArgs())
+
+
+class _Done:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class _Pending:
+    def __init__(self, work):
+        """Runs work on a thread; get() waits for its result, like the SDK's ResultFuture"""
+        self.result = None
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+
+    def _run(self, work):
+        self.result = work()
+
+    def get(self):
+        self.thread.join()
+        return self.result
@@ -0,0 +1,174 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Offline stand-in for the Azure Translator v3 /translate endpoint. Point the apps at it with
+# TRANSLATOR_ENDPOINT=http://127.0.0.1:5099/translate
+FAKE_TRANSLATOR_HOST = os.getenv("FAKE_TRANSLATOR_HOST", "127.0.0.1")
+FAKE_TRANSLATOR_PORT = int(os.getenv("FAKE_TRANSLATOR_PORT", "5099"))
+
+# Latency distribution: fixed, uniform, normal or lognormal
+FAKE_TRANSLATOR_LATENCY = os.getenv("FAKE_TRANSLATOR_LATENCY", "lognormal")
+# Median latency, and the spread (half-width for uniform, stddev for normal, sigma for lognormal)
+FAKE_TRANSLATOR_LATENCY_MS = float(os.getenv("FAKE_TRANSLATOR_LATENCY_MS", "80"))
+FAKE_TRANSLATOR_JITTER = float(os.getenv("FAKE_TRANSLATOR_JITTER", "0.5"))
+# Extra latency per character translated, like the real service on long batches
+FAKE_TRANSLATOR_MS_PER_CHAR = float(os.getenv("FAKE_TRANSLATOR_MS_PER_CHAR", "0.02"))
+
+# Fraction of requests answered with 500 and with 429 Too Many Requests
+FAKE_TRANSLATOR_ERROR_RATE = float(os.getenv("FAKE_TRANSLATOR_ERROR_RATE", "0"))
+FAKE_TRANSLATOR_THROTTLE_RATE = float(os.getenv("FAKE_TRANSLATOR_THROTTLE_RATE", "0"))
+
+MAX_ELEMENTS = 100
+MAX_CHARS = 50000
+
+
+def sample_latency_ms(chars):
+    """Draw one response latency from the configured distribution"""
+    median = FAKE_TRANSLATOR_LATENCY_MS
+    jitter = FAKE_TRANSLATOR_JITTER
+    if FAKE_TRANSLATOR_LATENCY == "fixed":
+        latency = median
+    elif FAKE_TRANSLATOR_LATENCY == "uniform":
+        latency = random.uniform(median - jitter, median + jitter)
+    elif FAKE_TRANSLATOR_LATENCY == "normal":
+        latency = random.gauss(median, jitter)
+    else:
+        # Long right tail, like real network latency
+        latency = random.lognormvariate(0, jitter) * median
+    return max(0.0, latency) + chars * FAKE_TRANSLATOR_MS_PER_CHAR
+
+
+def fake_translation(text, to_lang):
+    """Deterministic stand-in translation, recognizable in captions"""
+    return f"[{to_lang}] {text}"
+
+
+class FakeTranslatorStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.elements = 0
+        self.chars = 0
+        self.throttled = 0
+        self.errors = 0
+        self.bad_requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def add(self, counter, amount=1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+            if counter == 'in_flight':
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def snapshot(self):
+        with self.lock:
+            return {name: value for name, value in vars(self).items() if name != 'lock'}
+
+
+stats = FakeTranslatorStats()
+
+
+class FakeTranslatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        """Translate like Translator v3: one result per body element, one translation per 'to'"""
+        url = urlparse(self.path)
+        if not url.path.endswith("/translate"):
+            return self.send_json(404, {'error': {'code': 404000, 'message': "Not found"}})
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        stats.add('requests')
+        stats.add('in_flight')
+        try:
+            query = parse_qs(url.query)
+            to_langs = query.get('to', [])
+            try:
+                elements = json.loads(body)
+            except ValueError:
+                elements = None
+            if not to_langs or not isinstance(elements, list) or not elements:
+                stats.add('bad_requests')
+                return self.send_json(400, {'error': {'code': 400000, 'message': "One of the request inputs is not valid."}})
+            chars = sum(len(element.get('text', '')) for element in elements) * len(to_langs)
+            if len(elements) > MAX_ELEMENTS or chars > MAX_CHARS:
+                stats.add('bad_requests')
+                return self.send_json(400, {'error': {'code': 400077, 'message': "The maximum request size has been exceeded."}})
+
+            roll = random.random()
+            if roll < FAKE_TRANSLATOR_THROTTLE_RATE:
+                stats.add('throttled')
+                return self.send_json(429, {'error': {'code': 429001, 'message': "The server rejected the request because the client has exceeded request limits."}},
+                                      headers={'Retry-After': '1'})
+
+            time.sleep(sample_latency_ms(chars) / 1000)
+            if roll < FAKE_TRANSLATOR_THROTTLE_RATE + FAKE_TRANSLATOR_ERROR_RATE:
+                stats.add('errors')
+                return self.send_json(500, {'error': {'code': 500000, 'message': "An unexpected error occurred."}})
+
+            stats.add('elements', len(elements))
+            stats.add('chars', chars)
+            self.send_json(200, [
+                {'translations': [{'text': fake_translation(element.get('text', ''), to_lang), 'to': to_lang}
+                                  for to_lang in to_langs]}
+                for element in elements
+            ])
+        finally:
+            stats.add('in_flight', -1)
+
+    def do_GET(self):
+        """Request counters, so load tests can check what the server saw"""
+        if urlparse(self.path).path == "/stats":
+            return self.send_json(200, stats.snapshot())
+        self.send_json(404, {'error': {'code': 404000, 'message': "Not found"}})
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-RequestId', str(stats.requests))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # One line per request would drown a load test
+        pass
+
+
+class FakeTranslatorServer(ThreadingHTTPServer):
+    # The stdlib default backlog of 5 resets connections when many requests arrive at once
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def start_server(host=FAKE_TRANSLATOR_HOST, port=FAKE_TRANSLATOR_PORT):
+    """Start the fake server on a background thread and return it (port 0 picks a free port)"""
+    server = FakeTranslatorServer((host, port), FakeTranslatorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = FakeTranslatorServer((FAKE_TRANSLATOR_HOST, FAKE_TRANSLATOR_PORT), FakeTranslatorHandler)
+    print(f"Fake Translator listening on http://{FAKE_TRANSLATOR_HOST}:{FAKE_TRANSLATOR_PORT}/translate "
+          f"({FAKE_TRANSLATOR_LATENCY} latency, median {FAKE_TRANSLATOR_LATENCY_MS:.0f} ms, "
+          f"{FAKE_TRANSLATOR_ERROR_RATE:.1%} errors, {FAKE_TRANSLATOR_THROTTLE_RATE:.1%} throttled)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping fake Translator")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+# Upper bound on interim_update events per second per session
+INTERIM_MAX_PER_SECOND = float(os.getenv("INTERIM_MAX_PER_SECOND", "5"))
+
+
+def common_prefix_length(a, b):
+    """Number of leading characters two strings share"""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def utf16_length(text):
+    """Length of text in UTF-16 code units, the unit of JavaScript string indices"""
+    return len(text) + sum(1 for c in text if ord(c) > 0xFFFF)
+
+
+class InterimThrottle:
+    def __init__(self, send, max_per_second=INTERIM_MAX_PER_SECOND, delta=False):
+        """Rate-limit interim hypotheses and optionally delta-encode them
+
+        send(payload) receives {'transcription': text}, or with delta=True
+        {'prefix_len': n, 'suffix': suffix} relative to the last payload sent,
+        where n counts UTF-16 code units so the browser can slice() with it.
+        Hypotheses arriving faster than max_per_second are coalesced: the newest
+        one is sent when the interval has elapsed, by a timer if no later
+        hypothesis arrives, and the final result supersedes anything still unsent.
+        """
+        self.send = send
+        self.interval = 1 / max_per_second if max_per_second > 0 else 0
+        self.delta = delta
+
+        self.lock = threading.Lock()
+        self.last_sent_text = ""
+        self.last_sent_at = 0.0
+        # Newest hypothesis held back by the rate limit, and the timer that will send it
+        self.pending_text = None
+        self.timer = None
+
+        self.sent = 0
+        self.suppressed = 0
+        self.chars_sent = 0
+        self.chars_full = 0
+
+    def update(self, text):
+        """Offer a new interim hypothesis"""
+        with self.lock:
+            if text == self.last_sent_text:
+                self.pending_text = None
+                self.suppressed += 1
+                return
+            wait = self.interval - (time.monotonic() - self.last_sent_at)
+            if wait > 0:
+                if self.pending_text is not None:
+                    # Replaced before it was sent
+                    self.suppressed += 1
+                self.pending_text = text
+                if self.timer is None:
+                    self._schedule(wait)
+                return
+            self.pending_text = None
+            self._send(text)
+
+    def _schedule(self, wait):
+        self.timer = threading.Timer(wait, self._flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _flush(self):
+        """Timer: send the held-back hypothesis once the interval has elapsed"""
+        with self.lock:
+            self.timer = None
+            if self.pending_text is None:
+                return
+            wait = self.interval - (time.monotonic() - self.last_sent_at)
+            if wait > 0:
+                self._schedule(wait)
+                return
+            text, self.pending_text = self.pending_text, None
+            self._send(text)
+
+    def _send(self, text):
+        """Build and send the payload for text; called with the lock held"""
+        if self.delta:
+            prefix_len = common_prefix_length(self.last_sent_text, text)
+            payload = {'prefix_len': utf16_length(text[:prefix_len]), 'suffix': text[prefix_len:]}
+            self.chars_sent += len(text) - prefix_len
+        else:
+            payload = {'transcription': text}
+            self.chars_sent += len(text)
+        self.chars_full += len(text)
+
+        self.last_sent_text = text
+        self.last_sent_at = time.monotonic()
+        self.sent += 1
+        # Sent under the lock so deltas always reach the client in order
+        self.send(payload)
+
+    def reset(self):
+        """Start a new utterance; the next delta is relative to empty text"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.pending_text = None
+            self.last_sent_text = ""
+            self.last_sent_at = 0.0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'delta': self.delta,
+                'sent': self.sent,
+                'suppressed': self.suppressed,
+                'chars_sent': self.chars_sent,
+                'chars_full': self.chars_full
+            }
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from translation_pool import get_worker_pool
+
+# Speculative interim translation is opt-in per session; this sets the default
+SPECULATIVE_INTERIM = os.getenv("SPECULATIVE_INTERIM", "0") == "1"
+# Hypotheses that must agree on a prefix before it counts as stable
+SPECULATIVE_AGREEMENT = int(os.getenv("SPECULATIVE_AGREEMENT", "3"))
+# Minimum time between two speculative requests of one session
+SPECULATIVE_MIN_INTERVAL_MS = float(os.getenv("SPECULATIVE_MIN_INTERVAL_MS", "600"))
+# Minimum number of newly stable words worth a new request
+SPECULATIVE_MIN_NEW_WORDS = int(os.getenv("SPECULATIVE_MIN_NEW_WORDS", "2"))
+
+
+def common_prefix(word_lists):
+    """Longest run of leading words shared by every list"""
+    prefix = []
+    for words in zip(*word_lists):
+        if any(word != words[0] for word in words[1:]):
+            break
+        prefix.append(words[0])
+    return prefix
+
+
+class SpeculativeTranslator:
+    def __init__(self, translate, emit, agreement=SPECULATIVE_AGREEMENT,
+                 min_interval_ms=SPECULATIVE_MIN_INTERVAL_MS, min_new_words=SPECULATIVE_MIN_NEW_WORDS,
+                 pool=None):
+        """Translate the stable prefix of successive interim hypotheses
+
+        translate(text) runs on the worker pool; emit(source_text, result) is
+        called only if no newer request or final result has superseded it.
+        """
+        self.translate = translate
+        self.emit = emit
+        self.agreement = max(2, agreement)
+        self.min_interval = min_interval_ms / 1000
+        self.min_new_words = min_new_words
+        self.pool = pool or get_worker_pool()
+
+        self.lock = threading.Lock()
+        self.history = []
+        self.sent_words = 0
+        self.last_sent_at = 0.0
+        self.generation = 0
+        self.request_seq = 0
+        self.in_flight = None
+
+        self.requests = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.cancelled = 0
+
+    def update(self, text):
+        """Feed one interim hypothesis; may start a speculative translation"""
+        with self.lock:
+            self.history.append(text.split())
+            del self.history[:-self.agreement]
+            if len(self.history) < self.agreement:
+                return
+
+            # Only the words every recent hypothesis agrees on are translated
+            prefix = common_prefix(self.history)
+            if len(prefix) < self.sent_words + self.min_new_words:
+                return
+            now = time.monotonic()
+            if now - self.last_sent_at < self.min_interval:
+                return
+
+            # A newer prefix supersedes whatever is still waiting for a worker
+            if self.in_flight is not None and self.in_flight.cancel():
+                self.cancelled += 1
+
+            self.sent_words = len(prefix)
+            self.last_sent_at = now
+            self.request_seq += 1
+            self.requests += 1
+            source_text = " ".join(prefix)
+            future = self.pool.submit(self.translate, source_text)
+            if future is None:
+                return
+            self.in_flight = future
+            generation, seq = self.generation, self.request_seq
+        future.add_done_callback(lambda f: self._finish(f, generation, seq, source_text))
+
+    def _finish(self, future, generation, seq, source_text):
+        """Emit a finished translation unless something newer superseded it"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"Speculative translation error: {error}")
+        # Emitting under the lock guarantees nothing is sent after reset()
+        with self.lock:
+            if generation != self.generation or seq != self.request_seq:
+                self.dropped += 1
+                return
+            self.in_flight = None
+            if error is None:
+                self.emitted += 1
+                self.emit(source_text, future.result())
+
+    def reset(self):
+        """Forget the current utterance; in-flight results for it are dropped"""
+        with self.lock:
+            self.generation += 1
+            self.history = []
+            self.sent_words = 0
+            if self.in_flight is not None and self.in_flight.cancel():
+                self.cancelled += 1
+            self.in_flight = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'emitted': self.emitted,
+                'dropped_stale': self.dropped,
+                'cancelled': self.cancelled
+            }
@@ -0,0 +1,302 @@
+import bisect
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Prometheus text exposition format, served on /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Port of the standalone metrics server for apps without a web server; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Interface it listens on; the endpoint has no authentication, so only localhost by default
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Latency buckets in seconds, from a cached translation to a long utterance
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def escape(value):
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), collect=None):
+        """A metric family; one series per combination of label values
+
+        collect, if given, is called at scrape time instead of reading recorded
+        values. It returns a number, or a dict of label value tuples to numbers.
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self):
+        """(name suffix, label values, extra labels, value) for every series"""
+        if self.collect:
+            collected = self.collect()
+            items = collected.items() if isinstance(collected, dict) else [((), collected)]
+            return [("", key if isinstance(key, tuple) else (key,), (), value) for key, value in items]
+        with self.lock:
+            return [("", key, (), value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labels, key, extra)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # Per-bucket counts (not cumulative), sum, count
+                series = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (("le", format_value(bound)),), cumulative))
+                samples.append(("_bucket", key, (("le", "+Inf"),), count))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Named metric families rendered together on /metrics"""
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def get_or_create(self, cls, name, help, labels=(), **kwargs):
+        """Return the metric registered under name, creating it on first use
+
+        A collect function passed for an existing metric replaces the old one, so
+        the app that owns the data can attach it after a shared module declared it.
+        """
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            elif kwargs.get('collect'):
+                metric.collect = kwargs['collect']
+            return metric
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines += metric.render()
+            except Exception as e:
+                # One failing collect function must not break the whole scrape
+                print(f"Error collecting metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, help, labels=(), collect=None):
+    return REGISTRY.get_or_create(Counter, name, help, labels, collect=collect)
+
+
+def gauge(name, help, labels=(), collect=None):
+    return REGISTRY.get_or_create(Gauge, name, help, labels, collect=collect)
+
+
+def histogram(name, help, labels=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the app's own output
+        pass
+
+
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on a background thread; returns the server, or None if disabled or unavailable"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        # Another instance or exporter holds the port; the app runs on without metrics
+        print(f"Warning: metrics server not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Pipeline stages of one utterance, in order
+UTTERANCE_STAGES = ('first_audio', 'first_recognizing', 'recognized', 'translation_sent',
+                    'translation_received', 'emitted')
+# Utterances recognized but not yet emitted, per session, before the oldest is forgotten
+TIMELINE_MAX_OPEN = 256
+
+UTTERANCE_STAGE_SECONDS = histogram(
+    "babelingo_utterance_stage_seconds",
+    "Time from one pipeline stage of an utterance to the next; first_audio is the first audio "
+    "received after the previous final result",
+    ("engine", "stage")
+)
+UTTERANCE_SECONDS = histogram(
+    "babelingo_utterance_seconds",
+    "Time from the first stamped stage of an utterance to its emit",
+    ("engine",)
+)
+UTTERANCES_TOTAL = counter("babelingo_utterances_total", "Utterances emitted with their translation", ("engine",))
+CAPTION_LATENCY_SECONDS = histogram(
+    "babelingo_caption_latency_seconds",
+    "End of speech (last interim result) to the translated caption",
+    ("engine",)
+)
+
+
+class UtteranceTimeline:
+    def __init__(self, engine):
+        """Per-session timestamps of every utterance at each pipeline stage
+
+        Stages before the final result belong to the utterance being spoken;
+        recognized(utterance_id) gives them an id. Stages that an engine skips
+        (speech translation sends no Translator request) are simply absent, and
+        the gap is measured from the previous stage that was stamped.
+        """
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.current = {}
+        self.utterances = {}
+        self.last_utterance = None
+
+    def stamp_current(self, stage):
+        """Stamp the utterance being spoken, once per stage"""
+        if stage in self.current:
+            return
+        with self.lock:
+            self.current.setdefault(stage, time.monotonic())
+
+    def audio_received(self):
+        self.stamp_current('first_audio')
+
+    def recognizing(self):
+        self.stamp_current('first_recognizing')
+
+    def recognized(self, utterance_id):
+        """The final result arrived; later stages are stamped by utterance id"""
+        with self.lock:
+            stamps = self.current
+            self.current = {}
+            stamps['recognized'] = time.monotonic()
+            self.utterances[utterance_id] = stamps
+            if len(self.utterances) > TIMELINE_MAX_OPEN:
+                del self.utterances[next(iter(self.utterances))]
+
+    def stamp(self, utterance_id, stage):
+        with self.lock:
+            stamps = self.utterances.get(utterance_id)
+            if stamps is not None:
+                stamps.setdefault(stage, time.monotonic())
+
+    def emitted(self, utterance_id):
+        """Stamp the emit and record the time spent between every pair of stages"""
+        with self.lock:
+            stamps = self.utterances.pop(utterance_id, None)
+        if stamps is None:
+            return
+        stamps['emitted'] = time.monotonic()
+
+        previous = None
+        for stage in UTTERANCE_STAGES:
+            if stage not in stamps:
+                continue
+            if previous is not None:
+                UTTERANCE_STAGE_SECONDS.observe(stamps[stage] - stamps[previous], engine=self.engine,
+                                                stage=f"{previous}_to_{stage}")
+            previous = stage
+        first = min(stamps.values())
+        UTTERANCE_SECONDS.observe(stamps['emitted'] - first, engine=self.engine)
+        UTTERANCES_TOTAL.inc(engine=self.engine)
+        self.last_utterance = {stage: (stamps[stage] - first) * 1000 for stage in UTTERANCE_STAGES if stage in stamps}
+
+    def stats(self):
+        """Stage offsets in ms of the most recently emitted utterance"""
+        return {'last_utterance_ms': self.last_utterance, 'open_utterances': len(self.utterances)}
@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from fake_speech import load_speech_sdk
+
+speechsdk = load_speech_sdk()
+
+# Pre-connected recognizers kept ready per language; 0 disables the pool
+RECOGNIZER_POOL_SIZE = int(os.getenv("RECOGNIZER_POOL_SIZE", "2"))
+# Warm recognizers older than this are discarded; the service drops idle connections
+RECOGNIZER_POOL_MAX_IDLE_S = float(os.getenv("RECOGNIZER_POOL_MAX_IDLE_S", "120"))
+# Languages warmed at startup; other languages are kept warm once first requested
+RECOGNIZER_POOL_LANGUAGES = [lang.strip() for lang in os.getenv("RECOGNIZER_POOL_LANGUAGES", "en-US").split(",") if lang.strip()]
+# Requested (non-startup) keys kept warm at once, most recently used first
+RECOGNIZER_POOL_MAX_KEYS = int(os.getenv("RECOGNIZER_POOL_MAX_KEYS", "8"))
+# Requested keys with no session for this long stop being kept warm
+RECOGNIZER_POOL_KEY_IDLE_S = float(os.getenv("RECOGNIZER_POOL_KEY_IDLE_S", "600"))
+# How often the refill thread checks for expired or missing recognizers
+RECOGNIZER_POOL_REFILL_INTERVAL = 5
+
+
+class WarmRecognizer:
+    def __init__(self, speech_config, push_stream, audio_config, recognizer):
+        """A recognizer with its push stream and, once warmed, an open service connection"""
+        self.speech_config = speech_config
+        self.push_stream = push_stream
+        self.audio_config = audio_config
+        self.recognizer = recognizer
+        self.connection = None
+        self.created_at = time.monotonic()
+        self.warm = False
+
+    def open(self):
+        """Open the service connection ahead of start_continuous_recognition"""
+        self.connection = speechsdk.Connection.from_recognizer(self.recognizer)
+        self.connection.open(True)
+        self.warm = True
+
+    def age(self):
+        return time.monotonic() - self.created_at
+
+    def close(self):
+        """Release a recognizer that will never be used"""
+        try:
+            if self.connection is not None:
+                self.connection.close()
+            self.push_stream.close()
+        except Exception as e:
+            print(f"Error closing warm recognizer: {e}")
+
+
+class RecognizerPool:
+    def __init__(self, build, size=RECOGNIZER_POOL_SIZE, max_idle_s=RECOGNIZER_POOL_MAX_IDLE_S,
+                 keys=RECOGNIZER_POOL_LANGUAGES, max_keys=RECOGNIZER_POOL_MAX_KEYS,
+                 key_idle_s=RECOGNIZER_POOL_KEY_IDLE_S):
+        """Per-key pool of pre-connected recognizers
+
+        build(key) returns a new WarmRecognizer (not yet opened); the key is
+        usually the recognition language. A background thread keeps size opened
+        recognizers per key and replaces any older than max_idle_s. acquire()
+        never waits: on a miss it builds a cold recognizer on the caller's thread.
+        The startup keys are always kept warm; of the other keys requested, only
+        the max_keys most recently used are, and a key not requested for
+        key_idle_s is dropped and its recognizers closed.
+        """
+        self.build = build
+        self.size = size
+        self.max_idle_s = max_idle_s
+        self.max_keys = max_keys
+        self.key_idle_s = key_idle_s
+        self.pinned = set(keys)
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.available = OrderedDict((key, []) for key in keys)
+        self.last_requested = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.keys_dropped = 0
+        self.build_errors = 0
+        self.first_interim_ms = {'warm': [], 'cold': []}
+
+        if self.size > 0:
+            threading.Thread(target=self._refill_loop, daemon=True).start()
+
+    def acquire(self, key):
+        """Return a recognizer for key, pre-connected if one is available"""
+        warm = None
+        dropped = []
+        with self.lock:
+            ready = self.available.setdefault(key, [])
+            self.available.move_to_end(key)
+            self.last_requested[key] = time.monotonic()
+            dropped = self._drop_keys_locked()
+            while ready:
+                candidate = ready.pop(0)
+                if candidate.age() <= self.max_idle_s:
+                    warm = candidate
+                    break
+                self.expired += 1
+                candidate.close()
+            if warm is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        for candidate in dropped:
+            candidate.close()
+        # Top the pool back up for this key
+        self.wakeup.set()
+        return warm if warm is not None else self.build(key)
+
+    def _drop_keys_locked(self):
+        """Stop keeping idle and least recently used keys warm; returns their recognizers"""
+        now = time.monotonic()
+        # available is ordered least recently requested first
+        requested = [key for key in self.available if key not in self.pinned]
+        stale = [key for key in requested if now - self.last_requested[key] > self.key_idle_s]
+        kept = [key for key in requested if key not in stale]
+        if len(kept) > self.max_keys:
+            stale += kept[:len(kept) - self.max_keys]
+        dropped = []
+        for key in stale:
+            dropped.extend(self.available.pop(key))
+            self.last_requested.pop(key, None)
+            self.keys_dropped += 1
+        return dropped
+
+    def record_first_interim(self, warm, elapsed_ms):
+        """Record the time from start to the first interim result of a session"""
+        with self.lock:
+            samples = self.first_interim_ms['warm' if warm else 'cold']
+            samples.append(elapsed_ms)
+            # Keep a bounded window of recent sessions
+            del samples[:-500]
+
+    def _refill_loop(self):
+        """Replace expired recognizers and build missing ones"""
+        while True:
+            self.wakeup.wait(RECOGNIZER_POOL_REFILL_INTERVAL)
+            self.wakeup.clear()
+
+            with self.lock:
+                dropped = self._drop_keys_locked()
+                expired = []
+                for ready in self.available.values():
+                    while ready and ready[0].age() > self.max_idle_s:
+                        expired.append(ready.pop(0))
+                self.expired += len(expired)
+                missing = [(key, self.size - len(ready)) for key, ready in self.available.items()]
+            for warm in dropped + expired:
+                warm.close()
+
+            # Connections are opened outside the lock; acquire() never waits on them
+            for key, count in missing:
+                for _ in range(count):
+                    try:
+                        warm = self.build(key)
+                        warm.open()
+                    except Exception as e:
+                        self.build_errors += 1
+                        print(f"Error pre-connecting recognizer for {key}: {e}")
+                        break
+                    with self.lock:
+                        ready = self.available.get(key)
+                        if ready is not None:
+                            ready.append(warm)
+                    if ready is None:
+                        # The key was dropped while this recognizer was connecting
+                        warm.close()
+                        break
+
+    def stats(self):
+        """Hit rate, pool contents and time-to-first-interim, warm vs cold"""
+        with self.lock:
+            first_interim = {}
+            for kind, samples in self.first_interim_ms.items():
+                first_interim[kind] = {
+                    'sessions': len(samples),
+                    'avg_ms': sum(samples) / len(samples) if samples else None,
+                    'min_ms': min(samples) if samples else None,
+                    'max_ms': max(samples) if samples else None
+                }
+            return {
+                'size': self.size,
+                'max_idle_s': self.max_idle_s,
+                'available': {key: len(ready) for key, ready in self.available.items()},
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'max_keys': self.max_keys,
+                'keys_dropped': self.keys_dropped,
+                'build_errors': self.build_errors,
+                'time_to_first_interim': first_interim
+            }
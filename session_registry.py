@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+# Upper bound on concurrent recognition sessions in one process
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "100"))
+
+
+class SessionUsage:
+    def __init__(self):
+        """Per-session resource counters"""
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.last_activity = self.started_at
+        self.audio_frames = 0
+        self.audio_bytes = 0
+        self.interim_results = 0
+        self.final_results = 0
+        self.translations = 0
+
+    def add(self, counter, amount=1):
+        """Increment one of the counters and mark the session active"""
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+            self.last_activity = time.time()
+
+    def record_audio(self, num_bytes):
+        """Count one incoming audio frame"""
+        with self.lock:
+            self.audio_frames += 1
+            self.audio_bytes += num_bytes
+            self.last_activity = time.time()
+
+    def snapshot(self):
+        """Return the counters as a plain dict"""
+        with self.lock:
+            now = time.time()
+            return {
+                'uptime_s': now - self.started_at,
+                'idle_s': now - self.last_activity,
+                'audio_frames': self.audio_frames,
+                'audio_bytes': self.audio_bytes,
+                'interim_results': self.interim_results,
+                'final_results': self.final_results,
+                'translations': self.translations
+            }
+
+
+class SessionRegistry:
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        """Thread-safe map of session id -> session object"""
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def add(self, session_id, session):
+        """Register a session; returns False when the registry is full
+
+        An existing session under the same id must be removed first.
+        """
+        with self.lock:
+            if session_id not in self.sessions and len(self.sessions) >= self.max_sessions:
+                return False
+            self.sessions[session_id] = session
+            return True
+
+    def get(self, session_id):
+        """Return the session for an id, or None"""
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def pop(self, session_id):
+        """Remove and return the session for an id, or None"""
+        with self.lock:
+            return self.sessions.pop(session_id, None)
+
+    def items(self):
+        """Return a snapshot list of (session_id, session) pairs"""
+        with self.lock:
+            return list(self.sessions.items())
+
+    def __len__(self):
+        with self.lock:
+            return len(self.sessions)
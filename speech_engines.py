@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import time
+from fake_speech import load_speech_sdk
+from metrics import counter, histogram
+
+speechsdk = load_speech_sdk()
+
+# "two_hop": SpeechRecognizer, then a Translator request per final result
+# "speech_translation": TranslationRecognizer, which returns translations in the same stream
+TWO_HOP = "two_hop"
+SPEECH_TRANSLATION = "speech_translation"
+ENGINES = (TWO_HOP, SPEECH_TRANSLATION)
+RECOGNITION_ENGINE = os.getenv("RECOGNITION_ENGINE", TWO_HOP)
+
+# Recent captions kept for the latency percentiles
+CAPTION_LATENCY_WINDOW = 500
+# SDK offsets and durations are in 100 ns ticks
+TICKS_PER_SECOND = 10_000_000
+
+SPEECH_SERVICE_LAG_SECONDS = histogram(
+    "babelingo_speech_service_lag_seconds",
+    "Audio written to the recognizer beyond the end of each final result, when it arrives",
+    ("engine",)
+)
+SPEECH_RECOGNITION_LATENCY_SECONDS = histogram(
+    "babelingo_speech_recognition_latency_seconds",
+    "Recognition latency reported by the Speech SDK for each final result",
+    ("engine",)
+)
+SPEECH_DISCONNECTS_TOTAL = counter("babelingo_speech_disconnects_total",
+                                   "Speech service connections lost while a session was running", ("engine",))
+SPEECH_RECONNECTS_TOTAL = counter("babelingo_speech_reconnects_total",
+                                  "Speech service connections re-established after a disconnect", ("engine",))
+SPEECH_RECONNECTING_SECONDS_TOTAL = counter("babelingo_speech_reconnecting_seconds_total",
+                                            "Time spent between a disconnect and the next connect", ("engine",))
+
+
+def engine_or_default(engine):
+    """Return engine if it is a known engine name, otherwise the configured default"""
+    return engine if engine in ENGINES else RECOGNITION_ENGINE
+
+
+def create_translation_recognizer(subscription_key, region, from_lang, to_langs, audio_config, configure=None):
+    """Build a TranslationRecognizer for from_lang with one target per entry of to_langs
+
+    configure(config), if given, applies extra settings before the recognizer is
+    created. Returns (translation_config, recognizer); translations arrive on the
+    recognizing/recognized events in evt.result.translations, keyed by target.
+    """
+    translation_config = speechsdk.translation.SpeechTranslationConfig(subscription=subscription_key, region=region)
+    translation_config.speech_recognition_language = from_lang
+    for to_lang in to_langs:
+        translation_config.add_target_language(to_lang)
+    if configure:
+        configure(translation_config)
+    recognizer = speechsdk.translation.TranslationRecognizer(
+        translation_config=translation_config,
+        audio_config=audio_config
+    )
+    return translation_config, recognizer
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class CaptionLatency:
+    def __init__(self, window=CAPTION_LATENCY_WINDOW):
+        """End-to-end caption latency: end of speech to translated caption on screen
+
+        The end of an utterance is approximated by its last interim result, which
+        both engines produce at the same point in the audio, so the numbers are
+        comparable between engines.
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.last_heard_at = None
+        self.speech_ended = {}
+        self.samples = []
+        self.count = 0
+
+    def speech_heard(self):
+        """Mark that an interim result just arrived"""
+        self.last_heard_at = time.monotonic()
+
+    def utterance_final(self, utterance_id):
+        """Mark the end of an utterance when its final result arrives"""
+        with self.lock:
+            self.speech_ended[utterance_id] = self.last_heard_at or time.monotonic()
+            self.last_heard_at = None
+
+    def caption_shown(self, utterance_id):
+        """Record the latency of an utterance whose translation was just shown"""
+        with self.lock:
+            ended = self.speech_ended.pop(utterance_id, None)
+        if ended is None:
+            return None
+        latency_ms = (time.monotonic() - ended) * 1000
+        self.record(latency_ms)
+        return latency_ms
+
+    def record(self, latency_ms):
+        with self.lock:
+            self.count += 1
+            self.samples.append(latency_ms)
+            del self.samples[:-self.window]
+
+    def stats(self):
+        with self.lock:
+            ordered = sorted(self.samples)
+            return {
+                'captions': self.count,
+                'avg_ms': sum(ordered) / len(ordered) if ordered else None,
+                'p50_ms': percentile(ordered, 0.5),
+                'p95_ms': percentile(ordered, 0.95),
+                'max_ms': ordered[-1] if ordered else None
+            }
+
+
+class SpeechServiceLatency:
+    def __init__(self, engine, connected=False, bytes_per_second=32000, window=CAPTION_LATENCY_WINDOW):
+        """Speech service lag and connection health of one recognizer
+
+        Lag is the audio already written to the push stream beyond the end of a
+        final result (Offset + Duration) when that result arrives: network time,
+        recognizer time and the segmentation silence, but not our own buffering.
+        Offsets are in stream time, so bytes_per_second must match the stream
+        format (16 kHz, 16-bit mono by default). connected says whether the
+        connection was already open (a pre-connected recognizer) when we subscribed.
+        """
+        self.engine = engine
+        self.bytes_per_second = bytes_per_second
+        self.window = window
+        self.lock = threading.Lock()
+        self.audio_bytes = 0
+        self.lag_ms = []
+        self.recognition_latency_ms = []
+        self.results = 0
+        self.statuses = {}
+        self.last_result = None
+
+        self.connected = connected
+        self.connects = 1 if connected else 0
+        self.disconnects = 0
+        self.reconnects = 0
+        self.reconnecting_s = 0.0
+        self.disconnected_at = None
+
+    def audio_written(self, num_bytes):
+        """Count audio as it is written to the push stream"""
+        with self.lock:
+            self.audio_bytes += num_bytes
+
+    def recognized(self, result):
+        """Record the lag of a final result and what the service said about it"""
+        with self.lock:
+            audio_s = self.audio_bytes / self.bytes_per_second
+        end_s = (result.offset + result.duration) / TICKS_PER_SECOND
+        lag_ms = (audio_s - end_s) * 1000
+
+        # The raw service response: recognition status and, when present, its own timing
+        response = {}
+        raw = result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
+        if raw:
+            try:
+                response = json.loads(raw)
+            except ValueError:
+                pass
+        status = response.get('RecognitionStatus', 'Unknown')
+        latency_ms = result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_RecognitionLatencyMs)
+
+        SPEECH_SERVICE_LAG_SECONDS.observe(max(0.0, lag_ms / 1000), engine=self.engine)
+        if latency_ms:
+            SPEECH_RECOGNITION_LATENCY_SECONDS.observe(int(latency_ms) / 1000, engine=self.engine)
+        with self.lock:
+            self.results += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.lag_ms.append(lag_ms)
+            del self.lag_ms[:-self.window]
+            if latency_ms:
+                self.recognition_latency_ms.append(int(latency_ms))
+                del self.recognition_latency_ms[:-self.window]
+            self.last_result = {
+                'offset_s': result.offset / TICKS_PER_SECOND,
+                'duration_s': result.duration / TICKS_PER_SECOND,
+                'audio_written_s': audio_s,
+                'lag_ms': lag_ms,
+                'recognition_latency_ms': int(latency_ms) if latency_ms else None,
+                'service_offset_s': response['Offset'] / TICKS_PER_SECOND if 'Offset' in response else None,
+                'status': status
+            }
+
+    def connection_connected(self, evt):
+        """Connection (re)established; closes the current reconnect gap"""
+        with self.lock:
+            self.connected = True
+            self.connects += 1
+            if self.disconnected_at is None:
+                return
+            gap_s = time.monotonic() - self.disconnected_at
+            self.disconnected_at = None
+            self.reconnects += 1
+            self.reconnecting_s += gap_s
+        SPEECH_RECONNECTS_TOTAL.inc(engine=self.engine)
+        SPEECH_RECONNECTING_SECONDS_TOTAL.inc(gap_s, engine=self.engine)
+
+    def connection_disconnected(self, evt):
+        with self.lock:
+            self.connected = False
+            self.disconnects += 1
+            self.disconnected_at = time.monotonic()
+        SPEECH_DISCONNECTS_TOTAL.inc(engine=self.engine)
+
+    def stats(self):
+        with self.lock:
+            lag = sorted(self.lag_ms)
+            latency = sorted(self.recognition_latency_ms)
+            reconnecting_s = self.reconnecting_s
+            if self.disconnected_at is not None:
+                reconnecting_s += time.monotonic() - self.disconnected_at
+            return {
+                'results': self.results,
+                'statuses': dict(self.statuses),
+                'audio_written_s': self.audio_bytes / self.bytes_per_second,
+                'lag_ms': {
+                    'avg': sum(lag) / len(lag) if lag else None,
+                    'p50': percentile(lag, 0.5),
+                    'p95': percentile(lag, 0.95),
+                    'max': lag[-1] if lag else None
+                },
+                'recognition_latency_ms': {
+                    'p50': percentile(latency, 0.5),
+                    'p95': percentile(latency, 0.95)
+                },
+                'last_result': self.last_result,
+                'connection': {
+                    'connected': self.connected,
+                    'connects': self.connects,
+                    'disconnects': self.disconnects,
+                    'reconnects': self.reconnects,
+                    'reconnecting_s': reconnecting_s
+                }
+            }
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+import warnings
+from pathlib import Path
+import numpy as np
+import whisper
+from local_whisper import pcm_to_float32, WHISPER_SAMPLE_RATE
+
+warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
+
+# Compares the old temp-WAV path (write file, ffmpeg decode, delete) with passing the
+# samples to Whisper in memory, on the same fixed corpus
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+# Directory of 16 kHz 16-bit mono WAV files; a seeded synthetic corpus if unset
+WHISPER_BENCH_CORPUS = os.getenv("WHISPER_BENCH_CORPUS")
+WHISPER_BENCH_REPEAT = int(os.getenv("WHISPER_BENCH_REPEAT", "3"))
+WHISPER_BENCH_OUTPUT = os.getenv("WHISPER_BENCH_OUTPUT")
+
+# Utterance lengths of the synthetic corpus, in seconds
+SYNTHETIC_CLIP_SECONDS = (2, 5, 10, 20)
+
+
+def load_corpus():
+    """Return [(name, int16 samples)] for the benchmark"""
+    if WHISPER_BENCH_CORPUS:
+        corpus = []
+        for path in sorted(Path(WHISPER_BENCH_CORPUS).glob("*.wav")):
+            with wave.open(str(path), 'rb') as f:
+                if f.getframerate() != WHISPER_SAMPLE_RATE or f.getsampwidth() != 2 or f.getnchannels() != 1:
+                    print(f"Skipping {path.name}: not 16 kHz 16-bit mono")
+                    continue
+                corpus.append((path.name, np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)))
+        return corpus
+
+    # Speech-like modulated noise; the decoded text is meaningless but the work per clip is fixed
+    rng = np.random.default_rng(0)
+    corpus = []
+    for seconds in SYNTHETIC_CLIP_SECONDS:
+        t = np.arange(seconds * WHISPER_SAMPLE_RATE) / WHISPER_SAMPLE_RATE
+        envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+        samples = rng.normal(0, 3000, t.size) * envelope
+        corpus.append((f"synthetic_{seconds}s", np.clip(samples, -32768, 32767).astype(np.int16)))
+    return corpus
+
+
+def transcribe_via_wav(model, audio_data, temp_dir):
+    """The previous path: write a temporary WAV, let Whisper decode it with ffmpeg, delete it"""
+    start = time.perf_counter()
+    temp_wav = os.path.join(temp_dir, "audio.wav")
+    with wave.open(temp_wav, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(WHISPER_SAMPLE_RATE)
+        wf.writeframes(audio_data.tobytes())
+    audio = whisper.load_audio(temp_wav)
+    input_ms = (time.perf_counter() - start) * 1000
+    result = model.transcribe(audio, fp16=False)
+    os.remove(temp_wav)
+    return result["text"].strip(), input_ms, (time.perf_counter() - start) * 1000
+
+
+def transcribe_in_memory(model, audio_data):
+    """The current path: convert the int16 samples and pass the array"""
+    start = time.perf_counter()
+    audio = pcm_to_float32(audio_data)
+    input_ms = (time.perf_counter() - start) * 1000
+    result = model.transcribe(audio, fp16=False)
+    return result["text"].strip(), input_ms, (time.perf_counter() - start) * 1000
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'mean': sum(ordered) / len(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        'max': ordered[-1]
+    }
+
+
+def main():
+    corpus = load_corpus()
+    if not corpus:
+        sys.exit("The corpus is empty")
+    print(f"Loading Whisper model ({WHISPER_MODEL})...", file=sys.stderr)
+    model = whisper.load_model(WHISPER_MODEL)
+    temp_dir = tempfile.mkdtemp()
+
+    # Warm up both paths so model and ffmpeg start-up costs do not skew the first clip
+    transcribe_via_wav(model, corpus[0][1], temp_dir)
+    transcribe_in_memory(model, corpus[0][1])
+
+    timings = {'wav_file': {'input_ms': [], 'total_ms': []}, 'in_memory': {'input_ms': [], 'total_ms': []}}
+    clips = []
+    for name, audio_data in corpus:
+        clip = {'clip': name, 'seconds': len(audio_data) / WHISPER_SAMPLE_RATE, 'wav_file_ms': [], 'in_memory_ms': []}
+        for repeat in range(WHISPER_BENCH_REPEAT):
+            # Alternate the order so neither path always runs on a warmer cache
+            for path in ('wav_file', 'in_memory') if repeat % 2 == 0 else ('in_memory', 'wav_file'):
+                if path == 'wav_file':
+                    text, input_ms, total_ms = transcribe_via_wav(model, audio_data, temp_dir)
+                else:
+                    text, input_ms, total_ms = transcribe_in_memory(model, audio_data)
+                timings[path]['input_ms'].append(input_ms)
+                timings[path]['total_ms'].append(total_ms)
+                clip[f"{path}_ms"].append(total_ms)
+        clip['text'] = text
+        clips.append(clip)
+        print(f"{name}: wav file {summarize(clip['wav_file_ms'])['mean']:.0f} ms, "
+              f"in memory {summarize(clip['in_memory_ms'])['mean']:.0f} ms", file=sys.stderr)
+    os.rmdir(temp_dir)
+
+    before = summarize(timings['wav_file']['total_ms'])
+    after = summarize(timings['in_memory']['total_ms'])
+    report = {
+        'model': WHISPER_MODEL,
+        'corpus': WHISPER_BENCH_CORPUS or 'synthetic',
+        'repeat': WHISPER_BENCH_REPEAT,
+        'wav_file': {'input_ms': summarize(timings['wav_file']['input_ms']), 'total_ms': before},
+        'in_memory': {'input_ms': summarize(timings['in_memory']['input_ms']), 'total_ms': after},
+        'saved_ms_per_utterance': before['mean'] - after['mean'],
+        'clips': clips
+    }
+    output = json.dumps(report, indent=2)
+    if WHISPER_BENCH_OUTPUT:
+        with open(WHISPER_BENCH_OUTPUT, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+import numpy as np
+from local_whisper import (ensure_model_store, load_model_from_store, pcm_to_float32,
+                           WHISPER_MODEL, WHISPER_SAMPLE_RATE, WHISPER_THREADS_PER_WORKER)
+
+# Starts N workers at once with each loader and compares their start-up time and memory
+WHISPER_BENCH_WORKERS = int(os.getenv("WHISPER_BENCH_WORKERS", "4"))
+WHISPER_BENCH_OUTPUT = os.getenv("WHISPER_BENCH_OUTPUT")
+# Length of the clip each worker transcribes once it has loaded
+FIRST_CLIP_SECONDS = 5
+
+
+def memory_mb():
+    """RSS, PSS (shared pages split between the processes mapping them) and private memory"""
+    fields = {}
+    for line in Path("/proc/self/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(':', 1)
+        fields[name] = int(value.split()[0]) / 1024
+    return {
+        'rss_mb': fields.get('Rss'),
+        'pss_mb': fields.get('Pss'),
+        'private_mb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared_mb': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    }
+
+
+def worker(loader, store_path, barrier, results):
+    """Load a model the given way, transcribe one clip, then report timings and memory"""
+    start = time.perf_counter()
+    os.environ["OMP_NUM_THREADS"] = str(WHISPER_THREADS_PER_WORKER)
+    import torch
+    import whisper
+    torch.set_num_threads(WHISPER_THREADS_PER_WORKER)
+    warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
+    imported = time.perf_counter()
+
+    model = whisper.load_model(WHISPER_MODEL) if loader == 'whisper' else load_model_from_store(store_path)
+    loaded = time.perf_counter()
+
+    rng = np.random.default_rng(0)
+    clip = (rng.normal(0, 3000, FIRST_CLIP_SECONDS * WHISPER_SAMPLE_RATE)).astype(np.int16)
+    model.transcribe(pcm_to_float32(clip), fp16=False)
+    transcribed = time.perf_counter()
+
+    # Measure while every worker is alive so shared pages are split between all of them
+    barrier.wait()
+    memory = memory_mb()
+    barrier.wait()
+    results.put({
+        'import_s': imported - start,
+        'load_s': loaded - imported,
+        'first_transcription_s': transcribed - loaded,
+        'time_to_first_transcription_s': transcribed - start,
+        **memory
+    })
+
+
+def run_loader(loader, store_path):
+    """Start the workers together and collect their reports"""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(WHISPER_BENCH_WORKERS)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(loader, store_path, barrier, results))
+                 for _ in range(WHISPER_BENCH_WORKERS)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    def mean(key):
+        return sum(report[key] for report in reports) / len(reports)
+
+    return {
+        'workers': reports,
+        'mean_load_s': mean('load_s'),
+        'mean_time_to_first_transcription_s': mean('time_to_first_transcription_s'),
+        'mean_rss_mb': mean('rss_mb'),
+        'mean_private_mb': mean('private_mb'),
+        # Physical memory the workers take on the host
+        'total_pss_mb': sum(report['pss_mb'] for report in reports)
+    }
+
+
+def main():
+    start = time.perf_counter()
+    store_path = ensure_model_store(WHISPER_MODEL)
+    build_s = time.perf_counter() - start
+
+    report = {
+        'model': WHISPER_MODEL,
+        'workers': WHISPER_BENCH_WORKERS,
+        'threads_per_worker': WHISPER_THREADS_PER_WORKER,
+        'store': str(store_path),
+        'store_mb': store_path.stat().st_size / (1024 * 1024),
+        # Near zero when the store already existed
+        'store_build_s': build_s
+    }
+    for loader in ('whisper', 'store'):
+        print(f"Starting {WHISPER_BENCH_WORKERS} workers with the {loader} loader...", file=sys.stderr)
+        report[loader] = run_loader(loader, store_path)
+        print(f"  time to first transcription {report[loader]['mean_time_to_first_transcription_s']:.2f} s, "
+              f"total PSS {report[loader]['total_pss_mb']:.0f} MB", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if WHISPER_BENCH_OUTPUT:
+        with open(WHISPER_BENCH_OUTPUT, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
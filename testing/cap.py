@@ -1,11 +1,13 @@
 from dotenv import load_dotenv
 import requests
-import uuid
 import json
 import os
-import tempfile
+import sys
 from datetime import datetime
+from pathlib import Path
 parent_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(parent_dir))
+from translator_client import get_translator
 
 # Load environment variables from .env file in the parent directory
 dotenv_path = parent_dir / '.env'
@@ -14,47 +16,19 @@ load_dotenv(dotenv_path=dotenv_path)
 subscription_key = os.getenv('AZURE_API_KEY')  # Replace with your actual subscription key
 
 def translate_text(text, from_lang='en', to_lang='es'):
-    # Your endpoint and subscription key
-    endpoint = "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate"
-    subscription_key = os.getenv('AZURE_API_KEY')  # Replace with your actual subscription key
-    
-    # Set up the headers with subscription key
-    headers = {
-        'Ocp-Apim-Subscription-Key': subscription_key,
-        'Content-type': 'application/json',
-        'X-ClientTraceId': str(uuid.uuid4())
-    }
-    
-    # Set up the query parameters
-    params = {
-        'api-version': '3.0',
-        'from': from_lang,
-        'to': to_lang
-    }
-    
-    # Set up the request body
-    body = [{
-        'text': text
-    }]
+    # Use the shared pooled Translator client from the project root
+    translator = get_translator(os.getenv('AZURE_API_KEY'))
     
     # Make the API request
     try:
-        response = requests.post(endpoint, headers=headers, params=params, json=body)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Parse the JSON response
-        result = response.json()
-        
-        # Extract and return the translated text
-        translations = result[0]['translations']
-        translated_text = translations[0]['text']
+        translated_text, latency_ms = translator.translate_timed(text, from_lang, to_lang)
         
         return {
             'original_text': text,
             'translated_text': translated_text,
             'from_language': from_lang,
             'to_language': to_lang,
-            'full_response': result
+            'latency_ms': latency_ms
         }
     
     except requests.exceptions.HTTPError as http_err:
@@ -0,0 +1,344 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import requests
+import socketio
+
+parent_dir = Path(__file__).resolve().parent.parent
+
+# Load test settings
+LOADTEST_URL = os.getenv("LOADTEST_URL", "http://127.0.0.1:5007")
+# 16 kHz mono 16-bit WAV streamed by every client; a synthetic speech-like signal if unset
+LOADTEST_WAV = os.getenv("LOADTEST_WAV")
+# Concurrency levels run one after another
+LOADTEST_CONCURRENCY = [int(n) for n in os.getenv("LOADTEST_CONCURRENCY", "1,5,10,25").split(",")]
+# Seconds of audio each client streams (the WAV loops) and how long to wait for the last captions
+LOADTEST_DURATION = float(os.getenv("LOADTEST_DURATION", "30"))
+LOADTEST_TAIL = float(os.getenv("LOADTEST_TAIL", "5"))
+# Size of each audio_data frame; the browser sends 4096 samples (256 ms)
+LOADTEST_FRAME_MS = int(os.getenv("LOADTEST_FRAME_MS", "256"))
+# A frame sent more than this after its real-time deadline counts as late
+LOADTEST_LATE_MS = float(os.getenv("LOADTEST_LATE_MS", "50"))
+LOADTEST_FROM_LANG = os.getenv("LOADTEST_FROM_LANG", "en-US")
+LOADTEST_TO_LANG = os.getenv("LOADTEST_TO_LANG", "es")
+LOADTEST_OUTPUT = os.getenv("LOADTEST_OUTPUT")
+# Measure this server process, or start the web app here (with its children) when LOADTEST_START_SERVER=1
+LOADTEST_SERVER_PID = os.getenv("LOADTEST_SERVER_PID")
+LOADTEST_START_SERVER = os.getenv("LOADTEST_START_SERVER", "0") == "1"
+
+SAMPLE_RATE = 16000
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def load_audio():
+    """Return the audio every client streams, as 16 kHz mono int16 PCM bytes"""
+    if LOADTEST_WAV:
+        with wave.open(LOADTEST_WAV, 'rb') as f:
+            if f.getframerate() != SAMPLE_RATE or f.getsampwidth() != 2:
+                raise SystemExit(f"{LOADTEST_WAV} must be 16 kHz 16-bit PCM")
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            if f.getnchannels() > 1:
+                samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+        return samples.tobytes()
+
+    # Four seconds of modulated noise ("speech") then one second of near silence, repeated
+    rng = np.random.default_rng(0)
+    t = np.arange(5 * SAMPLE_RATE) / SAMPLE_RATE
+    envelope = np.where(t < 4, 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t)), 0.01)
+    samples = rng.normal(0, 3000, t.size) * envelope
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def percentiles(values):
+    """p50/p95/p99/max of a list of milliseconds"""
+    if not values:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+
+    def rank(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {'count': len(ordered), 'p50': rank(0.5), 'p95': rank(0.95), 'p99': rank(0.99), 'max': ordered[-1]}
+
+
+def process_tree(pid):
+    """pid and all its descendants (the debug reloader runs the app in a child)"""
+    pids = [pid]
+    for current in pids:
+        for task in Path(f"/proc/{current}/task").glob("*"):
+            try:
+                pids += [int(child) for child in (task / "children").read_text().split()]
+            except OSError:
+                pass
+    return pids
+
+
+def cpu_seconds(pids):
+    """User + system CPU time used by the processes"""
+    total = 0
+    for pid in pids:
+        try:
+            fields = Path(f"/proc/{pid}/stat").read_text().rsplit(')', 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+        except (OSError, IndexError):
+            pass
+    return total / CLOCK_TICKS
+
+
+def rss_mb(pids):
+    """Resident memory of the processes in MB"""
+    total = 0
+    for pid in pids:
+        try:
+            total += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError):
+            pass
+    return total / (1024 * 1024)
+
+
+class ServerMonitor:
+    def __init__(self, pid):
+        """Samples CPU and RSS of the server process tree once a second"""
+        self.pid = pid
+        self.running = False
+        self.peak_rss_mb = 0.0
+
+    def __enter__(self):
+        self.pids = process_tree(self.pid)
+        self.start_cpu = cpu_seconds(self.pids)
+        self.start_time = time.monotonic()
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def _sample(self):
+        while self.running:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb(process_tree(self.pid)))
+            time.sleep(1)
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+        elapsed = time.monotonic() - self.start_time
+        pids = process_tree(self.pid)
+        self.result = {
+            'cpu_percent': (cpu_seconds(pids) - self.start_cpu) / elapsed * 100,
+            'rss_mb_peak': max(self.peak_rss_mb, rss_mb(pids)),
+            'rss_mb_end': rss_mb(pids)
+        }
+
+
+class SimulatedClient:
+    def __init__(self, index, audio):
+        """One browser tab: starts a session, streams audio in real time and records captions"""
+        self.index = index
+        self.audio = audio
+        self.frame_bytes = SAMPLE_RATE * 2 * LOADTEST_FRAME_MS // 1000 // 2 * 2
+        self.sio = socketio.Client(reconnection=False)
+        self.started = threading.Event()
+
+        self.start_sent_at = None
+        self.first_interim_ms = None
+        self.last_interim_at = None
+        self.pending_since = {}
+        self.caption_latencies_ms = []
+        self.interim_updates = 0
+        self.transcription_updates = 0
+        self.frames_sent = 0
+        self.frames_late = 0
+        self.frames_failed = 0
+        self.errors = []
+
+        self.sio.on('transcription_status', self.on_status)
+        self.sio.on('interim_update', self.on_interim)
+        self.sio.on('transcription_pending', self.on_pending)
+        self.sio.on('transcription_update', self.on_update)
+        self.sio.on('error', lambda data: self.errors.append(data.get('message')))
+
+    def on_status(self, data):
+        if data.get('status') == 'started':
+            self.started.set()
+
+    def on_interim(self, data):
+        now = time.monotonic()
+        self.interim_updates += 1
+        self.last_interim_at = now
+        if self.first_interim_ms is None:
+            self.first_interim_ms = (now - self.start_sent_at) * 1000
+
+    def on_pending(self, data):
+        # End of speech for this utterance is its last interim update
+        self.pending_since[data['id']] = self.last_interim_at or time.monotonic()
+        self.last_interim_at = None
+
+    def on_update(self, data):
+        self.transcription_updates += 1
+        ended = self.pending_since.pop(data.get('id'), None)
+        if ended is not None:
+            self.caption_latencies_ms.append((time.monotonic() - ended) * 1000)
+
+    def run(self):
+        try:
+            self.sio.connect(LOADTEST_URL)
+            self.start_sent_at = time.monotonic()
+            self.sio.emit('start_transcription', {'from_lang': LOADTEST_FROM_LANG, 'to_lang': LOADTEST_TO_LANG})
+            if not self.started.wait(10):
+                self.errors.append("transcription did not start")
+                return
+            self.stream_audio()
+            time.sleep(LOADTEST_TAIL)
+            self.sio.emit('stop_transcription')
+        except Exception as e:
+            self.errors.append(str(e))
+        finally:
+            try:
+                self.sio.disconnect()
+            except Exception:
+                pass
+
+    def stream_audio(self):
+        """Send frames on a real-time schedule, counting frames that miss their deadline"""
+        total_frames = int(LOADTEST_DURATION * 1000 / LOADTEST_FRAME_MS)
+        begin = time.monotonic()
+        offset = 0
+        for n in range(total_frames):
+            deadline = begin + n * LOADTEST_FRAME_MS / 1000
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay * 1000 > LOADTEST_LATE_MS:
+                self.frames_late += 1
+
+            if offset + self.frame_bytes > len(self.audio):
+                offset = 0
+            frame = self.audio[offset:offset + self.frame_bytes]
+            offset += self.frame_bytes
+            try:
+                self.sio.emit('audio_data', frame)
+                self.frames_sent += 1
+            except Exception:
+                self.frames_failed += 1
+
+
+def server_bytes_dropped():
+    """Audio the server's ingest buffers discarded, summed over live sessions"""
+    try:
+        stats = requests.get(f"{LOADTEST_URL}/stats", timeout=5).json()
+    except Exception:
+        return None, None
+    dropped = sum(s.get('ingest', {}).get('bytes_dropped', 0) for s in stats.get('sessions', {}).values())
+    return dropped, stats
+
+
+def run_level(concurrency, audio, server_pid):
+    """Run one concurrency level and summarize it"""
+    clients = [SimulatedClient(i, audio) for i in range(concurrency)]
+    threads = [threading.Thread(target=client.run, daemon=True) for client in clients]
+
+    monitor = ServerMonitor(server_pid) if server_pid else None
+    if monitor:
+        monitor.__enter__()
+    for thread in threads:
+        thread.start()
+    # Sample the server while the sessions are still alive
+    time.sleep(LOADTEST_DURATION + LOADTEST_TAIL / 2)
+    bytes_dropped, stats = server_bytes_dropped()
+    for thread in threads:
+        thread.join()
+    if monitor:
+        monitor.__exit__(None, None, None)
+
+    frame_bytes = clients[0].frame_bytes
+    result = {
+        'concurrency': concurrency,
+        'clients_ok': sum(1 for c in clients if not c.errors),
+        'caption_latency_ms': percentiles([ms for c in clients for ms in c.caption_latencies_ms]),
+        'first_interim_ms': percentiles([c.first_interim_ms for c in clients if c.first_interim_ms is not None]),
+        'interim_updates': sum(c.interim_updates for c in clients),
+        'transcription_updates': sum(c.transcription_updates for c in clients),
+        'frames': {
+            'sent': sum(c.frames_sent for c in clients),
+            'late': sum(c.frames_late for c in clients),
+            'failed': sum(c.frames_failed for c in clients),
+            'dropped_by_server': bytes_dropped // frame_bytes if bytes_dropped is not None else None
+        },
+        'errors': [error for c in clients for error in c.errors][:20]
+    }
+    if monitor:
+        result['server'] = monitor.result
+    if stats:
+        result['server_caption_latency'] = stats.get('caption_latency')
+    return result
+
+
+def start_server():
+    """Start the web app with the offline speech engine unless the caller overrides it"""
+    try:
+        requests.get(f"{LOADTEST_URL}/stats", timeout=1)
+        raise SystemExit(f"A server is already answering on {LOADTEST_URL}; use LOADTEST_SERVER_PID to measure it")
+    except requests.exceptions.RequestException:
+        pass
+    env = dict(os.environ)
+    env.setdefault("SPEECH_BACKEND", "fake")
+    # No tty here, so the development server must be told it may run
+    env.setdefault("ALLOW_UNSAFE_WERKZEUG", "1")
+    # stderr goes to ours so a failing start-up can be diagnosed
+    process = subprocess.Popen([sys.executable, str(parent_dir / "WebsiteForVoiceTranslation.py")],
+                               cwd=parent_dir, env=env, stdout=subprocess.DEVNULL, stderr=sys.stderr)
+    for _ in range(60):
+        if process.poll() is not None:
+            raise SystemExit(f"Web app exited with code {process.returncode} during start-up")
+        try:
+            requests.get(f"{LOADTEST_URL}/stats", timeout=1)
+            return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Web app did not start")
+
+
+def main():
+    audio = load_audio()
+    server = start_server() if LOADTEST_START_SERVER else None
+    server_pid = server.pid if server else (int(LOADTEST_SERVER_PID) if LOADTEST_SERVER_PID else None)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'url': LOADTEST_URL,
+        'audio': LOADTEST_WAV or 'synthetic',
+        'duration_s': LOADTEST_DURATION,
+        'frame_ms': LOADTEST_FRAME_MS,
+        'levels': []
+    }
+    try:
+        for concurrency in LOADTEST_CONCURRENCY:
+            print(f"Running {concurrency} clients for {LOADTEST_DURATION:.0f} s...", file=sys.stderr)
+            level = run_level(concurrency, audio, server_pid)
+            latency = level['caption_latency_ms']
+            print(f"  caption latency p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                  f"p99 {latency['p99']} ms, late frames {level['frames']['late']}", file=sys.stderr)
+            report['levels'].append(level)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    if LOADTEST_OUTPUT:
+        with open(LOADTEST_OUTPUT, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
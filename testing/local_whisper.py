@@ -0,0 +1,628 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import queue
+import threading
+import time
+import warnings
+from collections import deque
+from pathlib import Path
+import numpy as np
+
+# Whisper models expect 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm_to_float32(audio_data):
+    """int16 PCM (any shape, mono) to the float32 array in [-1, 1) that Whisper accepts directly
+
+    model.transcribe() given a path runs ffmpeg to decode the file; given an
+    array it goes straight to the log-mel spectrogram.
+    """
+    return audio_data.reshape(-1).astype(np.float32) / 32768.0
+
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+# torch intra-op threads per worker; workers * threads should not exceed the physical cores
+WHISPER_THREADS_PER_WORKER = int(os.getenv("WHISPER_THREADS_PER_WORKER", "2"))
+# Worker processes, each with its own model; 0 transcribes on a thread in the caller's process
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", str(max(1, (os.cpu_count() or 1) // WHISPER_THREADS_PER_WORKER))))
+# Recent utterances kept for the queue lag and transcription time percentiles
+WHISPER_STATS_WINDOW = 200
+# How often the pool checks that its worker processes are still alive (seconds)
+WHISPER_WORKER_CHECK_S = 1.0
+# Load models from an fp32 store that every process memory-maps, instead of whisper.load_model
+WHISPER_MODEL_STORE = os.getenv("WHISPER_MODEL_STORE", "1") == "1"
+WHISPER_MODEL_STORE_DIR = Path(os.getenv("WHISPER_MODEL_STORE_DIR", Path.home() / ".cache" / "babelingo" / "whisper"))
+MODEL_STORE_FORMAT = 2
+# n_vocab of the English-only (.en) checkpoints
+ENGLISH_ONLY_VOCAB = 51864
+# Transcribe while the speaker talks instead of after each pause
+WHISPER_STREAMING = os.getenv("WHISPER_STREAMING", "0") == "1"
+# Streaming mode: how often the audio window is re-transcribed, and how long it may grow
+# before it is cut even though no sentence has ended
+WHISPER_STREAM_STEP_S = float(os.getenv("WHISPER_STREAM_STEP_S", "1.0"))
+WHISPER_STREAM_MAX_WINDOW_S = float(os.getenv("WHISPER_STREAM_MAX_WINDOW_S", "15"))
+# Samples per Whisper mel frame; the window is only trimmed on frame boundaries
+MEL_HOP_LENGTH = 160
+# Words starting this close before the last committed word's end are treated as repeats of it
+STREAM_OVERLAP_S = 0.1
+# Trailing committed text given to each pass as its prompt
+STREAM_PROMPT_CHARS = 200
+SENTENCE_END = ('.', '?', '!', '\u3002', '\uff1f', '\uff01')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def model_store_key(model_name):
+    """File-name-safe store key: the full model name, or for a checkpoint file a hash of its path and mtime
+
+    The full name keeps base and base.en (tiny.en, small.en, ...) apart; the
+    mtime makes a checkpoint replaced in place get a fresh store.
+    """
+    if os.path.isfile(model_name):
+        path = Path(model_name).resolve()
+        digest = hashlib.sha256(f"{path}:{path.stat().st_mtime_ns}".encode('utf-8')).hexdigest()[:16]
+        return f"{path.stem}-{digest}"
+    return re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+
+
+def model_store_path(model_name):
+    return WHISPER_MODEL_STORE_DIR / f"{model_store_key(model_name)}-fp32-v{MODEL_STORE_FORMAT}.pt"
+
+
+def check_model_store(store, model_name):
+    """Raise ValueError unless the loaded store was built from model_name"""
+    if store.get('format') != MODEL_STORE_FORMAT:
+        raise ValueError(f"Model store format {store.get('format')} is not {MODEL_STORE_FORMAT}")
+    if store.get('source') != model_store_key(model_name):
+        raise ValueError(f"Model store was built from {store.get('source')}, not {model_name}")
+    # English-only checkpoints have one token fewer than every multilingual one
+    english_only = store['dims']['n_vocab'] == ENGLISH_ONLY_VOCAB
+    if not os.path.isfile(model_name) and english_only != model_name.endswith(".en"):
+        raise ValueError(f"Model store dims (n_vocab {store['dims']['n_vocab']}) do not match {model_name}")
+
+
+def ensure_model_store(model_name, rebuild=False):
+    """Build the store for model_name once per host; returns its path
+
+    whisper.load_model reads the fp16 checkpoint and converts it into freshly
+    allocated fp32 parameters in every process. The store holds those fp32
+    tensors (plus the buffers Whisper creates itself) in a torch.save file
+    that load_model_from_store maps read-only, so all processes share the page
+    cache copy and start without a conversion.
+    """
+    path = model_store_path(model_name)
+    if path.exists() and not rebuild:
+        return path
+
+    import torch
+    import whisper
+    print(f"Building Whisper model store {path}...")
+    model = whisper.load_model(model_name, device="cpu")
+    state = model.state_dict()
+    tensors = {name: tensor.detach().float().contiguous() for name, tensor in state.items()}
+    # Non-persistent buffers (the decoder's causal mask, the alignment heads) are not in the state dict
+    buffers, sparse = {}, []
+    for name, buffer in model.named_buffers():
+        if name in state:
+            continue
+        if buffer.is_sparse:
+            sparse.append(name)
+            buffer = buffer.to_dense()
+        buffers[name] = buffer.contiguous()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    torch.save({
+        'format': MODEL_STORE_FORMAT,
+        'source': model_store_key(model_name),
+        'dims': vars(model.dims),
+        'tensors': tensors,
+        'buffers': buffers,
+        'sparse': sparse
+    }, temp_path)
+    # Concurrent builders write identical files; the rename makes either one visible whole
+    os.replace(temp_path, path)
+    return path
+
+
+def load_model_from_store(path, model_name=None):
+    """Build a Whisper model whose weights are views of the memory-mapped store file
+
+    With model_name the store is checked against it first (see check_model_store).
+    """
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    store = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    if model_name:
+        check_model_store(store, model_name)
+    dims = ModelDimensions(**store['dims'])
+    try:
+        # Parameters are not allocated at all; assign=True below points them at the store
+        with torch.device("meta"):
+            model = Whisper(dims)
+    except (NotImplementedError, RuntimeError):
+        # Older torch builds cannot create every Whisper buffer on the meta device
+        model = Whisper(dims)
+    model.load_state_dict(store['tensors'], assign=True)
+    for name, buffer in store['buffers'].items():
+        module_name, _, buffer_name = name.rpartition('.')
+        module = model.get_submodule(module_name)
+        module.register_buffer(buffer_name, buffer.to_sparse() if name in store['sparse'] else buffer,
+                               persistent=False)
+    return model.eval()
+
+
+def load_whisper_model(model_name=WHISPER_MODEL):
+    """Load a model through the shared store when enabled, otherwise with whisper.load_model"""
+    if WHISPER_MODEL_STORE:
+        try:
+            return load_model_from_store(ensure_model_store(model_name), model_name)
+        except ValueError as e:
+            print(f"{e}; rebuilding the model store")
+            return load_model_from_store(ensure_model_store(model_name, rebuild=True), model_name)
+    import whisper
+    return whisper.load_model(model_name)
+
+
+def worker_main(index, model_name, threads, tasks, results):
+    """Worker process: load a model, then transcribe utterances until sent None"""
+    # Thread pools are sized when torch is first imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
+
+    start = time.time()
+    model = load_whisper_model(model_name)
+    results.put(('ready', index, time.time() - start))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, audio, submitted_at = task
+        started_at = time.time()
+        try:
+            text, error = model.transcribe(audio, fp16=False)["text"].strip(), None
+        except Exception as e:
+            text, error = "", str(e)
+        results.put(('done', index, (seq, text, error, submitted_at, started_at, time.time())))
+
+
+class WhisperWorkerPool:
+    def __init__(self, on_result, model_name=WHISPER_MODEL, workers=WHISPER_WORKERS,
+                 threads_per_worker=WHISPER_THREADS_PER_WORKER):
+        """Transcribes utterances on several processes and delivers them in order
+
+        Every worker loads its own model; the pool hands the next utterance to
+        whichever worker is idle and remembers which one it holds. on_result(seq,
+        text, error) is called on a collector thread strictly in submission
+        order, like the ordered translation queue in the apps. A worker that
+        dies (OOM kill, crash in torch) has its utterance delivered as an error
+        and is replaced, so later utterances are not held up behind it.
+        """
+        self.on_result = on_result
+        self.model_name = model_name
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        # Built before the workers start so they never race to convert the checkpoint
+        if WHISPER_MODEL_STORE:
+            ensure_model_store(model_name)
+
+        self.lock = threading.Lock()
+        self.closing = False
+        self.next_seq = 0
+        self.next_to_deliver = 0
+        self.finished = {}
+        self.pending_since = {}
+        self.completed = 0
+        self.errors = 0
+        self.restarts = 0
+        self.queue_lag_ms = []
+        self.transcribe_ms = []
+        # Utterances waiting for an idle worker, and what each busy worker holds
+        self.backlog = deque()
+        self.idle = set()
+        self.holding = {}
+
+        # spawn: forking a process that already started torch threads can deadlock
+        self.context = multiprocessing.get_context("spawn")
+        self.results = self.context.Queue()
+        self.tasks = [None] * workers
+        self.processes = [None] * workers
+        self.worker_stats = [None] * workers
+        for index in range(workers):
+            self._start_worker(index)
+
+        self.collector = threading.Thread(target=self._collect, name="whisper-collector", daemon=True)
+        self.collector.start()
+
+    def _start_worker(self, index):
+        """Start (or replace) worker index with its own task queue"""
+        # A process killed mid-read can leave its queue unusable, so a replacement gets a new one
+        self.tasks[index] = self.context.Queue()
+        self.processes[index] = self.context.Process(
+            target=worker_main, args=(index, self.model_name, self.threads_per_worker, self.tasks[index], self.results),
+            name=f"whisper-{index}", daemon=True
+        )
+        self.worker_stats[index] = {'ready': False, 'load_s': None, 'ready_at': None, 'utterances': 0,
+                                    'busy_s': 0.0, 'restarts': self.worker_stats[index]['restarts']
+                                    if self.worker_stats[index] else 0}
+        self.processes[index].start()
+
+    def submit(self, audio_data):
+        """Queue int16 samples for transcription and return their sequence number"""
+        submitted_at = time.time()
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.pending_since[seq] = submitted_at
+            self.backlog.append((seq, pcm_to_float32(audio_data), submitted_at))
+            self._dispatch_locked()
+        return seq
+
+    def _dispatch_locked(self):
+        """Give backlog utterances to idle workers"""
+        while self.backlog and self.idle:
+            index = self.idle.pop()
+            task = self.backlog.popleft()
+            self.holding[index] = task[0]
+            self.tasks[index].put(task)
+
+    def _collect(self):
+        """Read worker results, watch for dead workers and deliver in sequence order"""
+        while True:
+            try:
+                message = self.results.get(timeout=WHISPER_WORKER_CHECK_S)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+            with self.lock:
+                if message:
+                    self._handle_locked(*message)
+                self._check_workers_locked()
+                self._dispatch_locked()
+
+    def _handle_locked(self, kind, index, payload):
+        worker = self.worker_stats[index]
+        if kind == 'ready':
+            worker.update(ready=True, load_s=payload, ready_at=time.time())
+            self.idle.add(index)
+            return
+        seq, text, error, submitted_at, started_at, finished_at = payload
+        if self.holding.get(index) != seq:
+            # Already given up on: the worker was reported dead before its result arrived
+            return
+        del self.holding[index]
+        self.idle.add(index)
+        worker['utterances'] += 1
+        worker['busy_s'] += finished_at - started_at
+        self.queue_lag_ms.append((started_at - submitted_at) * 1000)
+        self.transcribe_ms.append((finished_at - started_at) * 1000)
+        del self.queue_lag_ms[:-WHISPER_STATS_WINDOW]
+        del self.transcribe_ms[:-WHISPER_STATS_WINDOW]
+        self._complete_locked(seq, text, error)
+
+    def _check_workers_locked(self):
+        """Fail the utterance a dead worker held and start a replacement"""
+        if self.closing:
+            return
+        for index, process in enumerate(self.processes):
+            if process is None or process.is_alive():
+                continue
+            error = f"Whisper worker {index} exited with code {process.exitcode}"
+            self.idle.discard(index)
+            seq = self.holding.pop(index, None)
+            if seq is not None:
+                self._complete_locked(seq, "", error)
+            if not self.worker_stats[index]['ready']:
+                # Died loading the model: a replacement would most likely die the same way
+                print(f"\n{error} while loading {self.model_name}")
+                self.processes[index] = None
+                continue
+            print(f"\n{error}; restarting it")
+            self.restarts += 1
+            self.worker_stats[index]['restarts'] += 1
+            self._start_worker(index)
+        if not any(self.processes):
+            # Nothing left to transcribe with; fail what is queued rather than hold it forever
+            while self.backlog:
+                self._complete_locked(self.backlog.popleft()[0], "", "No Whisper workers are running")
+
+    def _complete_locked(self, seq, text, error):
+        """Record a finished utterance and deliver every result that is now next in order"""
+        self.pending_since.pop(seq, None)
+        self.completed += 1
+        if error:
+            self.errors += 1
+        # Delivery happens under the lock so results can never be reordered
+        self.finished[seq] = (text, error)
+        while self.next_to_deliver in self.finished:
+            done_seq = self.next_to_deliver
+            done_text, done_error = self.finished.pop(done_seq)
+            self.next_to_deliver += 1
+            try:
+                self.on_result(done_seq, done_text, done_error)
+            except Exception as e:
+                print(f"Error delivering transcription: {e}")
+
+    def stats(self):
+        """Queue depth, queue lag, transcription time and per-worker utilization"""
+        now = time.time()
+        with self.lock:
+            lag = sorted(self.queue_lag_ms)
+            transcribe = sorted(self.transcribe_ms)
+            oldest = min(self.pending_since.values()) if self.pending_since else None
+            workers = []
+            for worker in self.worker_stats:
+                uptime = now - worker['ready_at'] if worker['ready_at'] else 0
+                workers.append({
+                    'ready': worker['ready'],
+                    'load_s': worker['load_s'],
+                    'utterances': worker['utterances'],
+                    'busy_s': worker['busy_s'],
+                    'utilization': worker['busy_s'] / uptime if uptime else None,
+                    'restarts': worker['restarts']
+                })
+            return {
+                'workers': self.workers,
+                'threads_per_worker': self.threads_per_worker,
+                'submitted': self.next_seq,
+                'completed': self.completed,
+                'errors': self.errors,
+                'restarts': self.restarts,
+                # Waiting for a worker or being transcribed
+                'pending': self.next_seq - self.completed,
+                'oldest_pending_s': now - oldest if oldest else None,
+                'awaiting_order': len(self.finished),
+                'queue_lag_ms': {'p50': percentile(lag, 0.5), 'p95': percentile(lag, 0.95),
+                                 'max': lag[-1] if lag else None},
+                'transcribe_ms': {'p50': percentile(transcribe, 0.5), 'p95': percentile(transcribe, 0.95),
+                                  'max': transcribe[-1] if transcribe else None},
+                'per_worker': workers
+            }
+
+    def close(self):
+        """Stop the workers once they finish what they are transcribing"""
+        with self.lock:
+            self.closing = True
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            if process:
+                process.join(timeout=10)
+        self.results.put(None)
+        self.collector.join(timeout=WHISPER_WORKER_CHECK_S * 2)
+
+def normalize_word(word):
+    """Compare words without case, spacing or punctuation"""
+    return ''.join(c for c in word.lower() if c.isalnum())
+
+
+class StreamingTranscriber:
+    def __init__(self, model, emit, step_s=WHISPER_STREAM_STEP_S, max_window_s=WHISPER_STREAM_MAX_WINDOW_S):
+        """Re-transcribes a sliding audio window and commits the words passes agree on
+
+        Every step_s the audio received since the last committed sentence is
+        transcribed again with word timestamps. A word is committed once two
+        consecutive passes produce it in the same place (local agreement);
+        everything after it is tentative. emit(event, data) receives the web
+        app's events: 'interim_update' with {'transcription': committed +
+        tentative text} and 'transcription_update' with {'id', 'transcription',
+        'translation'} when a sentence is complete (translation is None, this
+        engine does not translate). Audio up to the end of each completed
+        sentence is dropped from the window, so the work per pass stays bounded
+        by the sentence being spoken rather than the whole stream.
+        """
+        self.model = model
+        self.emit = emit
+        self.step_s = step_s
+        self.max_window_s = max_window_s
+
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.audio = np.zeros(0, dtype=np.float32)
+        # Stream time (seconds since the first sample) of audio[0]
+        self.window_start = 0.0
+        self.received = 0
+        self.processed = 0
+        self.end_requested = False
+
+        # Only touched on the streaming thread
+        self.language = None
+        self.prompt = ""
+        self.committed = []
+        self.committed_end = 0.0
+        self.tentative = []
+        self.last_interim = ""
+        self.next_id = 0
+
+        self.passes = 0
+        self.pass_ms = []
+        self.window_s = []
+        self.late_passes = 0
+        self.forced_cuts = 0
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name="whisper-stream", daemon=True)
+        self.thread.start()
+
+    def push(self, audio_data):
+        """Append int16 samples to the window"""
+        samples = pcm_to_float32(audio_data)
+        with self.lock:
+            self.audio = np.concatenate((self.audio, samples))
+            self.received += samples.size
+
+    def end_utterance(self):
+        """The speaker paused: commit whatever the next pass hears and start over"""
+        with self.lock:
+            self.end_requested = True
+        self.wake.set()
+
+    def _run(self):
+        """Run a pass every step, or at once when an utterance ends"""
+        step_samples = int(self.step_s * WHISPER_SAMPLE_RATE)
+        while self.is_running:
+            started = time.monotonic()
+            self.wake.clear()
+            with self.lock:
+                due = self.end_requested or self.received - self.processed >= step_samples
+            if due:
+                try:
+                    self._pass()
+                except Exception as e:
+                    print(f"Error transcribing stream: {e}")
+            elapsed = time.monotonic() - started
+            if elapsed > self.step_s:
+                self.late_passes += 1
+            self.wake.wait(max(0, self.step_s - elapsed))
+
+    def _pass(self):
+        """Transcribe the window once, commit agreed words and trim finished sentences"""
+        with self.lock:
+            audio = self.audio
+            window_start = self.window_start
+            final = self.end_requested
+            self.end_requested = False
+            self.processed = self.received
+
+        words = []
+        if audio.size:
+            started = time.perf_counter()
+            result = self.model.transcribe(audio, fp16=False, word_timestamps=True, language=self.language,
+                                           initial_prompt=self.prompt or None, condition_on_previous_text=False)
+            self.passes += 1
+            self.pass_ms.append((time.perf_counter() - started) * 1000)
+            self.window_s.append(audio.size / WHISPER_SAMPLE_RATE)
+            del self.pass_ms[:-WHISPER_STATS_WINDOW]
+            del self.window_s[:-WHISPER_STATS_WINDOW]
+            # Detected once; later passes skip language detection and cannot flip languages
+            self.language = self.language or result.get("language")
+            words = [(window_start + word["start"], window_start + word["end"], word["word"].strip())
+                     for segment in result["segments"] for word in segment.get("words", [])]
+            words = self._drop_committed(words)
+
+        if final:
+            # Nothing more will be heard for this utterance; keep the whole hypothesis
+            self.committed.extend(words)
+            self._finish_sentence(len(self.committed))
+            self._trim(audio.size)
+            self.tentative = []
+            return
+
+        # Punctuation must agree too, so a sentence only ends once two passes both end it
+        agreed = 0
+        while (agreed < min(len(words), len(self.tentative))
+               and words[agreed][2].lower() == self.tentative[agreed][2].lower()):
+            agreed += 1
+        self.committed.extend(words[:agreed])
+        self.tentative = words[agreed:]
+        if agreed:
+            self.committed_end = self.committed[-1][1]
+
+        # Emit every completed sentence and drop its audio from the window
+        for i in range(len(self.committed) - 1, -1, -1):
+            if self.committed[i][2].endswith(SENTENCE_END):
+                cut = self.committed[i][1]
+                self._finish_sentence(i + 1)
+                self._trim(self._samples_before(cut, window_start))
+                break
+        else:
+            if audio.size / WHISPER_SAMPLE_RATE > self.max_window_s:
+                # A long run-on utterance; cut at the last agreed word, or everything if none agreed yet
+                self.forced_cuts += 1
+                if not self.committed:
+                    self.committed, self.tentative = self.tentative, []
+                if self.committed:
+                    cut = self.committed[-1][1]
+                    self._finish_sentence(len(self.committed))
+                    self._trim(self._samples_before(cut, window_start))
+                else:
+                    self._trim(audio.size)
+
+        self._send_interim()
+
+    def _drop_committed(self, words):
+        """Remove words the window still holds from before the last commit"""
+        words = [word for word in words if word[0] >= self.committed_end - STREAM_OVERLAP_S]
+        # Timestamps are approximate; also drop a re-heard tail of the committed words
+        committed = [normalize_word(word[2]) for word in self.committed[-5:]]
+        for n in range(min(len(committed), len(words)), 0, -1):
+            if committed[-n:] == [normalize_word(word[2]) for word in words[:n]]:
+                return words[n:]
+        return words
+
+    def _samples_before(self, stream_time, window_start):
+        """Window offset of stream_time, rounded down to a whole mel frame"""
+        samples = int((stream_time - window_start) * WHISPER_SAMPLE_RATE)
+        return max(0, samples - samples % MEL_HOP_LENGTH)
+
+    def _trim(self, samples):
+        """Drop the first samples of the window (audio pushed meanwhile is kept)"""
+        with self.lock:
+            self.audio = self.audio[samples:]
+            self.window_start += samples / WHISPER_SAMPLE_RATE
+
+    def _finish_sentence(self, count):
+        """Emit the first count committed words as a final result"""
+        sentence, self.committed = self.committed[:count], self.committed[count:]
+        if not sentence:
+            return
+        self.committed_end = max(self.committed_end, sentence[-1][1])
+        text = ' '.join(word[2] for word in sentence)
+        self.prompt = (self.prompt + ' ' + text)[-STREAM_PROMPT_CHARS:]
+        self.last_interim = ""
+        utterance_id = self.next_id
+        self.next_id += 1
+        self.emit('transcription_update', {'id': utterance_id, 'transcription': text, 'translation': None})
+
+    def _send_interim(self):
+        """Emit committed plus tentative text when it changed"""
+        text = ' '.join(word[2] for word in self.committed + self.tentative)
+        if text and text != self.last_interim:
+            self.last_interim = text
+            self.emit('interim_update', {'transcription': text})
+
+    def stats(self):
+        """Pass time against the step, window length and cut counts"""
+        pass_ms = sorted(self.pass_ms)
+        window_s = sorted(self.window_s)
+        with self.lock:
+            buffered_s = self.audio.size / WHISPER_SAMPLE_RATE
+        return {
+            'step_s': self.step_s,
+            'passes': self.passes,
+            # Passes that took longer than the step, so the next one started late
+            'late_passes': self.late_passes,
+            'pass_ms': {'p50': percentile(pass_ms, 0.5), 'p95': percentile(pass_ms, 0.95),
+                        'max': pass_ms[-1] if pass_ms else None},
+            'window_s': {'p50': percentile(window_s, 0.5), 'max': window_s[-1] if window_s else None},
+            'buffered_s': buffered_s,
+            'sentences': self.next_id,
+            'forced_cuts': self.forced_cuts,
+            'committed_words': len(self.committed),
+            'tentative_words': len(self.tentative)
+        }
+
+    def close(self):
+        """Stop the streaming thread, then commit what is left in the window"""
+        self.is_running = False
+        self.wake.set()
+        self.thread.join(timeout=30)
+        if not self.thread.is_alive():
+            with self.lock:
+                self.end_requested = True
+            self._pass()
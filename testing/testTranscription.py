@@ -1,13 +1,11 @@
-import os
 import time
-import tempfile
-import wave
 import threading
 import queue
 import warnings
 import numpy as np
 import sounddevice as sd
-import whisper
+from local_whisper import (pcm_to_float32, load_whisper_model, WhisperWorkerPool, StreamingTranscriber,
+                           WHISPER_MODEL, WHISPER_WORKERS, WHISPER_STREAMING)
 
 # Filter out specific Whisper warnings about FP16
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
@@ -16,25 +14,36 @@ warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using F
 CHANNELS = 1
 RATE = 16000  # 16kHz required by Whisper
 CHUNK_SECONDS = 2  # Process audio in 2-second chunks
+STREAM_CHUNK_SECONDS = 0.25  # Smaller chunks in streaming mode so the window grows smoothly
 SILENCE_THRESHOLD = 300  # Higher threshold to ignore background noise
 ACTIVATION_DURATION = 1.0  # Minimum duration (seconds) of sound above threshold to start recording
 DEACTIVATION_DURATION = 1.5  # Duration of silence (seconds) to stop recording
 
 class AudioProcessor:
-    def __init__(self):
-        # Load Whisper model (disable fp16 to avoid warnings on CPU)
-        print("Loading Whisper model (base)...")
-        self.model = whisper.load_model("base")
-        print("Whisper model loaded successfully!")
+    def __init__(self, workers=WHISPER_WORKERS, streaming=WHISPER_STREAMING):
+        # Utterances go to a pool of worker processes, or with workers=0 to one in-process model.
+        # Streaming mode re-transcribes the current utterance with one in-process model as it grows.
+        self.pool = None
+        self.model = None
+        self.streamer = None
+        if streaming:
+            print(f"Loading Whisper model ({WHISPER_MODEL}) for streaming...")
+            self.streamer = StreamingTranscriber(load_whisper_model(WHISPER_MODEL), emit=self.show_event)
+        elif workers > 0:
+            print(f"Starting {workers} Whisper worker processes ({WHISPER_MODEL})...")
+            self.pool = WhisperWorkerPool(on_result=self.show_transcription, workers=workers)
+        else:
+            # Load Whisper model (disable fp16 to avoid warnings on CPU)
+            print(f"Loading Whisper model ({WHISPER_MODEL})...")
+            self.model = load_whisper_model(WHISPER_MODEL)
+            print("Whisper model loaded successfully!")
         
         # Set up audio queue and processing thread
         self.audio_queue = queue.Queue()
         self.is_running = True
-        self.temp_dir = tempfile.mkdtemp()
-        print(f"Temporary files stored in: {self.temp_dir}")
         
         # Set up recording parameters
-        self.chunk_samples = int(RATE * CHUNK_SECONDS)
+        self.chunk_samples = int(RATE * (STREAM_CHUNK_SECONDS if streaming else CHUNK_SECONDS))
         
         # Audio capture states
         self.is_capturing = False
@@ -45,6 +54,8 @@ class AudioProcessor:
         self.sound_buffer = []
         self.silence_buffer = []
         self.collected_audio = []
+        # Chunks of collected_audio already pushed to the streamer
+        self.streamed_chunks = 0
         
         # Configure threshold
         self.current_threshold = SILENCE_THRESHOLD
@@ -67,7 +78,10 @@ class AudioProcessor:
                 if not self.is_capturing:
                     self.is_capturing = True
                     print("\n🎤 Manual capture started...")
-                self.audio_queue.put(indata.copy())
+                if self.streamer:
+                    self.streamer.push(indata.copy())
+                else:
+                    self.audio_queue.put(indata.copy())
             return
             
         # Auto mode - Check audio level with noise rejection
@@ -95,11 +109,19 @@ class AudioProcessor:
         # Logic to stop capturing
         if self.is_capturing and len(self.silence_buffer) >= RATE / self.chunk_samples * DEACTIVATION_DURATION and all(self.silence_buffer):
             self.is_capturing = False
+            if self.streamer:
+                self.stream_collected_audio()
+                self.streamer.end_utterance()
             # Process all collected audio if we have enough
-            if len(self.collected_audio) > 2:
+            elif len(self.collected_audio) > 2:
                 combined_audio = np.vstack(self.collected_audio)
                 self.audio_queue.put(combined_audio)
             self.collected_audio = []
+            self.streamed_chunks = 0
+        
+        # Stream the utterance while it is being captured
+        if self.streamer and self.is_capturing:
+            self.stream_collected_audio()
         
         # Show capture indicator when status changes
         if self.is_capturing and not was_capturing:
@@ -107,13 +129,11 @@ class AudioProcessor:
         elif not self.is_capturing and was_capturing:
             print("\n🔇 Audio input stopped")
     
-    def save_audio_to_wav(self, audio_data, filename):
-        """Save audio data to WAV file"""
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(2)  # 2 bytes = 16 bits
-            wf.setframerate(RATE)
-            wf.writeframes(audio_data.tobytes())
+    def stream_collected_audio(self):
+        """Push the captured chunks the streamer has not seen yet"""
+        if len(self.collected_audio) > self.streamed_chunks:
+            self.streamer.push(np.vstack(self.collected_audio[self.streamed_chunks:]))
+            self.streamed_chunks = len(self.collected_audio)
     
     def process_audio_thread(self):
         """Thread to process audio chunks from queue"""
@@ -125,25 +145,58 @@ class AudioProcessor:
                 except queue.Empty:
                     continue
                 
-                # Create temporary WAV file
-                temp_wav = os.path.join(self.temp_dir, f"audio_{int(time.time())}.wav")
-                self.save_audio_to_wav(audio_data, temp_wav)
-                
-                # Transcribe with Whisper (explicitly disable fp16 to avoid warnings)
-                result = self.model.transcribe(temp_wav, fp16=False)
-                transcription = result["text"].strip()
-                
-                if transcription:
-                    # Display transcription with timestamp
-                    current_time = time.strftime("%H:%M:%S")
-                    print(f"\n[{current_time}] 📝 {transcription}")
+                # Idle workers pick utterances up in parallel; results come back in order
+                if self.pool:
+                    self.pool.submit(audio_data)
+                    continue
                 
-                # Clean up temp file
-                os.remove(temp_wav)
+                # Transcribe the captured samples directly; no temp WAV, no ffmpeg decode
+                # (explicitly disable fp16 to avoid warnings)
+                result = self.model.transcribe(pcm_to_float32(audio_data), fp16=False)
+                self.show_transcription(None, result["text"], None)
                 
             except Exception as e:
                 print(f"Error processing audio: {e}")
     
+    def show_transcription(self, seq, text, error):
+        """Print one transcription (called in utterance order)"""
+        if error:
+            print(f"\nError transcribing audio: {error}")
+            return
+        transcription = text.strip()
+        if transcription:
+            # Display transcription with timestamp
+            current_time = time.strftime("%H:%M:%S")
+            print(f"\n[{current_time}] 📝 {transcription}")
+    
+    def show_event(self, event, data):
+        """Print a streaming result; events are shaped like the web app's"""
+        if event == 'interim_update':
+            print(f"\r💬 {data['transcription']}", end='', flush=True)
+        elif event == 'transcription_update':
+            self.show_transcription(data['id'], data['transcription'], None)
+    
+    def show_stats(self):
+        """Print queue lag and per-worker utilization of the worker pool"""
+        if self.streamer:
+            stats = self.streamer.stats()
+            print(f"\nStreaming every {stats['step_s']} s: {stats['passes']} passes, {stats['late_passes']} late | "
+                  f"pass p50 {stats['pass_ms']['p50'] or 0:.0f} ms, p95 {stats['pass_ms']['p95'] or 0:.0f} ms | "
+                  f"window p50 {stats['window_s']['p50'] or 0:.1f} s | {stats['sentences']} sentences, "
+                  f"{stats['forced_cuts']} forced cuts")
+            return
+        if not self.pool:
+            print(f"\nIn-process model, {self.audio_queue.qsize()} utterances queued")
+            return
+        stats = self.pool.stats()
+        lag = stats['queue_lag_ms']
+        print(f"\nPending: {stats['pending']} | queue lag p50 {lag['p50'] or 0:.0f} ms, "
+              f"p95 {lag['p95'] or 0:.0f} ms | transcribe p50 {stats['transcribe_ms']['p50'] or 0:.0f} ms | "
+              f"{stats['restarts']} worker restarts")
+        for index, worker in enumerate(stats['per_worker']):
+            utilization = f"{worker['utilization']:.0%}" if worker['utilization'] is not None else "loading"
+            print(f"  worker {index}: {worker['utterances']} utterances, {utilization} busy")
+    
     def command_thread(self):
         """Thread to handle user commands"""
         print("\nCommand options:")
@@ -151,6 +204,7 @@ class AudioProcessor:
         print("  c - Start/stop manual capture")
         print("  + - Increase sensitivity")
         print("  - - Decrease sensitivity")
+        print("  s - Show transcription worker stats")
         print("  q - Quit")
         
         while self.is_running:
@@ -165,11 +219,14 @@ class AudioProcessor:
                 self.sound_buffer = []
                 self.silence_buffer = []
                 self.collected_audio = []
+                self.streamed_chunks = 0
             elif command.lower() == 'c':
                 if self.manual_mode:
                     self.force_capture = not self.force_capture
                     if not self.force_capture:
                         print("\n🔇 Manual capture stopped")
+                        if self.streamer:
+                            self.streamer.end_utterance()
                 else:
                     print("\nManual capture only works in manual mode. Type 'm' to switch to manual mode first.")
             elif command == '+':
@@ -178,6 +235,8 @@ class AudioProcessor:
             elif command == '-':
                 self.current_threshold += 50
                 print(f"\nDecreased sensitivity - new threshold: {self.current_threshold}")
+            elif command.lower() == 's':
+                self.show_stats()
             elif command.lower() == 'q':
                 self.is_running = False
                 print("\nExiting...")
@@ -224,6 +283,10 @@ class AudioProcessor:
         finally:
             # Clean up
             self.is_running = False
+            if self.pool:
+                self.pool.close()
+            if self.streamer:
+                self.streamer.close()
             print("Audio resources released.")
 
 if __name__ == "__main__":
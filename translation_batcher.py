@@ -0,0 +1,197 @@
+import os
+import threading
+from concurrent.futures import Future
+
+# Coalescing window and batch limits; a window of 0 disables batching
+BATCH_MAX_WAIT_MS = float(os.getenv("TRANSLATION_BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_CHARS = int(os.getenv("TRANSLATION_BATCH_MAX_CHARS", "10000"))
+BATCH_MAX_ITEMS = 100  # Translator v3 limit on array elements per request
+# How long a caller waits for its batch's result before giving up (seconds)
+BATCH_RESULT_TIMEOUT = 30
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, BATCH_MAX_ITEMS)
+
+
+class _Batch:
+    def __init__(self, sync_leader):
+        # True when a blocked translate() caller sends the batch, False when submit() does
+        self.sync_leader = sync_leader
+        self.texts = []
+        self.futures = []
+        self.chars = 0
+        self.ready = threading.Event()
+
+
+class TranslationBatcher:
+    def __init__(self, send, max_wait_ms=BATCH_MAX_WAIT_MS, max_batch_chars=BATCH_MAX_CHARS,
+                 max_batch_items=BATCH_MAX_ITEMS, result_timeout=BATCH_RESULT_TIMEOUT,
+                 send_async=None, call_later=None):
+        """Coalesce concurrent translations of the same language pair into one request
+
+        send(texts, from_lang, to_langs) must return one {to_lang: translation}
+        dict per text. With translate(), the first caller of a batch waits up to
+        max_wait_ms for others to join and then sends the batch on its own
+        thread. Callers wait at most result_timeout for their result.
+
+        submit() is the non-blocking form, available when send_async (same
+        arguments as send, returns a concurrent.futures.Future of the list) and
+        call_later(delay, fn) are given: no thread waits for the window or the
+        request, the window is closed by call_later and results are routed back
+        from send_async's done-callback.
+        """
+        self.send = send
+        self.send_async = send_async
+        self.call_later = call_later
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_chars = max_batch_chars
+        self.max_batch_items = max_batch_items
+        self.result_timeout = result_timeout
+
+        self.lock = threading.Lock()
+        self.open_batches = {}  # (from_lang, to_langs) -> _Batch
+
+        self.batches = 0
+        self.items = 0
+        self.chars = 0
+        self.size_histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+
+    def translate(self, text, from_lang, to_langs):
+        """Translate text as part of a batch; returns {to_lang: translation}"""
+        key = (from_lang, tuple(to_langs))
+        # The Translator counts characters once per target language
+        cost = len(text) * len(to_langs)
+        future = Future()
+        batch, is_leader, closed = self._join(key, text, cost, future, sync_leader=True)
+        for full in closed:
+            self._release(full, from_lang, to_langs)
+
+        if is_leader:
+            batch.ready.wait(self.max_wait)
+            with self.lock:
+                if self.open_batches.get(key) is batch:
+                    del self.open_batches[key]
+            self._send(batch, from_lang, to_langs)
+
+        return future.result(self.result_timeout)
+
+    def submit(self, text, from_lang, to_langs):
+        """Non-blocking translate(); returns a Future of {to_lang: translation}"""
+        key = (from_lang, tuple(to_langs))
+        cost = len(text) * len(to_langs)
+        future = Future()
+        batch, is_leader, closed = self._join(key, text, cost, future, sync_leader=False)
+        if is_leader and batch not in closed:
+            self.call_later(self.max_wait, lambda: self._window_closed(key, batch, from_lang, to_langs))
+        for full in closed:
+            self._release(full, from_lang, to_langs)
+        return future
+
+    def _join(self, key, text, cost, future, sync_leader):
+        """Add a text to the open batch for key, or open one
+
+        Returns (batch, is_leader, closed): closed lists the batches that
+        overflowed or filled up and must be released by the caller.
+        """
+        closed = []
+        with self.lock:
+            batch = self.open_batches.get(key)
+            if batch is not None and batch.chars + cost > self.max_batch_chars:
+                # Would overflow: release the open batch now and start a new one
+                del self.open_batches[key]
+                closed.append(batch)
+                batch = None
+            is_leader = batch is None
+            if is_leader:
+                batch = _Batch(sync_leader)
+                self.open_batches[key] = batch
+            batch.texts.append(text)
+            batch.futures.append(future)
+            batch.chars += cost
+            if len(batch.texts) >= self.max_batch_items or batch.chars >= self.max_batch_chars:
+                if self.open_batches.get(key) is batch:
+                    del self.open_batches[key]
+                closed.append(batch)
+        return batch, is_leader, closed
+
+    def _release(self, batch, from_lang, to_langs):
+        """Send a batch that was closed early; a waiting translate() leader sends its own"""
+        if batch.sync_leader:
+            batch.ready.set()
+        else:
+            self._send_async(batch, from_lang, to_langs)
+
+    def _window_closed(self, key, batch, from_lang, to_langs):
+        """call_later callback: send the batch unless it already went out full"""
+        with self.lock:
+            if self.open_batches.get(key) is not batch:
+                return
+            del self.open_batches[key]
+        self._send_async(batch, from_lang, to_langs)
+
+    def _send(self, batch, from_lang, to_langs):
+        """Send a closed batch and route each result back to its caller"""
+        self._record(batch)
+        try:
+            results = self.send(batch.texts, from_lang, list(to_langs))
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        self._deliver(batch, results)
+
+    def _send_async(self, batch, from_lang, to_langs):
+        """Start sending a closed batch; results are routed back when the request completes"""
+        self._record(batch)
+        try:
+            sent = self.send_async(batch.texts, from_lang, list(to_langs))
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+
+        def done(f):
+            try:
+                results = f.result()
+            except Exception as e:
+                for future in batch.futures:
+                    future.set_exception(e)
+                return
+            self._deliver(batch, results)
+
+        sent.add_done_callback(done)
+
+    def _deliver(self, batch, results):
+        """Resolve each caller's future with its result"""
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+        # A short response must not leave the remaining callers waiting
+        if len(results) < len(batch.futures):
+            error = ValueError(f"Translator returned {len(results)} results for {len(batch.futures)} texts")
+            for future in batch.futures[len(results):]:
+                future.set_exception(error)
+
+    def _record(self, batch):
+        """Count a batch in the size histogram"""
+        size = len(batch.texts)
+        with self.lock:
+            self.batches += 1
+            self.items += size
+            self.chars += batch.chars
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self.size_histogram[bucket] += 1
+                    break
+
+    def stats(self):
+        """Batch counts and the batch-size histogram"""
+        with self.lock:
+            return {
+                'max_wait_ms': self.max_wait * 1000,
+                'max_batch_chars': self.max_batch_chars,
+                'batches': self.batches,
+                'items': self.items,
+                'chars': self.chars,
+                'avg_batch_size': self.items / self.batches if self.batches else None,
+                'batch_size_histogram': {f"le_{bucket}": count for bucket, count in self.size_histogram.items()}
+            }
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Size bound and freshness of cached translations
+CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+
+
+def normalize_text(text):
+    """Cache key form of a phrase: case-folded with whitespace collapsed"""
+    return " ".join(text.split()).casefold()
+
+
+class TranslationCache:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        """Thread-safe LRU cache of translations with a time-to-live"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (translation, expires_at, size)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes_held = 0
+
+    @staticmethod
+    def make_key(text, from_lang, to_lang):
+        return (normalize_text(text), from_lang, to_lang)
+
+    def get(self, text, from_lang, to_lang):
+        """Return the cached translation or None"""
+        key = self.make_key(text, from_lang, to_lang)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            translation, expires_at, size = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.bytes_held -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return translation
+
+    def put(self, text, from_lang, to_lang, translation):
+        """Store a translation, evicting the least recently used entries when full"""
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(text, from_lang, to_lang)
+        size = sys.getsizeof(key[0]) + sys.getsizeof(translation)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes_held -= previous[2]
+            self.entries[key] = (translation, time.monotonic() + self.ttl, size)
+            self.bytes_held += size
+            while len(self.entries) > self.max_entries:
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.bytes_held -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes_held = 0
+
+    def stats(self):
+        """Hit, miss, eviction and size counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'bytes_held': self.bytes_held
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache():
+    """Return the process-wide translation cache shared by all sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache()
+        return _cache
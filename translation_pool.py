@@ -0,0 +1,210 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from metrics import counter, gauge
+
+# Worker count and how many translations may wait for a free worker
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_QUEUE_DEPTH = int(os.getenv("TRANSLATION_QUEUE_DEPTH", "32"))
+
+QUEUE_FULL_MESSAGE = "[Translation skipped: translation queue is full]"
+
+
+class TranslationWorkerPool:
+    def __init__(self, workers=TRANSLATION_WORKERS, max_queue=TRANSLATION_QUEUE_DEPTH):
+        """Bounded thread pool that runs Translator calls off the Speech SDK threads"""
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translator")
+
+        # One slot per running or waiting job; submit never blocks the caller
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.running = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn on a worker; returns a Future, or None when the pool is saturated"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+
+        with self.lock:
+            self.submitted += 1
+        future = self.executor.submit(self._run, fn, args, kwargs)
+        # Release the slot when the job finishes or is cancelled before it starts
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, fn, args, kwargs):
+        """Run a job while keeping the running counter up to date"""
+        with self.lock:
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def _done(self, future):
+        """Count a finished job and free its slot"""
+        with self.lock:
+            self.completed += 1
+            if future.cancelled():
+                self.cancelled += 1
+        self.slots.release()
+
+    def stats(self):
+        """Return worker count, queue depth and job counters"""
+        with self.lock:
+            in_flight = self.submitted - self.completed
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'running': self.running,
+                'queued': in_flight - self.running,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs"""
+        self.executor.shutdown(wait=True)
+
+
+class OrderedTranslationQueue:
+    def __init__(self, translate, deliver, announce=None, pool=None, stamp=None, translate_async=None):
+        """Per-session queue that translates concurrently but delivers in utterance order
+
+        translate(text) returns the translation, announce(utterance_id, text) runs
+        as soon as an utterance is accepted and deliver(utterance_id, text, translation)
+        runs once per utterance, strictly in submission order. stamp(utterance_id, stage)
+        is told when each translation starts and finishes.
+
+        translate_async(text), when given, replaces the worker pool: it starts the
+        translation without blocking and returns a concurrent.futures.Future, so
+        no thread is held while the request is in flight.
+        """
+        self.translate = translate
+        self.translate_async = translate_async
+        self.deliver = deliver
+        self.announce = announce
+        self.stamp = stamp
+        self.pool = pool or get_worker_pool()
+
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.next_to_deliver = 0
+        self.finished = {}
+
+    def submit(self, text):
+        """Queue text for translation and return its utterance id"""
+        with self.lock:
+            utterance_id = self.next_id
+            self.next_id += 1
+
+        if self.announce:
+            self.announce(utterance_id, text)
+
+        if self.translate_async:
+            self._submit_async(utterance_id, text)
+            return utterance_id
+
+        future = self.pool.submit(self._translate, utterance_id, text)
+        if future is None:
+            self._finish(utterance_id, text, QUEUE_FULL_MESSAGE)
+        else:
+            future.add_done_callback(lambda f: self._finish(utterance_id, text, self._result(f)))
+        return utterance_id
+
+    def _submit_async(self, utterance_id, text):
+        """Start a translation with translate_async and finish it from its done-callback"""
+        if self.stamp:
+            self.stamp(utterance_id, 'translation_sent')
+        try:
+            future = self.translate_async(text)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+
+        def done(f):
+            if self.stamp:
+                self.stamp(utterance_id, 'translation_received')
+            self._finish(utterance_id, text, self._result(f))
+
+        future.add_done_callback(done)
+
+    def _translate(self, utterance_id, text):
+        """Run translate on a worker, stamping the request's start and end"""
+        if self.stamp:
+            self.stamp(utterance_id, 'translation_sent')
+        try:
+            return self.translate(text)
+        finally:
+            if self.stamp:
+                self.stamp(utterance_id, 'translation_received')
+
+    def _result(self, future):
+        """Turn a finished future into a translation string"""
+        if future.cancelled():
+            return "[Translation error: cancelled]"
+        error = future.exception()
+        if error is not None:
+            print(f"Translation error: {error}")
+            return f"[Translation error: {str(error)}]"
+        return future.result()
+
+    def _finish(self, utterance_id, text, translation):
+        """Store a result and deliver every result that is now next in order"""
+        # Delivery happens under the lock so two workers can never reorder emits
+        with self.lock:
+            self.finished[utterance_id] = (text, translation)
+            while self.next_to_deliver in self.finished:
+                done_id = self.next_to_deliver
+                done_text, done_translation = self.finished.pop(done_id)
+                self.next_to_deliver += 1
+                try:
+                    self.deliver(done_id, done_text, done_translation)
+                except Exception as e:
+                    print(f"Error delivering translation: {e}")
+
+    def pending(self):
+        """Number of utterances accepted but not yet delivered
+
+        Read without the lock so deliver callbacks can call it safely.
+        """
+        return self.next_id - self.next_to_deliver
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Return the process-wide translation worker pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TranslationWorkerPool()
+        return _pool
+
+
+def pool_jobs():
+    """Running and queued jobs of the shared pool, for the metrics endpoint"""
+    if _pool is None:
+        return {}
+    stats = _pool.stats()
+    return {('running',): stats['running'], ('queued',): stats['queued']}
+
+
+gauge("babelingo_translation_pool_jobs", "Translation jobs running on or waiting for a worker", ("state",),
+      collect=pool_jobs)
+counter("babelingo_translation_pool_rejected_total", "Translations skipped because the worker pool queue was full",
+        collect=lambda: _pool.stats()['rejected'] if _pool else 0)
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+import time
+from translation_cache import normalize_text
+
+# Unset path disables the persistent store
+TRANSLATION_STORE_PATH = os.getenv("TRANSLATION_STORE_PATH")
+STORE_MAX_ENTRIES = int(os.getenv("TRANSLATION_STORE_MAX_ENTRIES", "200000"))
+STORE_TTL_SECONDS = float(os.getenv("TRANSLATION_STORE_TTL", str(30 * 24 * 3600)))
+
+# Hits refresh accessed_at at most this often, so lookups rarely write
+TOUCH_INTERVAL_SECONDS = 3600
+# Eviction check runs every this many writes
+EVICTION_CHECK_INTERVAL = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    text TEXT NOT NULL,
+    from_lang TEXT NOT NULL,
+    to_lang TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (text, from_lang, to_lang)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS translations_accessed_at ON translations (accessed_at);
+"""
+
+
+class PersistentTranslationStore:
+    def __init__(self, path, max_entries=STORE_MAX_ENTRIES, ttl=STORE_TTL_SECONDS):
+        """SQLite (WAL mode) translation store shared by every process on the host"""
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.local = threading.local()
+
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+        # Create the schema up front so the first lookup is not slowed down
+        self._connection()
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.executescript(SCHEMA)
+            self.local.conn = conn
+        return conn
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, text, from_lang, to_lang):
+        """Return the stored translation or None"""
+        key = (normalize_text(text), from_lang, to_lang)
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT translation, created_at, accessed_at FROM translations "
+                "WHERE text = ? AND from_lang = ? AND to_lang = ?", key
+            ).fetchone()
+            now = time.time()
+            if row is None or row[1] + self.ttl < now:
+                self._count('misses')
+                return None
+            if row[2] + TOUCH_INTERVAL_SECONDS < now:
+                conn.execute(
+                    "UPDATE translations SET accessed_at = ? "
+                    "WHERE text = ? AND from_lang = ? AND to_lang = ?", (now, *key)
+                )
+            self._count('hits')
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"Translation store error: {e}")
+            self._count('errors')
+            return None
+
+    def put(self, text, from_lang, to_lang, translation):
+        """Store a translation, evicting the least recently used rows when over the cap"""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_text(text), from_lang, to_lang, translation, now, now)
+            )
+            with self.lock:
+                self.writes += 1
+                check_size = self.writes % EVICTION_CHECK_INTERVAL == 0
+            if check_size:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"Translation store error: {e}")
+            self._count('errors')
+
+    def evict(self):
+        """Drop expired rows and trim the store back to 90% of its cap"""
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,)
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            excess = count - int(self.max_entries * 0.9)
+            removed += conn.execute(
+                "DELETE FROM translations WHERE (text, from_lang, to_lang) IN ("
+                "SELECT text, from_lang, to_lang FROM translations ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+        with self.lock:
+            self.evictions += removed
+
+    def stats(self):
+        """Hit, miss, write, eviction and error counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'errors': self.errors
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_translation_store():
+    """Return the process-wide persistent store, or None when TRANSLATION_STORE_PATH is unset"""
+    global _store
+    if not TRANSLATION_STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = PersistentTranslationStore(TRANSLATION_STORE_PATH)
+        return _store
@@ -0,0 +1,358 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from translation_cache import get_translation_cache
+from translation_store import get_translation_store
+from translation_batcher import TranslationBatcher, BATCH_MAX_WAIT_MS
+from metrics import counter, histogram
+
+load_dotenv()
+
+DEFAULT_ENDPOINT = "https://ai-aihackthonhub282549186415.cognitiveservices.azure.com/translator/text/v3.0/translate"
+
+# Connection pool and timeout settings (seconds)
+POOL_SIZE = int(os.getenv("TRANSLATOR_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.getenv("TRANSLATOR_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("TRANSLATOR_READ_TIMEOUT", "10"))
+# "requests" (blocking, one thread per call) or "httpx" (asyncio, HTTP/2)
+TRANSPORT = os.getenv("TRANSLATOR_TRANSPORT", "requests")
+
+TRANSLATOR_REQUESTS_TOTAL = counter("babelingo_translator_requests_total", "Translator HTTP requests sent")
+TRANSLATOR_ERRORS_TOTAL = counter("babelingo_translator_errors_total",
+                                  "Failed Translator requests, by HTTP status or exception type", ("kind",))
+TRANSLATOR_REQUEST_SECONDS = histogram("babelingo_translator_request_seconds",
+                                       "Translator request latency, including failures")
+
+
+def error_kind(error):
+    """HTTP status of a failed request (both transports attach the response), else the exception type"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return str(status) if status else type(error).__name__
+
+
+class TranslatorClient:
+    def __init__(self, subscription_key, region=None, endpoint=None, cache=None, store=None,
+                 batch_wait_ms=BATCH_MAX_WAIT_MS,
+                 pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 transport=TRANSPORT):
+        """Azure Translator client that reuses one keep-alive connection pool
+
+        Lookups go to the in-memory cache, then the persistent store, then the network.
+        Network requests from concurrent callers are coalesced into batches unless
+        batch_wait_ms is 0. With transport="httpx" requests run on an asyncio
+        event-loop thread and share a few HTTP/2 connections, and the submit_*
+        methods start translations without tying up a thread per request.
+        """
+        self.endpoint = endpoint or os.getenv("TRANSLATOR_ENDPOINT", DEFAULT_ENDPOINT)
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.store = store
+
+        # One pooled session per client: DNS lookup and TLS handshake are paid once
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Headers that never change between calls are built once
+        self.session.headers.update({
+            'Ocp-Apim-Subscription-Key': subscription_key or '',
+            'Content-type': 'application/json'
+        })
+        if region:
+            self.session.headers['Ocp-Apim-Subscription-Region'] = region
+
+        self.async_transport = None
+        self.store_writer = None
+        if transport == "httpx":
+            from async_translator import AsyncTranslatorTransport
+            self.async_transport = AsyncTranslatorTransport(
+                self.endpoint, dict(self.session.headers), pool_size, connect_timeout, read_timeout
+            )
+            # Results of submitted requests arrive on the event loop, which must not wait on SQLite
+            if store:
+                self.store_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translation-store")
+
+        self.batcher = None
+        if batch_wait_ms > 0:
+            # Long enough for the leader's wait plus one full request
+            self.batcher = TranslationBatcher(
+                self._request, max_wait_ms=batch_wait_ms,
+                result_timeout=batch_wait_ms / 1000 + connect_timeout + read_timeout,
+                send_async=self._request_future if self.async_transport else None,
+                call_later=self._call_later if self.async_transport else None
+            )
+
+        # Per-call latency statistics
+        self.stats_lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.last_latency_ms = None
+
+    def translate_multi_timed(self, text, from_lang, to_langs, bypass_cache=False):
+        """Translate text into several languages in one request
+
+        Languages found in the cache or store are not requested again.
+        bypass_cache=True is for short-lived text such as speculative interim
+        prefixes: it is sent on its own request, never batched, and neither
+        looked up in nor written to the cache and store.
+        Returns ({to_lang: translated_text}, latency_ms); raises on failure.
+        """
+        start = time.perf_counter()
+        if bypass_cache:
+            translated = self._request([text], from_lang, list(to_langs))[0] if to_langs else {}
+            return translated, (time.perf_counter() - start) * 1000
+
+        translated = {}
+        missing = []
+        for to_lang in to_langs:
+            cached = self._lookup(text, from_lang, to_lang)
+            if cached is None:
+                missing.append(to_lang)
+            else:
+                translated[to_lang] = cached
+
+        if missing:
+            if self.batcher:
+                fetched = self.batcher.translate(text, from_lang, missing)
+            else:
+                fetched = self._request([text], from_lang, missing)[0]
+            self._remember(text, from_lang, fetched)
+            translated.update(fetched)
+
+        return translated, (time.perf_counter() - start) * 1000
+
+    def submit_translate_multi(self, text, from_lang, to_langs):
+        """Start translating text into several languages; returns a concurrent.futures.Future
+
+        Needs the httpx transport. Cache and store hits complete the future at
+        once; misses join a batch (or go out alone) on the event loop, and the
+        future completes from the request's done-callback, so the number of
+        requests in flight is bounded by the transport, not by threads.
+        """
+        result = Future()
+        translated = {}
+        missing = []
+        for to_lang in to_langs:
+            cached = self._lookup(text, from_lang, to_lang)
+            if cached is None:
+                missing.append(to_lang)
+            else:
+                translated[to_lang] = cached
+        if not missing:
+            result.set_result(translated)
+            return result
+
+        if self.batcher:
+            fetching = self.batcher.submit(text, from_lang, missing)
+        else:
+            fetching = self._chain(self._request_future([text], from_lang, missing), lambda results: results[0])
+
+        def done(f):
+            try:
+                fetched = f.result()
+            except Exception as e:
+                result.set_exception(e)
+                return
+            self._remember(text, from_lang, fetched)
+            translated.update(fetched)
+            result.set_result(translated)
+
+        fetching.add_done_callback(done)
+        return result
+
+    def submit_translate(self, text, from_lang='en', to_lang='es'):
+        """Start translating text; returns a concurrent.futures.Future of the translation"""
+        return self._chain(self.submit_translate_multi(text, from_lang, [to_lang]),
+                           lambda translated: translated[to_lang])
+
+    def _remember(self, text, from_lang, fetched):
+        """Write fetched translations to the cache and the store"""
+        for to_lang, translation in fetched.items():
+            if self.cache:
+                self.cache.put(text, from_lang, to_lang, translation)
+            if self.store:
+                if self.store_writer:
+                    self.store_writer.submit(self.store.put, text, from_lang, to_lang, translation)
+                else:
+                    self.store.put(text, from_lang, to_lang, translation)
+
+    @staticmethod
+    def _chain(future, transform):
+        """Future of transform(future.result()), propagating failures"""
+        chained = Future()
+
+        def done(f):
+            try:
+                chained.set_result(transform(f.result()))
+            except Exception as e:
+                chained.set_exception(e)
+
+        future.add_done_callback(done)
+        return chained
+
+    def _call_later(self, delay, fn):
+        """Run fn on the event loop after delay seconds (the batcher's window timer)"""
+        loop = self.async_transport.loop
+        loop.call_soon_threadsafe(loop.call_later, delay, fn)
+
+    def _lookup(self, text, from_lang, to_lang):
+        """Find a translation in the cache or the persistent store"""
+        if self.cache:
+            cached = self.cache.get(text, from_lang, to_lang)
+            if cached is not None:
+                return cached
+        if self.store:
+            stored = self.store.get(text, from_lang, to_lang)
+            if stored is not None:
+                # Promote to the in-memory cache so the next lookup skips SQLite
+                if self.cache:
+                    self.cache.put(text, from_lang, to_lang, stored)
+                return stored
+        return None
+
+    @staticmethod
+    def _request_body(texts, from_lang, to_langs):
+        """Query parameters and JSON body of one Translator request"""
+        params = [('api-version', '3.0'), ('from', from_lang)]
+        params += [('to', to_lang) for to_lang in to_langs]
+        return params, [{'text': text} for text in texts]
+
+    @staticmethod
+    def _parse(result, to_langs):
+        """One {to_lang: translated_text} per text of a Translator response"""
+        # Results follow the order of the body; translations the order of 'to'
+        return [
+            {to_lang: t['text'] for to_lang, t in zip(to_langs, item['translations'])}
+            for item in result
+        ]
+
+    def _request_future(self, texts, from_lang, to_langs):
+        """Start one request on the httpx transport; returns a Future of _request's result"""
+        params, body = self._request_body(texts, from_lang, to_langs)
+        start = time.perf_counter()
+        # The timeout also covers waiting for an in-flight slot
+        response = self.async_transport.submit(params, body, timeout=self.async_transport.timeout)
+        translated = Future()
+
+        def done(f):
+            latency_ms = (time.perf_counter() - start) * 1000
+            try:
+                result = self._parse(f.result(), to_langs)
+            except Exception as e:
+                self._record(latency_ms, error=error_kind(e))
+                translated.set_exception(e)
+                return
+            self._record(latency_ms)
+            translated.set_result(result)
+
+        response.add_done_callback(done)
+        return translated
+
+    def _request(self, texts, from_lang, to_langs):
+        """Send one Translator request and return one {to_lang: translated_text} per text"""
+        params, body = self._request_body(texts, from_lang, to_langs)
+
+        start = time.perf_counter()
+        try:
+            if self.async_transport:
+                result = self.async_transport.post_sync(params, body)
+            else:
+                response = self.session.post(
+                    self.endpoint,
+                    params=params,
+                    json=body,
+                    headers={'X-ClientTraceId': str(uuid.uuid4())},
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                result = response.json()
+            translated = self._parse(result, to_langs)
+        except Exception as e:
+            self._record((time.perf_counter() - start) * 1000, error=error_kind(e))
+            raise
+
+        self._record((time.perf_counter() - start) * 1000)
+        return translated
+
+    def translate_multi(self, text, from_lang, to_langs, bypass_cache=False):
+        """Translate text into several languages in one request; raises on failure"""
+        translated, _ = self.translate_multi_timed(text, from_lang, to_langs, bypass_cache=bypass_cache)
+        return translated
+
+    def translate_timed(self, text, from_lang='en', to_lang='es', bypass_cache=False):
+        """Translate text and return (translated_text, latency_ms); raises on failure"""
+        translated, latency_ms = self.translate_multi_timed(text, from_lang, [to_lang], bypass_cache=bypass_cache)
+        return translated[to_lang], latency_ms
+
+    def translate(self, text, from_lang='en', to_lang='es', bypass_cache=False):
+        """Translate text; raises on failure"""
+        translated_text, _ = self.translate_timed(text, from_lang, to_lang, bypass_cache=bypass_cache)
+        return translated_text
+
+    def _record(self, latency_ms, error=None):
+        """Record the latency of a single call; error is the failure kind, if it failed"""
+        TRANSLATOR_REQUESTS_TOTAL.inc()
+        TRANSLATOR_REQUEST_SECONDS.observe(latency_ms / 1000)
+        if error:
+            TRANSLATOR_ERRORS_TOTAL.inc(kind=error)
+        with self.stats_lock:
+            self.calls += 1
+            if error:
+                self.errors += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+            self.last_latency_ms = latency_ms
+
+    def stats(self):
+        """Return a snapshot of the request, latency and cache counters"""
+        with self.stats_lock:
+            stats = {
+                'calls': self.calls,
+                'errors': self.errors,
+                'last_latency_ms': self.last_latency_ms,
+                'avg_latency_ms': self.total_latency_ms / self.calls if self.calls else None,
+                'max_latency_ms': self.max_latency_ms
+            }
+        if self.cache:
+            stats['cache'] = self.cache.stats()
+        if self.store:
+            stats['store'] = self.store.stats()
+        if self.batcher:
+            stats['batching'] = self.batcher.stats()
+        if self.async_transport:
+            stats['async_transport'] = self.async_transport.stats()
+        return stats
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+        if self.async_transport:
+            self.async_transport.close()
+        if self.store_writer:
+            self.store_writer.shutdown(wait=True)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_translator(subscription_key=None, region=None, endpoint=None):
+    """Return the process-wide client for the given credentials, creating it on first use"""
+    subscription_key = subscription_key or os.getenv("AZURE_API_KEY")
+    key = (subscription_key, region, endpoint)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = TranslatorClient(subscription_key, region=region, endpoint=endpoint,
+                                      cache=get_translation_cache(),
+                                      store=get_translation_store())
+            _clients[key] = client
+        return client
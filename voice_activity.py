@@ -0,0 +1,121 @@
+import os
+import threading
+import numpy as np
+
+# Energy gate settings; the threshold is the mean absolute int16 amplitude of a frame.
+# Off by default: browser audio arrives at an unknown gain, and a quiet speaker below
+# a fixed threshold would be dropped before reaching Azure
+VAD_ENABLED = os.getenv("VAD_ENABLED", "0") == "1"
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "300"))
+VAD_FRAME_MS = 20
+# Silence kept after speech; must stay above Speech_SegmentationSilenceTimeoutMs so
+# the recognizer still sees the pause that ends an utterance
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "800"))
+# Silence kept before speech so onsets are not clipped
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))
+
+SAMPLE_RATE = 16000
+
+
+class VoiceActivityGate:
+    def __init__(self, write, threshold=VAD_THRESHOLD, frame_ms=VAD_FRAME_MS,
+                 hangover_ms=VAD_HANGOVER_MS, preroll_ms=VAD_PREROLL_MS, sample_rate=SAMPLE_RATE):
+        """Energy-plus-hangover voice activity gate for 16-bit mono PCM
+
+        Audio is split into fixed frames and scored in one vectorized pass per
+        chunk. Voiced frames pass, followed by hangover_ms of trailing silence
+        and preceded by preroll_ms of leading silence; anything else is dropped,
+        so long silences shrink to roughly hangover + pre-roll.
+        """
+        self.write = write
+        self.threshold = threshold
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = frame_ms / 1000
+        self.hangover_frames = hangover_ms // frame_ms
+        self.preroll_frames = preroll_ms // frame_ms
+
+        self.lock = threading.Lock()
+        # Leftover samples that did not fill a whole frame
+        self.remainder = np.empty(0, dtype=np.int16)
+        # Suppressed frames just before the current chunk, replayed as pre-roll
+        self.tail = np.empty((0, self.frame_len), dtype=np.int16)
+        # Frames since the last voiced frame (start large: begin in silence)
+        self.since_voice = self.hangover_frames + 1
+
+        self.frames_in = 0
+        self.frames_passed = 0
+        self.frames_suppressed = 0
+
+    def process(self, chunk):
+        """Gate one chunk of PCM bytes and write the frames that pass"""
+        with self.lock:
+            samples = np.frombuffer(chunk, dtype=np.int16)
+            if self.remainder.size:
+                samples = np.concatenate((self.remainder, samples))
+            n = samples.size // self.frame_len
+            self.remainder = samples[n * self.frame_len:].copy()
+            if n == 0:
+                return
+
+            frames = samples[:n * self.frame_len].reshape(n, self.frame_len)
+            energy = np.abs(frames.astype(np.int32)).mean(axis=1)
+            voiced = energy > self.threshold
+
+            idx = np.arange(n)
+            # Index of the most recent voiced frame at or before each frame
+            last_voiced = np.maximum.accumulate(np.where(voiced, idx, -self.since_voice - 1))
+            # Index of the next voiced frame at or after each frame
+            next_voiced = np.minimum.accumulate(np.where(voiced, idx, n + self.preroll_frames + 1)[::-1])[::-1]
+
+            in_hangover = idx - last_voiced <= self.hangover_frames
+            in_preroll = next_voiced - idx <= self.preroll_frames
+            keep = in_hangover | in_preroll
+
+            out = frames if keep.all() else frames[keep]
+            # Speech near the start of the chunk takes the rest of its pre-roll
+            # from the suppressed frames that ended the previous chunks
+            replayed = 0
+            if keep[0] and self.tail.size:
+                needed = self.preroll_frames - int(next_voiced[0])
+                if needed > 0:
+                    replay = self.tail[-needed:]
+                    out = np.concatenate((replay, out))
+                    replayed = len(replay)
+
+            # Remember the trailing suppressed frames for the next chunk's pre-roll
+            if keep[-1]:
+                self.tail = self.tail[:0]
+            else:
+                kept_idx = np.flatnonzero(keep)
+                if kept_idx.size:
+                    self.tail = frames[kept_idx[-1] + 1:]
+                else:
+                    self.tail = np.concatenate((self.tail, frames))
+                self.tail = self.tail[-self.preroll_frames:].copy() if self.preroll_frames else self.tail[:0]
+            self.since_voice = min(n - 1 - int(last_voiced[-1]), self.hangover_frames + 1)
+
+            passed = int(keep.sum())
+            self.frames_in += n
+            self.frames_passed += passed + replayed
+            self.frames_suppressed += n - passed - replayed
+            if out.size:
+                self.write(out.tobytes())
+
+    def flush(self):
+        """Write any leftover partial frame"""
+        with self.lock:
+            if self.remainder.size:
+                self.write(self.remainder.tobytes())
+                self.remainder = self.remainder[:0]
+
+    def stats(self):
+        """How much audio was passed and suppressed"""
+        with self.lock:
+            return {
+                'threshold': self.threshold,
+                'frames_in': self.frames_in,
+                'frames_passed': self.frames_passed,
+                'frames_suppressed': self.frames_suppressed,
+                'seconds_suppressed': self.frames_suppressed * self.frame_seconds,
+                'suppressed_ratio': self.frames_suppressed / self.frames_in if self.frames_in else None
+            }